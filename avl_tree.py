@@ -1,7 +1,7 @@
-from typing import Optional, Any
-from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Any, Tuple
+from dataclasses import dataclass, field
 
-@dataclass
+@dataclass(slots=True)
 class AVLNode:
     key: Any
     data: Optional[Any] = None
@@ -13,13 +13,64 @@ class AVLNode:
     def is_leaf(self) -> bool:
         return self.height == 0
 
+@dataclass(slots=True)
+class AugmentedAVLNode(AVLNode):
+    # Somas da subárvore: quantidade e quantidade * preço (chave)
+    sumQty: Any = 0
+    sumNotional: Any = 0
+
 @dataclass
 class AVLTree:
     root: Optional[AVLNode] = None
+    # Nós de menor e maior chave, mantidos na inserção e na remoção
+    minNode: Optional[AVLNode] = field(default=None, repr=False)
+    maxNode: Optional[AVLNode] = field(default=None, repr=False)
+
+    # Classe dos nós criados pela árvore
+    nodeClass = AVLNode
+
+    @classmethod
+    def fromSorted(cls, pairs: Iterable[Tuple[Any, Any]]) -> 'AVLTree':
+        """
+            Constrói uma árvore perfeitamente balanceada a partir de pares
+            (chave, dado) em ordem estritamente crescente de chave, em O(n),
+            sem inserções nem rotações.
+        """
+        nodes = [cls.nodeClass(key=key, data=data) for key, data in pairs]
+        for i in range(1, len(nodes)):
+            if not nodes[i - 1].key < nodes[i].key:
+                raise ValueError(f"Chaves fora de ordem: <{nodes[i - 1].key}>, <{nodes[i].key}>")
+
+        tree = cls()
+        tree.root = tree._build(nodes, 0, len(nodes), None)
+        if nodes:
+            tree.minNode = nodes[0]
+            tree.maxNode = nodes[-1]
+        return tree
+
+    def _build(self, nodes: List[AVLNode], lo: int, hi: int, parent: Optional[AVLNode]) -> Optional[AVLNode]:
+        """ Liga nodes[lo:hi] numa subárvore com raiz no elemento do meio. """
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        node = nodes[mid]
+        node.parent = parent
+        node.left = self._build(nodes, lo, mid, node)
+        node.right = self._build(nodes, mid + 1, hi, node)
+        self._updateHeight(node)
+        return node
 
     def insert(self, insert_node: AVLNode) -> None:
         if self.root is None:
             self.root = insert_node 
+            self.minNode = insert_node
+            self.maxNode = insert_node
+            return
+
+        if insert_node.key < self.minNode.key:
+            self.minNode = insert_node
+        elif insert_node.key > self.maxNode.key:
+            self.maxNode = insert_node
 
         node = self.root
         while True:
@@ -40,11 +91,64 @@ class AVLTree:
             else:
                 return
 
-    def traverse(self, node: Optional[AVLNode] = None) -> None:
-        if node:
-            yield from self.traverse(node.left)
-            yield node
-            yield from self.traverse(node.right)
+    def traverse(self, node: Optional[AVLNode] = None) -> Iterator[AVLNode]:
+        """ Percorre a subárvore em ordem, com pilha explícita (sem geradores aninhados). """
+        stack = []
+        while stack or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.left
+            else:
+                node = stack.pop()
+                yield node
+                node = node.right
+
+    def ceilingNode(self, key: Any) -> Optional[AVLNode]:
+        """ Nó de menor chave >= key, em O(log n). """
+        node = self.root
+        result = None
+        while node is not None:
+            if node.key < key:
+                node = node.right
+            else:
+                result = node
+                node = node.left
+        return result
+
+    def floorNode(self, key: Any) -> Optional[AVLNode]:
+        """ Nó de maior chave <= key, em O(log n). """
+        node = self.root
+        result = None
+        while node is not None:
+            if node.key > key:
+                node = node.left
+            else:
+                result = node
+                node = node.right
+        return result
+
+    def iterRange(self, low: Any = None, high: Any = None, reverse: bool = False) -> Iterator[AVLNode]:
+        """
+            Nós com low <= chave <= high (None: sem limite), em ordem crescente,
+            ou decrescente com reverse. Acha o primeiro nó em O(log n) e para no
+            último, custando proporcional ao que entrega. O nó entregue pode ser
+            removido durante a iteração.
+        """
+        if not reverse:
+            node = self.minNode if low is None else self.ceilingNode(low)
+            getNext = self.getSuccessor
+            while node is not None and (high is None or node.key <= high):
+                # Nós mantêm identidade na remoção, então o próximo continua válido
+                next_node = getNext(node)
+                yield node
+                node = next_node
+        else:
+            node = self.maxNode if high is None else self.floorNode(high)
+            getNext = self.getPredecessor
+            while node is not None and (low is None or node.key >= low):
+                next_node = getNext(node)
+                yield node
+                node = next_node
 
     def _rebalance(self, node: Optional[AVLNode]) -> None:
         while node is not None:
@@ -136,20 +240,34 @@ class AVLTree:
         return self._getHeight(node.left) - self._getHeight(node.right)
 
     def delete(self, node: AVLNode) -> None:
+        # Atualiza os extremos antes de desligar o nó
+        if node is self.minNode:
+            self.minNode = self.getSuccessor(node)
+        if node is self.maxNode:
+            self.maxNode = self.getPredecessor(node)
+
         if node.left is None:
+            # Nó mais baixo alterado, a partir do qual a árvore é rebalanceada
+            rebalance_node = node.parent
             self._transplant(node, node.right)
         elif node.right is None:
+            rebalance_node = node.parent
             self._transplant(node, node.left)
         else:
             successor = self.getSuccessor(node)
             if successor.parent is not node:
+                rebalance_node = successor.parent
                 self._transplant(successor, successor.right)
                 successor.right = node.right
                 successor.right.parent = successor
+            else:
+                rebalance_node = successor
             self._transplant(node, successor)
             successor.left = node.left
             successor.left.parent = successor
 
+        self._rebalance(rebalance_node)
+
     def _transplant(self, node1: AVLNode, node2: Optional[AVLNode]) -> None:
         if node1.parent is None:
             self.root = node2
@@ -170,3 +288,57 @@ class AVLTree:
             else:
                 return node
         return None
+
+
+class AugmentedAVLTree(AVLTree):
+    """
+        Árvore AVL em que cada nó guarda as somas da sua subárvore: quantidade
+        (data.qty) e valor financeiro (data.qty * chave). As somas são refeitas
+        junto com a altura, então rotações, inserções e remoções as mantêm; se
+        a quantidade de um nó mudar sem alterar a árvore, updateAggregates(node)
+        corrige o caminho até a raiz em O(log n).
+    """
+    nodeClass = AugmentedAVLNode
+
+    def insert(self, insert_node: AugmentedAVLNode) -> None:
+        AVLTree.insert(self, insert_node)
+        if insert_node is self.root:
+            # Primeiro nó: a inserção não passa pelo rebalanceamento
+            self._updateHeight(insert_node)
+
+    def _updateHeight(self, node: AugmentedAVLNode) -> None:
+        left = node.left
+        right = node.right
+        qty = node.data.qty
+        sumQty = qty
+        sumNotional = qty * node.key
+        leftHeight = rightHeight = 0
+        if left is not None:
+            leftHeight = left.height
+            sumQty += left.sumQty
+            sumNotional += left.sumNotional
+        if right is not None:
+            rightHeight = right.height
+            sumQty += right.sumQty
+            sumNotional += right.sumNotional
+        node.height = max(leftHeight, rightHeight) + 1
+        node.sumQty = sumQty
+        node.sumNotional = sumNotional
+
+    def updateAggregates(self, node: Optional[AugmentedAVLNode]) -> None:
+        """ Refaz as somas do nó e de seus ancestrais, após mudar a quantidade do nó. """
+        while node is not None:
+            qty = node.data.qty
+            sumQty = qty
+            sumNotional = qty * node.key
+            left = node.left
+            if left is not None:
+                sumQty += left.sumQty
+                sumNotional += left.sumNotional
+            right = node.right
+            if right is not None:
+                sumQty += right.sumQty
+                sumNotional += right.sumNotional
+            node.sumQty = sumQty
+            node.sumNotional = sumNotional
+            node = node.parent
@@ -0,0 +1,107 @@
+from typing import Dict, List
+from binary_protocol import MSG_LIMIT, MSG_MARKET, MSG_CANCEL, Record
+import random
+
+# Perfis de fluxo de ordens sintético
+PROFILES = ('passive', 'sweep', 'deep', 'churn')
+
+
+class OrderFlow:
+    """
+        Gerador determinístico (pela semente) de mensagens no formato de
+        binary_protocol: (tipo, lado, id, preço, quantidade), com preços em
+        ticks inteiros em torno de midPrice e ids explícitos, a partir de 1.
+    """
+    def __init__(self, seed: int = 0, midPrice: int = 10000):
+        self.rng = random.Random(seed)
+        self.midPrice = midPrice
+        self.nextId = 1
+        # Ids possivelmente em livro, por lado, para gerar cancelamentos
+        self.live: List[List[int]] = [[], []]
+        self.records: List[Record] = []
+
+    def limit(self, side: int, minTicks: int, maxTicks: int, maxQty: int = 10):
+        """ Ordem limite a uma distância aleatória do meio, do lado passivo. """
+        distance = self.rng.randint(minTicks, maxTicks)
+        price = self.midPrice - distance if side == 0 else self.midPrice + distance
+        orderId = self.nextId
+        self.nextId += 1
+        self.live[side].append(orderId)
+        self.records.append((MSG_LIMIT, side, orderId, price, self.rng.randint(1, maxQty)))
+
+    def market(self, side: int, maxQty: int):
+        orderId = self.nextId
+        self.nextId += 1
+        self.records.append((MSG_MARKET, side, orderId, 0, self.rng.randint(1, maxQty)))
+
+    def cancel(self, side: int):
+        live = self.live[side]
+        if not live:
+            return self.limit(side, 1, 20)
+        # Troca com o último para remover em O(1)
+        i = self.rng.randrange(len(live))
+        live[i], live[-1] = live[-1], live[i]
+        self.records.append((MSG_CANCEL, 0, live.pop(), 0, 0))
+
+    def side(self) -> int:
+        return self.rng.randrange(2)
+
+
+def _passive(flow: OrderFlow, count: int):
+    """ Livro majoritariamente passivo: ordens limite fora do spread, poucos cancelamentos e agressões. """
+    rng = flow.rng
+    while len(flow.records) < count:
+        action = rng.random()
+        if action < 0.9:
+            flow.limit(flow.side(), 1, 50)
+        elif action < 0.95:
+            flow.cancel(flow.side())
+        else:
+            flow.market(flow.side(), 5)
+
+def _sweep(flow: OrderFlow, count: int):
+    """ Agressões grandes que varrem vários níveis, intercaladas com reposição do livro. """
+    rng = flow.rng
+    while len(flow.records) < count:
+        if rng.random() < 0.4:
+            flow.market(flow.side(), 200)
+        else:
+            flow.limit(flow.side(), 1, 30)
+
+def _deep(flow: OrderFlow, count: int):
+    """ Livro profundo (muitos níveis de preço), com agressões ocasionais. """
+    rng = flow.rng
+    depth = max(count // 4, 1)
+    while len(flow.records) < count:
+        if rng.random() < 0.97:
+            flow.limit(flow.side(), 1, depth)
+        else:
+            flow.market(flow.side(), 20)
+
+def _churn(flow: OrderFlow, count: int):
+    """ Níveis criados e destruídos o tempo todo: ordens perto do meio e muitos cancelamentos. """
+    rng = flow.rng
+    while len(flow.records) < count:
+        action = rng.random()
+        if action < 0.45:
+            flow.limit(flow.side(), 1, 8, maxQty=3)
+        elif action < 0.9:
+            flow.cancel(flow.side())
+        else:
+            flow.market(flow.side(), 3)
+
+_GENERATORS = {'passive': _passive, 'sweep': _sweep, 'deep': _deep, 'churn': _churn}
+
+
+def generate(profile: str, count: int, seed: int = 0, midPrice: int = 10000) -> List[Record]:
+    """ Gera count mensagens do perfil, sempre as mesmas para a mesma semente. """
+    try:
+        generator = _GENERATORS[profile]
+    except KeyError:
+        raise ValueError(f"Perfil inválido: <{profile}>")
+    flow = OrderFlow(seed, midPrice)
+    generator(flow, count)
+    return flow.records[:count]
+
+def generateAll(count: int, seed: int = 0) -> Dict[str, List[Record]]:
+    return {profile: generate(profile, count, seed) for profile in PROFILES}
@@ -0,0 +1,215 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from order import Order, OrderSide, OrderType
+from orderbook import IOrderBook, OrderBook
+from ladder_orderbook import TickLadderOrderBook
+from avl_tree import AVLNode, AVLTree
+from matching_engine import MatchingEngine
+from trade_sink import NullSink
+from binary_protocol import MSG_LIMIT, MSG_MARKET, MSG_CANCEL, SIDES, Record, dispatch
+from benchmarks.order_flow import PROFILES, generate
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+# Percentis de latência reportados
+PERCENTILES = (50, 90, 99, 99.9)
+
+# Fábricas de livro por nome, recebendo o lado do livro
+BOOKS: Dict[str, Callable[[OrderSide], IOrderBook]] = {
+    'avl': lambda side: OrderBook(side=side),
+    'avl-augmented': lambda side: OrderBook(augmented=True, side=side),
+    'sorted-array': lambda side: OrderBook(backend='sorted-array', side=side),
+    'btree': lambda side: OrderBook(backend='btree', side=side),
+    'ladder': lambda side: TickLadderOrderBook(referencePrice=10000),
+}
+
+
+def summarize(latencies: List[int], seconds: float) -> dict:
+    """ Vazão (operações por segundo) e percentis de latência em ns. """
+    latencies = sorted(latencies)
+    n = len(latencies)
+    result = {'ops': n, 'seconds': seconds, 'throughput': n / seconds if seconds > 0 else 0.0}
+    for p in PERCENTILES:
+        result[f'p{p}_ns'] = latencies[min(n - 1, int(p / 100 * n))] if n else 0
+    result['max_ns'] = latencies[-1] if n else 0
+    return result
+
+def _makeEngine(bookFactory: Callable[[OrderSide], IOrderBook]) -> MatchingEngine:
+    return MatchingEngine(bookFactory(OrderSide.BUY), bookFactory(OrderSide.SELL), history=None, sinks=[NullSink()])
+
+def _engineOps(engine: MatchingEngine, records: List[Record]) -> List[Tuple[Callable, tuple]]:
+    """ Monta as chamadas antes de cronometrar, para medir apenas o engine. """
+    ops = []
+    for msgType, side, orderId, price, qty in records:
+        if msgType == MSG_LIMIT:
+            ops.append((engine.order, (Order(OrderType.LIMIT, SIDES[side], price, qty, orderId),)))
+        elif msgType == MSG_MARKET:
+            ops.append((engine.order, (Order(OrderType.MARKET, SIDES[side], None, qty, orderId),)))
+        elif msgType == MSG_CANCEL:
+            ops.append((engine.cancel, (orderId,)))
+    return ops
+
+def _timed(ops: List[Tuple[Callable, tuple]]) -> List[int]:
+    now = time.perf_counter_ns
+    latencies = []
+    append = latencies.append
+    for fn, args in ops:
+        start = now()
+        fn(*args)
+        append(now() - start)
+    return latencies
+
+def benchEngine(records: List[Record], bookFactory: Callable[[OrderSide], IOrderBook]) -> dict:
+    """
+        MatchingEngine.order/cancel sobre o fluxo de mensagens. A vazão vem de
+        uma passada sem cronômetro; as latências, de uma segunda passada.
+    """
+    start = time.perf_counter()
+    dispatch(_makeEngine(bookFactory), records)
+    seconds = time.perf_counter() - start
+
+    engine = _makeEngine(bookFactory)
+    return summarize(_timed(_engineOps(engine, records)), seconds)
+
+def benchBook(count: int, seed: int, bookFactory: Callable[[OrderSide], IOrderBook]) -> Dict[str, dict]:
+    """ add de ordens em preços aleatórios e popQty no melhor preço até esvaziar. """
+    rng = random.Random(seed)
+    orders = [Order(OrderType.LIMIT, OrderSide.SELL, rng.randint(9000, 11000), rng.randint(1, 10), i)
+              for i in range(1, count + 1)]
+    book = bookFactory(OrderSide.SELL)
+    results = {}
+
+    ops = [(book.add, (order,)) for order in orders]
+    start = time.perf_counter()
+    results['add'] = _timed(ops)
+    results['add_seconds'] = time.perf_counter() - start
+
+    now = time.perf_counter_ns
+    popQty = book.popQty
+    latencies = []
+    start = time.perf_counter()
+    while book.getSize():
+        price = book.getMinPrice()
+        t0 = now()
+        popQty(price, 7)
+        latencies.append(now() - t0)
+    results['popQty'] = latencies
+    results['popQty_seconds'] = time.perf_counter() - start
+
+    return {
+        'add': summarize(results['add'], results['add_seconds']),
+        'popQty': summarize(results['popQty'], results['popQty_seconds']),
+    }
+
+def benchAVL(count: int, seed: int) -> Dict[str, dict]:
+    """ insert, get e delete de chaves aleatórias na árvore. """
+    rng = random.Random(seed)
+    keys = rng.sample(range(count * 10), count)
+    tree = AVLTree()
+    nodes = [AVLNode(key=key) for key in keys]
+
+    results = {}
+    deleteOrder = rng.sample(nodes, count)
+    for name, makeOps in (
+            ('insert', lambda: [(tree.insert, (node,)) for node in nodes]),
+            ('get', lambda: [(tree.get, (key,)) for key in keys]),
+            ('delete', lambda: [(tree.delete, (node,)) for node in deleteOrder])):
+        ops = makeOps()
+        start = time.perf_counter()
+        latencies = _timed(ops)
+        results[name] = summarize(latencies, time.perf_counter() - start)
+    return results
+
+def gitCommit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def runAll(count: int = 100000, seed: int = 0, profiles=PROFILES, books=('avl',)) -> dict:
+    """ Executa todos os benchmarks e retorna os resultados num dicionário serializável em JSON. """
+    results = {}
+    for book in books:
+        bookFactory = BOOKS[book]
+        for profile in profiles:
+            results[f'engine.order/{book}/{profile}'] = benchEngine(generate(profile, count, seed), bookFactory)
+        for name, result in benchBook(count, seed, bookFactory).items():
+            results[f'book.{name}/{book}'] = result
+    for name, result in benchAVL(count, seed).items():
+        results[f'avl.{name}'] = result
+
+    return {
+        'meta': {
+            'commit': gitCommit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'count': count,
+            'seed': seed,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> Tuple[List[str], List[str]]:
+    """
+        Compara a vazão e o p99 com um resultado anterior. Retorna as linhas do
+        relatório e os benchmarks que pioraram mais que threshold (fração).
+    """
+    lines = [f"{'benchmark':40} {'vazão':>12} {'anterior':>12} {'razão':>7} {'p99 ns':>10} {'anterior':>10}"]
+    regressions = []
+    for key in ('count', 'seed'):
+        if baseline['meta'].get(key) != current['meta'].get(key):
+            lines.insert(0, f"Atenção: {key} diferente do resultado anterior")
+    for name, result in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        ratio = result['throughput'] / old['throughput'] if old['throughput'] else 0.0
+        lines.append(f"{name:40} {result['throughput']:12.0f} {old['throughput']:12.0f} {ratio:7.2f} "
+                     f"{result['p99_ns']:10d} {old['p99_ns']:10d}")
+        if ratio < 1 - threshold:
+            regressions.append(name)
+    return lines, regressions
+
+def parseArgs(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks do matching engine.")
+    parser.add_argument('--count', type=int, default=100000, help="Mensagens por perfil.")
+    parser.add_argument('--seed', type=int, default=0, help="Semente do gerador de fluxo.")
+    parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=list(PROFILES))
+    parser.add_argument('--book', nargs='+', choices=sorted(BOOKS), default=['avl'])
+    parser.add_argument('--output', help="Grava os resultados em JSON.")
+    parser.add_argument('--compare', metavar='BASELINE', help="Compara com um resultado JSON anterior.")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="Queda de vazão tolerada na comparação (fração).")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parseArgs(argv)
+    current = runAll(args.count, args.seed, args.profiles, args.book)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+
+    for name, result in current['results'].items():
+        print(f"{name:40} {result['throughput']:12.0f} ops/s  p50 {result['p50_ns']:8d} ns  "
+              f"p99 {result['p99_ns']:8d} ns  max {result['max_ns']:10d} ns")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        lines, regressions = compare(baseline, current, args.threshold)
+        print()
+        print("\n".join(lines))
+        if regressions:
+            print(f"\nPioraram: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
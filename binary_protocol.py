@@ -0,0 +1,122 @@
+from typing import Iterable, Iterator, Optional, Tuple
+from order import Order, OrderSide, OrderType
+from matching_engine import MatchingEngine
+import mmap
+import struct
+
+# Tipos de mensagem
+MSG_LIMIT = 0
+MSG_MARKET = 1
+MSG_CANCEL = 2
+MSG_AMEND = 3
+# Início do leilão e uncross (lado 1: preço de referência no campo de preço)
+MSG_AUCTION = 4
+MSG_UNCROSS = 5
+# Prefixo de ordem stop: o preço de disparo (campo de preço) vale para o
+# MSG_MARKET (STOP) ou MSG_LIMIT (STOP_LIMIT) seguinte
+MSG_STOP = 6
+
+# Registro de tamanho fixo, little-endian, 32 bytes:
+#   tipo (u8), lado (u8), padding (6), id (i64), preço (i64), quantidade (i64)
+# Preço e quantidade são inteiros (ticks e lotes, como no modo de ponto fixo).
+# Id 0 significa "sem id": o engine atribui o próximo sequencial.
+RECORD = struct.Struct('<BB6xqqq')
+
+SIDES = (OrderSide.BUY, OrderSide.SELL)
+
+Record = Tuple[int, int, int, int, int]
+
+
+def encode(msgType: int, side: int = 0, orderId: int = 0, price: int = 0, qty: int = 0) -> bytes:
+    """ Codifica uma mensagem num registro binário. """
+    return RECORD.pack(msgType, side, orderId, price, qty)
+
+def encodeOrder(order: Order) -> bytes:
+    """ Codifica uma nova ordem (limit ou market). Ordens stop ocupam dois registros (MSG_STOP e a ordem). """
+    if order.type >= OrderType.STOP:
+        if order.stopPrice is None:
+            raise ValueError(f"Ordem stop sem stopPrice: <{order.id}>")
+        if order.type == OrderType.STOP_LIMIT and order.price is None:
+            raise ValueError(f"Ordem stop limit sem preço limite: <{order.id}>")
+        msgType = MSG_MARKET if order.type == OrderType.STOP else MSG_LIMIT
+        price = order.price if order.type == OrderType.STOP_LIMIT else 0
+        return (RECORD.pack(MSG_STOP, order.side, order.id or 0, order.stopPrice, 0)
+                + RECORD.pack(msgType, order.side, order.id or 0, price, order.qty))
+    msgType = MSG_MARKET if order.type == OrderType.MARKET else MSG_LIMIT
+    price = order.price if order.type == OrderType.LIMIT else 0
+    return RECORD.pack(msgType, order.side, order.id or 0, price, order.qty)
+
+def writeMessages(path: str, records: Iterable[bytes]) -> None:
+    """ Grava registros já codificados num arquivo de captura. """
+    with open(path, 'wb') as f:
+        f.writelines(records)
+
+def iterMessages(buffer) -> Iterator[Record]:
+    """
+        Decodifica os registros de um buffer (bytes, mmap, memoryview)
+        sem cópias intermediárias.
+    """
+    size = len(buffer)
+    if size % RECORD.size != 0:
+        raise ValueError(f"Tamanho do buffer não é múltiplo de {RECORD.size} bytes: <{size}>")
+    return RECORD.iter_unpack(buffer)
+
+def dispatch(engine: MatchingEngine, records: Iterable[Record]) -> int:
+    """ Envia os registros decodificados ao engine. Retorna o número de mensagens. """
+    order = engine.order
+    cancel = engine.cancel
+    amend = engine.amend
+    startAuction = engine.startAuction
+    uncross = engine.uncross
+    sides = SIDES
+    LIMIT = OrderType.LIMIT
+    MARKET = OrderType.MARKET
+    # Preço de disparo de um prefixo MSG_STOP, pendente até a ordem seguinte
+    stopPrice = None
+
+    count = 0
+    for msgType, side, orderId, price, qty in records:
+        if msgType == MSG_LIMIT:
+            if stopPrice is None:
+                order(Order(LIMIT, sides[side], price, qty, orderId or None))
+            else:
+                order(Order(OrderType.STOP_LIMIT, sides[side], price, qty, orderId or None, stopPrice))
+                stopPrice = None
+        elif msgType == MSG_MARKET:
+            if stopPrice is None:
+                order(Order(MARKET, sides[side], None, qty, orderId or None))
+            else:
+                order(Order(OrderType.STOP, sides[side], None, qty, orderId or None, stopPrice))
+                stopPrice = None
+        elif msgType == MSG_CANCEL:
+            cancel(orderId)
+        elif msgType == MSG_AMEND:
+            amend(orderId, price, qty)
+        elif msgType == MSG_AUCTION:
+            startAuction()
+        elif msgType == MSG_UNCROSS:
+            uncross(price if side else None)
+        elif msgType == MSG_STOP:
+            stopPrice = price
+        else:
+            raise ValueError(f"Tipo de mensagem inválido: <{msgType}>")
+        count += 1
+    return count
+
+def replay(engine: MatchingEngine, path: str) -> int:
+    """
+        Mapeia o arquivo de captura em memória e reproduz as mensagens no engine.
+        Retorna o número de mensagens processadas.
+    """
+    with open(path, 'rb') as f:
+        # mmap não aceita arquivo vazio
+        if f.seek(0, 2) == 0:
+            return 0
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(buffer)
+    count = dispatch(engine, iterMessages(view))
+    # Em caso de erro o traceback ainda referencia o buffer, e o mmap é liberado pelo GC
+    view.release()
+    buffer.close()
+    return count
@@ -0,0 +1,63 @@
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from typing import Union
+
+Number = Union[str, int, float, Decimal]
+
+
+def _decimal(value: Number) -> Decimal:
+    # float passa por str para não herdar o erro de representação binária
+    if isinstance(value, float):
+        value = repr(value)
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"Valor numérico inválido: <{value}>")
+
+
+@dataclass(frozen=True)
+class FixedPointScale:
+    """
+        Escala de ponto fixo de um instrumento.
+
+        Dentro do engine preços são ticks inteiros e quantidades são lotes inteiros;
+        a conversão de/para decimal só acontece nas bordas de entrada e saída.
+    """
+    tickSize: Decimal = Decimal('0.01')
+    lotSize: Decimal = Decimal('1')
+
+    def __post_init__(self):
+        object.__setattr__(self, 'tickSize', _decimal(self.tickSize))
+        object.__setattr__(self, 'lotSize', _decimal(self.lotSize))
+        if self.tickSize <= 0 or self.lotSize <= 0:
+            raise ValueError(f"Escala inválida: tick <{self.tickSize}>, lote <{self.lotSize}>")
+
+    @staticmethod
+    def _toUnits(value: Number, unit: Decimal) -> int:
+        decimal = _decimal(value)
+        if not decimal.is_finite():
+            raise ValueError(f"Valor numérico inválido: <{value}>")
+        try:
+            units, remainder = divmod(decimal, unit)
+        except InvalidOperation:
+            # Quociente com mais dígitos do que a precisão do contexto
+            raise ValueError(f"Valor fora da escala: <{value}>")
+        if remainder != 0:
+            raise ValueError(f"Valor <{value}> não é múltiplo de <{unit}>")
+        return int(units)
+
+    def priceToTicks(self, price: Number) -> int:
+        """ Converte preço decimal para ticks inteiros. """
+        return self._toUnits(price, self.tickSize)
+
+    def qtyToLots(self, qty: Number) -> int:
+        """ Converte quantidade decimal para lotes inteiros. """
+        return self._toUnits(qty, self.lotSize)
+
+    def ticksToPrice(self, ticks: int) -> Decimal:
+        """ Converte ticks inteiros para preço decimal. """
+        return ticks * self.tickSize
+
+    def lotsToQty(self, lots: int) -> Decimal:
+        """ Converte lotes inteiros para quantidade decimal. """
+        return lots * self.lotSize
@@ -0,0 +1,245 @@
+from typing import Dict, List, Optional, Set, Tuple
+from matching_engine import MatchingEngine
+from order import Order, OrderSide, OrderType
+from trade import Trade
+from trade_sink import CallbackSink
+from main import ORDER_TYPES, execute, parseOrder
+import asyncio
+
+
+class Session:
+    """ Conexão de um cliente. As respostas são acumuladas e escritas uma vez por lote. """
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.pending: List[str] = []
+        # Comandos enfileirados ainda sem resposta; idle fica ligado quando não há nenhum
+        self.inFlight = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+
+    def write(self, text: str):
+        self.pending.append(text)
+
+    def flush(self):
+        if self.pending and not self.writer.is_closing():
+            # write apenas bufferiza no transporte, sem bloquear o loop
+            self.writer.write("".join(self.pending).encode())
+        self.pending.clear()
+
+
+class OrderGateway:
+    """
+        Servidor asyncio (TCP ou socket Unix) na frente do MatchingEngine.
+
+        Cada linha recebida é um comando do protocolo texto do main.py. As
+        sessões apenas enfileiram os comandos; uma única tarefa de matching
+        esvazia a fila em lotes a cada volta do event loop, e escreve as
+        respostas (confirmação com o id da ordem, trades e erros) nas sessões
+        que as originaram.
+
+        Os trades vão para a sessão agressora ("Trade, price: ..., qty: ...")
+        e para a dona de cada ordem em livro executada ("Trade, id: <id>,
+        price: ..., qty: ..."). As ordens limite em livro de cada sessão são
+        acompanhadas por nível de preço; a cada trade, as do nível do trade são
+        comparadas com o livro para achar a quantidade executada de cada uma.
+        Uma ordem stop disparada é agressora em nome da sessão que a enviou, e
+        a stop limit que fica em livro passa a ser acompanhada como as demais.
+    """
+    def __init__(self, engine: MatchingEngine, batchSize: int = 1024):
+        self.engine = engine
+        self.batchSize = batchSize
+        self.queue: Optional[asyncio.Queue] = None
+        self._session: Optional[Session] = None
+        self._matcher: Optional[asyncio.Task] = None
+        # Ordens em livro das sessões, por (lado, preço) e id: [ordem, quantidade já informada]
+        self._resting: Dict[Tuple[OrderSide, float], Dict[int, list]] = {}
+        self._owners: Dict[int, Tuple[Session, Tuple[OrderSide, float]]] = {}
+        # Sessões donas das ordens stop guardadas, por id; a ordem disparada em processamento
+        self._stopOwners: Dict[int, Session] = {}
+        self._released: Optional[Tuple[Session, int]] = None
+        # Sessões avisadas de execuções fora das suas mensagens, a descarregar no fim do lote
+        self._notified: Set[Session] = set()
+        self._lastPrice = None
+        engine.addSink(CallbackSink(self._onTrade))
+        engine.onStopRelease = self._onStopRelease
+
+    def _format(self, price, qty) -> Tuple:
+        scale = self.engine.scale
+        if scale is not None:
+            return scale.ticksToPrice(price), scale.lotsToQty(qty)
+        return price, qty
+
+    def _onTrade(self, trade: Trade):
+        self._lastPrice = trade.price
+        if self._session is not None:
+            price, qty = self._format(trade.price, trade.qty)
+            self._session.write(f"Trade, price: {price}, qty: {qty}\n")
+        # Ordens em livro executadas estão no nível do preço do trade
+        for side in (OrderSide.BUY, OrderSide.SELL):
+            level = self._resting.get((side, trade.price))
+            if level:
+                self._notifyLevel(side, level, trade.price)
+
+    def _notifyLevel(self, side: OrderSide, level: Dict[int, list], tradePrice: float):
+        """ Avisa as donas das ordens do nível executadas desde o último aviso. """
+        book = self.engine.buyOrderBook if side == OrderSide.BUY else self.engine.sellOrderBook
+        for orderId, entry in list(level.items()):
+            order, qty = entry
+            session = self._owners[orderId][0]
+            if book.getOrder(orderId) is order:
+                filled = qty - order.qty
+                if filled <= 0:
+                    continue
+                entry[1] = order.qty
+            else:
+                # Ordem completamente executada: sai do livro com a quantidade intacta
+                filled = qty
+                self._untrack(orderId)
+            price, filled = self._format(tradePrice, filled)
+            session.write(f"Trade, id: {orderId}, price: {price}, qty: {filled}\n")
+            self._notified.add(session)
+
+    def _onStopRelease(self, order: Order):
+        """ Ordem stop disparada: os trades dela vão para a sessão dona, e não para a da mensagem. """
+        self._trackReleased()
+        owner = self._stopOwners.pop(order.id, None)
+        self._session = owner
+        if owner is not None:
+            self._notified.add(owner)
+            if order.type == OrderType.LIMIT:
+                self._released = (owner, order.id)
+
+    def _trackReleased(self):
+        """ Acompanha a última ordem stop limit disparada, se ela ficou em livro. """
+        if self._released is not None:
+            self._track(*self._released)
+            self._released = None
+
+    def _track(self, session: Session, orderId: int):
+        """ Passa a acompanhar a ordem, se ela estiver em livro. """
+        order = self.engine.getOrder(orderId)
+        if order is None:
+            return
+        key = (order.side, order.price)
+        self._resting.setdefault(key, {})[orderId] = [order, order.qty]
+        self._owners[orderId] = (session, key)
+
+    def _untrack(self, orderId: int) -> Optional[Session]:
+        """ Deixa de acompanhar a ordem. Retorna a sessão dona, se havia. """
+        owner = self._owners.pop(orderId, None)
+        if owner is None:
+            return None
+        session, key = owner
+        level = self._resting[key]
+        del level[orderId]
+        if not level:
+            del self._resting[key]
+        return session
+
+    def _process(self, session: Session, tokens: List[str]):
+        self._session = session
+        try:
+            if tokens[0] in ORDER_TYPES:
+                # Atribui o id antes de executar, para confirmar antes dos trades
+                order = parseOrder(tokens, self.engine.scale)
+                order.id = next(self.engine.orderIds)
+                session.write(f"Order, id: {order.id}\n")
+                if order.type >= OrderType.STOP:
+                    self._stopOwners[order.id] = session
+                try:
+                    self.engine.order(order)
+                except Exception:
+                    self._stopOwners.pop(order.id, None)
+                    raise
+                if order.type == OrderType.LIMIT:
+                    self._track(session, order.id)
+            elif tokens[0] in ('cancel', 'amend'):
+                orderId = int(tokens[1])
+                # A ordem alterada pode mudar de nível (ou cruzar o livro como agressora)
+                owner = self._untrack(orderId)
+                try:
+                    execute(self.engine, tokens)
+                finally:
+                    if owner is not None:
+                        self._track(owner, orderId)
+                if tokens[0] == 'cancel':
+                    self._stopOwners.pop(orderId, None)
+            else:
+                self._lastPrice = None
+                execute(self.engine, tokens)
+                if tokens[0] == 'uncross' and self._lastPrice is not None:
+                    # O leilão executa todos os níveis cruzados ao mesmo preço
+                    for (side, _), level in list(self._resting.items()):
+                        self._notifyLevel(side, level, self._lastPrice)
+        except Exception as e:
+            # Qualquer erro numa mensagem é respondido à sessão, sem derrubar a tarefa de matching
+            session.write(f"Erro: {str(e) or type(e).__name__}\n")
+        finally:
+            self._trackReleased()
+            self._session = None
+
+    async def _runMatcher(self):
+        queue = self.queue
+        process = self._process
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batchSize and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            touched = set()
+            for session, tokens in batch:
+                process(session, tokens)
+                touched.add(session)
+            # O journal do lote é gravado antes das respostas
+            self.engine.flush()
+            touched.update(self._notified)
+            self._notified.clear()
+            for session in touched:
+                session.flush()
+            for session, _ in batch:
+                session.inFlight -= 1
+                if session.inFlight == 0:
+                    session.idle.set()
+                queue.task_done()
+
+    async def handleClient(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = Session(writer)
+        put = self.queue.put_nowait
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                tokens = line.decode().split()
+                if tokens:
+                    session.inFlight += 1
+                    session.idle.clear()
+                    put((session, tokens))
+            # Responde tudo o que a sessão enviou antes de fechar, sem esperar as demais sessões
+            await session.idle.wait()
+            await writer.drain()
+        finally:
+            writer.close()
+
+    def _start(self):
+        if self.queue is None:
+            self.queue = asyncio.Queue()
+            self._matcher = asyncio.get_running_loop().create_task(self._runMatcher())
+
+    async def startTcp(self, host: str = '127.0.0.1', port: int = 0) -> asyncio.AbstractServer:
+        self._start()
+        return await asyncio.start_server(self.handleClient, host, port)
+
+    async def startUnix(self, path: str) -> asyncio.AbstractServer:
+        self._start()
+        return await asyncio.start_unix_server(self.handleClient, path)
+
+    async def stop(self):
+        if self._matcher is not None:
+            self._matcher.cancel()
+            try:
+                await self._matcher
+            except asyncio.CancelledError:
+                pass
+            self._matcher = None
+            self.queue = None
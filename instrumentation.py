@@ -0,0 +1,165 @@
+from typing import Dict, List
+from order import Order, OrderSide
+from trade import Trade
+from matching_engine import MatchingEngine
+import time
+
+
+def bucketOf(value: int) -> int:
+    """ Bucket do valor: 4 buckets por potência de 2 (os 3 bits mais altos do valor). """
+    if value < 8:
+        return value
+    shift = value.bit_length() - 3
+    return shift * 4 + (value >> shift)
+
+def bucketUpperBound(bucket: int) -> int:
+    """ Maior valor que cai no bucket. """
+    if bucket < 8:
+        return bucket
+    shift = bucket // 4 - 1
+    return ((bucket % 4 + 5) << shift) - 1
+
+
+class LogHistogram:
+    """
+        Histograma de memória fixa com buckets logarítmicos: 4 buckets por
+        potência de 2, ou seja, erro relativo de no máximo 25%. Os percentis
+        são aproximados pelo limite superior do bucket.
+    """
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    def __init__(self, numBuckets: int = 256):
+        self.buckets = [0] * numBuckets
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value: int):
+        i = bucketOf(value)
+        if i >= len(self.buckets):
+            i = len(self.buckets) - 1
+        self.buckets[i] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p: float) -> int:
+        """ Limite superior do bucket que contém o percentil p (0 a 100). """
+        if self.count == 0:
+            return 0
+        rank = max(1, -(-self.count * p // 100))
+        seen = 0
+        for i, bucketCount in enumerate(self.buckets):
+            seen += bucketCount
+            if seen >= rank:
+                return min(bucketUpperBound(i), self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'mean': self.mean(),
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'p99.9': self.percentile(99.9),
+            'max': self.max,
+        }
+
+
+class EngineInstrumentation:
+    """
+        Mede o MatchingEngine sem custo quando desligada: install() troca
+        order, match, _add e exec da instância por versões cronometradas, e
+        uninstall() remove as trocas, voltando aos métodos da classe.
+
+        Tempos (ns) por etapa e, a cada match, níveis tocados (um trade por
+        nível) e ordens completamente preenchidas no livro oposto vão para
+        histogramas de memória fixa.
+    """
+    STAGES = ('order', 'match', '_add', 'exec')
+
+    def __init__(self, engine: MatchingEngine):
+        self.engine = engine
+        self.timings: Dict[str, LogHistogram] = {stage: LogHistogram() for stage in self.STAGES}
+        self.levelsTouched = LogHistogram()
+        self.ordersFilled = LogHistogram()
+        self._trades = 0
+        self.installed = False
+
+    def install(self):
+        if self.installed:
+            return
+        engine = self.engine
+        now = time.perf_counter_ns
+        order, match, add, exec_ = engine.order, engine.match, engine._add, engine.exec
+        orderTimes = self.timings['order'].record
+        matchTimes = self.timings['match'].record
+        addTimes = self.timings['_add'].record
+        execTimes = self.timings['exec'].record
+        levelsTouched = self.levelsTouched.record
+        ordersFilled = self.ordersFilled.record
+
+        def timedOrder(o: Order):
+            start = now()
+            order(o)
+            orderTimes(now() - start)
+
+        def timedMatch(o: Order):
+            book = engine.sellOrderBook if o.side == OrderSide.BUY else engine.buyOrderBook
+            sizeBefore = book.getSize()
+            self._trades = 0
+            start = now()
+            match(o)
+            matchTimes(now() - start)
+            levelsTouched(self._trades)
+            ordersFilled(sizeBefore - book.getSize())
+
+        def timedAdd(o: Order):
+            start = now()
+            add(o)
+            addTimes(now() - start)
+
+        def timedExec(trade: Trade):
+            self._trades += 1
+            start = now()
+            exec_(trade)
+            execTimes(now() - start)
+
+        # Atributos da instância têm precedência sobre os métodos da classe
+        engine.order = timedOrder
+        engine.match = timedMatch
+        engine._add = timedAdd
+        engine.exec = timedExec
+        self.installed = True
+
+    def uninstall(self):
+        if not self.installed:
+            return
+        for stage in self.STAGES:
+            delattr(self.engine, stage)
+        self.installed = False
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {stage: histogram.summary() for stage, histogram in self.timings.items()}
+        stats['levelsTouched'] = self.levelsTouched.summary()
+        stats['ordersFilled'] = self.ordersFilled.summary()
+        return stats
+
+    def report(self) -> str:
+        lines: List[str] = [f"{'etapa':14} {'n':>10} {'média':>10} {'p50':>10} {'p99':>10} {'p99.9':>10} {'max':>12}"]
+        for name, summary in self.stats().items():
+            unit = '' if name in ('levelsTouched', 'ordersFilled') else ' ns'
+            lines.append(f"{name:14} {summary['count']:10d} {summary['mean']:10.1f} {summary['p50']:10d} "
+                         f"{summary['p99']:10d} {summary['p99.9']:10d} {summary['max']:12d}{unit}")
+        return "\n".join(lines)
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, *exc):
+        self.uninstall()
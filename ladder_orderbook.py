@@ -0,0 +1,472 @@
+from typing import Any, Iterable, Optional, List, Tuple
+from order import Order, OrderSide
+from orderbook import IOrderBook, OrderPriorityQueue
+import math
+
+
+class TickLadderOrderBook(IOrderBook):
+    """
+        Livro de ordens com os níveis de preço num vetor contíguo, indexado
+        pelo deslocamento em ticks a partir do preço base da faixa.
+
+        A ocupação dos níveis é mantida num bitmap (um int do Python), de forma
+        que o próximo nível não vazio é achado com operações de bits, sem
+        árvore, rebalanceamento ou ponteiros. Indicado para instrumentos
+        líquidos, com faixa de preço limitada. Quando um preço cai fora da
+        faixa, o vetor é recentralizado (e ampliado, se necessário), até
+        maxLevels níveis; preços que exigiriam uma faixa maior são rejeitados.
+        Quando os extremos são esvaziados, o vetor volta a ser reduzido.
+    """
+    def __init__(self, tickSize: float = 1, referencePrice: float = 0, numLevels: int = 1024,
+                 maxLevels: int = 1 << 16):
+        self.tickSize = tickSize
+        if tickSize == 1:
+            # Preços já em ticks inteiros (modo de ponto fixo): sem divisão
+            self._tick = self._integerTick
+        self.numLevels = numLevels
+        # Tamanho inicial (mínimo ao reduzir) e máximo da faixa
+        self.minLevels = numLevels
+        self.maxLevels = max(maxLevels, numLevels)
+        # Tick do primeiro slot do vetor
+        self.base = self._tick(referencePrice) - numLevels // 2
+        self.levels: List[Optional[OrderPriorityQueue]] = [None] * numLevels
+        # Bit i ligado se levels[i] tem ordens
+        self.occupied = 0
+        # Índice de ordens por id, para cancelamento e alteração em O(1)
+        self.index = {}
+        # Totais do livro, mantidos a cada alteração
+        self.size = 0
+        self.totalQty = 0
+        # Feed de market data avisado a cada alteração de nível (opcional)
+        self.feed = None
+        self.side = None
+
+    def _tick(self, price: float) -> int:
+        """ Converte o preço para ticks inteiros. """
+        if not math.isfinite(price):
+            raise ValueError(f"Preço inválido: <{price}>")
+        tick = round(price / self.tickSize)
+        if not math.isclose(tick * self.tickSize, price, rel_tol=1e-9, abs_tol=1e-12):
+            raise ValueError(f"Preço fora do tick <{self.tickSize}>: <{price}>")
+        return tick
+
+    def _integerTick(self, price: float) -> int:
+        if not math.isfinite(price):
+            raise ValueError(f"Preço inválido: <{price}>")
+        tick = int(price)
+        if tick != price:
+            raise ValueError(f"Preço fora do tick <{self.tickSize}>: <{price}>")
+        return tick
+
+    def _slot(self, price: float) -> Optional[int]:
+        """ Retorna o slot do preço, ou None se estiver fora da faixa. """
+        slot = self._tick(price) - self.base
+        if 0 <= slot < self.numLevels:
+            return slot
+        return None
+
+    def _span(self, tick: int) -> Tuple[int, int]:
+        """ Menor e maior tick da faixa que contém tick e todos os níveis ocupados. """
+        low = high = tick
+        if self.occupied:
+            low = min(low, self.base + self._lowestSlot())
+            high = max(high, self.base + self._highestSlot())
+        if high - low + 1 > self.maxLevels:
+            raise ValueError(f"Preço fora da faixa de {self.maxLevels} níveis do livro: <{tick * self.tickSize}>")
+        return low, high
+
+    def _recenter(self, tick: int):
+        """ Reconstrói o vetor para que a faixa contenha tick e todos os níveis ocupados. """
+        low, high = self._span(tick)
+        numLevels = self.numLevels
+        while high - low + 1 > numLevels:
+            numLevels *= 2
+        self._rebuild(low, high, numLevels)
+
+    def _shrink(self):
+        """
+            Reduz o vetor à metade (quantas vezes couber) enquanto os níveis
+            ocupados couberem num quarto dele. Chamado ao fim das operações que
+            esvaziam níveis, pois os slots mudam.
+        """
+        if self.occupied == 0:
+            center = self.base + self.numLevels // 2
+            self._rebuild(center, center, self.minLevels)
+            return
+        low = self.base + self._lowestSlot()
+        high = self.base + self._highestSlot()
+        numLevels = self.numLevels
+        while numLevels > self.minLevels and (high - low + 1) * 4 <= numLevels:
+            numLevels //= 2
+        if numLevels < self.numLevels:
+            self._rebuild(low, high, numLevels)
+
+    def _rebuild(self, low: int, high: int, numLevels: int):
+        """ Move os níveis ocupados para um vetor de numLevels slots, centrado entre low e high. """
+        base = (low + high) // 2 - numLevels // 2
+        base = min(max(base, high - numLevels + 1), low)
+
+        levels = [None] * numLevels
+        occupied = 0
+        shift = self.base - base
+        for slot, order_queue in enumerate(self.levels):
+            if order_queue is not None:
+                levels[slot + shift] = order_queue
+                occupied |= 1 << (slot + shift)
+
+        self.base = base
+        self.numLevels = numLevels
+        self.levels = levels
+        self.occupied = occupied
+
+    def _lowestSlot(self) -> int:
+        occupied = self.occupied
+        return (occupied & -occupied).bit_length() - 1
+
+    def _highestSlot(self) -> int:
+        return self.occupied.bit_length() - 1
+
+    def _nextSlot(self, slot: int) -> Optional[int]:
+        """ Próximo slot ocupado acima de slot. """
+        rest = self.occupied >> (slot + 1)
+        if rest == 0:
+            return None
+        return slot + (rest & -rest).bit_length()
+
+    def _prevSlot(self, slot: int) -> Optional[int]:
+        """ Próximo slot ocupado abaixo de slot. """
+        rest = self.occupied & ((1 << slot) - 1)
+        if rest == 0:
+            return None
+        return rest.bit_length() - 1
+
+    def _clearSlot(self, slot: int):
+        self.levels[slot] = None
+        self.occupied &= ~(1 << slot)
+
+    def checkPrice(self, price: float) -> None:
+        """ Rejeita preço fora do tick ou da faixa máxima antes do match, sem efeitos no livro. """
+        tick = self._tick(price)
+        if not 0 <= tick - self.base < self.numLevels:
+            self._span(tick)
+
+    def attachFeed(self, feed: Any, side: OrderSide):
+        """ Liga o livro a um MarketDataFeed, identificando o lado. """
+        self.feed = feed
+        self.side = side
+
+    def add(self, order: Order):
+        """ Adiciona ordem ao livro. """
+        slot = self._slot(order.price)
+        if slot is None:
+            self._recenter(self._tick(order.price))
+            slot = self._slot(order.price)
+        # Totais só mudam depois que o slot foi resolvido (_slot pode rejeitar o preço)
+        self.size += 1
+        self.totalQty += order.qty
+
+        order_queue = self.levels[slot]
+        isNew = order_queue is None
+        if not isNew:
+            # Se já existe uma ordem com o mesmo preço, adiciona ordem ao final da fila
+            order_queue.append(order)
+        else:
+            # Se não existe ordem com o mesmo preço, cria uma fila de ordens
+            order_queue = self.levels[slot] = OrderPriorityQueue(order)
+            self.occupied |= 1 << slot
+
+        if order.id is not None:
+            self.index[order.id] = order
+        if self.feed is not None:
+            self.feed.levelChanged(self.side, order_queue.price, order_queue.qty, order_queue.count, isNew)
+
+    def load_levels(self, levels: Iterable[Tuple[float, OrderPriorityQueue]]):
+        """ Carrega o livro vazio com os níveis (preço, fila) em ordem crescente de preço. """
+        if self.size:
+            raise ValueError("O livro precisa estar vazio para carregar níveis")
+        index = self.index
+        for price, order_queue in levels:
+            slot = self._slot(price)
+            if slot is None:
+                self._recenter(self._tick(price))
+                slot = self._slot(price)
+            self.levels[slot] = order_queue
+            self.occupied |= 1 << slot
+            for order in order_queue:
+                if order.id is not None:
+                    index[order.id] = order
+            self.size += order_queue.count
+            self.totalQty += order_queue.qty
+            if self.feed is not None:
+                self.feed.levelChanged(self.side, order_queue.price, order_queue.qty, order_queue.count, True)
+
+    def remove(self, price: float):
+        """ Remove o nível de preço do livro, com todas as suas ordens. """
+        slot = self._slot(price)
+        if slot is None or self.levels[slot] is None:
+            return None
+        order_queue = self.levels[slot]
+        for order in order_queue:
+            self.index.pop(order.id, None)
+        self.size -= len(order_queue)
+        self.totalQty -= order_queue.qty
+        self._clearSlot(slot)
+        if self.numLevels > self.minLevels:
+            self._shrink()
+        if self.feed is not None:
+            self.feed.levelChanged(self.side, order_queue.price, 0, 0)
+
+    def getQueue(self, price: float) -> Optional[OrderPriorityQueue]:
+        """ Retorna fila de ordens. """
+        slot = self._slot(price)
+        if slot is None:
+            return None
+        return self.levels[slot]
+
+    def getOrder(self, orderId: int) -> Optional[Order]:
+        """ Retorna a ordem com o id informado, se estiver no livro. """
+        return self.index.get(orderId)
+
+    def cancel(self, orderId: int) -> Optional[Order]:
+        """ Remove a ordem do livro em O(1). """
+        order = self.index.pop(orderId, None)
+        if order is None:
+            return None
+        self.size -= 1
+        self.totalQty -= order.qty
+        order_queue = order.queue
+        order_queue.remove(order)
+        if len(order_queue) == 0:
+            self._clearSlot(self._slot(order_queue.price))
+            if self.numLevels > self.minLevels:
+                self._shrink()
+        if self.feed is not None:
+            self.feed.levelChanged(self.side, order_queue.price, order_queue.qty, order_queue.count)
+        return order
+
+    def reduce(self, orderId: int, qty: int) -> Optional[Order]:
+        """
+            Reduz a quantidade da ordem para qty, mantendo sua prioridade na fila.
+            Quantidade zero cancela a ordem.
+        """
+        order = self.index.get(orderId)
+        if order is None:
+            return None
+        if qty > order.qty:
+            raise ValueError(f"Redução não pode aumentar a quantidade: <{qty}>")
+        if qty <= 0:
+            return self.cancel(orderId)
+        order_queue = order.queue
+        self.totalQty -= order.qty - qty
+        order_queue.qty -= order.qty - qty
+        order.qty = qty
+        if self.feed is not None:
+            self.feed.levelChanged(self.side, order_queue.price, order_queue.qty, order_queue.count)
+        return order
+
+    def getMinPrice(self) -> Optional[float]:
+        if self.occupied == 0:
+            return None
+        return self.levels[self._lowestSlot()].price
+
+    def getMaxPrice(self) -> Optional[float]:
+        if self.occupied == 0:
+            return None
+        return self.levels[self._highestSlot()].price
+
+    def popQty(self, price: float, qty: int) -> int:
+        """
+            Remove ordens de preço definido da fila até que a quantidade seja abatida,
+            ou não haja mais ordens neste preço.
+            Retorna a quantidade abatida.
+        """
+        slot = self._slot(price)
+        if slot is None or self.levels[slot] is None:
+            return 0
+
+        order_queue = self.levels[slot]
+        count = len(order_queue)
+        qty_removed = order_queue.fill(qty, self.index)
+        self.size -= count - len(order_queue)
+        self.totalQty -= qty_removed
+        if len(order_queue) == 0:
+            self._clearSlot(slot)
+            if self.numLevels > self.minLevels:
+                self._shrink()
+        if self.feed is not None:
+            self.feed.levelChanged(self.side, order_queue.price, order_queue.qty, order_queue.count)
+        return qty_removed
+
+    def sweepFromMin(self, qty: int, maxPrice: float = math.inf) -> List[Tuple[float, int]]:
+        """
+            Abate a quantidade percorrendo os níveis de preço a partir do mínimo,
+            até o preço máximo (inclusivo). Níveis esvaziados são removidos no caminho.
+            Retorna a lista de preenchimentos (preço, quantidade) por nível.
+        """
+        fills = []
+        if self.occupied == 0:
+            return fills
+        slot = self._lowestSlot()
+        while slot is not None and qty > 0:
+            order_queue = self.levels[slot]
+            if order_queue.price > maxPrice:
+                break
+            count = len(order_queue)
+            filled = order_queue.fill(qty, self.index)
+            self.size -= count - len(order_queue)
+            self.totalQty -= filled
+            if self.feed is not None:
+                self.feed.levelChanged(self.side, order_queue.price, order_queue.qty, order_queue.count)
+            fills.append((order_queue.price, filled))
+            qty -= filled
+            if len(order_queue) > 0:
+                break
+            self._clearSlot(slot)
+            slot = self._nextSlot(slot)
+        if self.numLevels > self.minLevels:
+            self._shrink()
+        return fills
+
+    def sweepFromMax(self, qty: int, minPrice: float = -math.inf) -> List[Tuple[float, int]]:
+        """
+            Abate a quantidade percorrendo os níveis de preço a partir do máximo,
+            até o preço mínimo (inclusivo). Níveis esvaziados são removidos no caminho.
+            Retorna a lista de preenchimentos (preço, quantidade) por nível.
+        """
+        fills = []
+        if self.occupied == 0:
+            return fills
+        slot = self._highestSlot()
+        while slot is not None and qty > 0:
+            order_queue = self.levels[slot]
+            if order_queue.price < minPrice:
+                break
+            count = len(order_queue)
+            filled = order_queue.fill(qty, self.index)
+            self.size -= count - len(order_queue)
+            self.totalQty -= filled
+            if self.feed is not None:
+                self.feed.levelChanged(self.side, order_queue.price, order_queue.qty, order_queue.count)
+            fills.append((order_queue.price, filled))
+            qty -= filled
+            if len(order_queue) > 0:
+                break
+            self._clearSlot(slot)
+            slot = self._prevSlot(slot)
+        if self.numLevels > self.minLevels:
+            self._shrink()
+        return fills
+
+    def _depth(self, slot: Optional[int], step, levels: int, arrays):
+        """ Agrega até levels níveis a partir de slot, andando com step. """
+        if arrays is None:
+            depth = []
+            while slot is not None and len(depth) < levels:
+                order_queue = self.levels[slot]
+                depth.append((order_queue.price, order_queue.qty, order_queue.count))
+                slot = step(slot)
+            return depth
+
+        prices, qtys, counts = arrays
+        levels = min(levels, len(prices))
+        n = 0
+        while slot is not None and n < levels:
+            order_queue = self.levels[slot]
+            prices[n] = order_queue.price
+            qtys[n] = order_queue.qty
+            counts[n] = order_queue.count
+            n += 1
+            slot = step(slot)
+        return n
+
+    def depthFromMin(self, levels: int, arrays: Optional[Tuple[Any, Any, Any]] = None):
+        """
+            Retorna os primeiros níveis agregados a partir do menor preço, como lista
+            de (preço, quantidade, número de ordens). Se arrays (ver allocDepthArrays)
+            for informado, preenche os vetores e retorna o número de níveis escritos.
+        """
+        slot = self._lowestSlot() if self.occupied else None
+        return self._depth(slot, self._nextSlot, levels, arrays)
+
+    def depthFromMax(self, levels: int, arrays: Optional[Tuple[Any, Any, Any]] = None):
+        """
+            Retorna os primeiros níveis agregados a partir do maior preço, como lista
+            de (preço, quantidade, número de ordens). Se arrays (ver allocDepthArrays)
+            for informado, preenche os vetores e retorna o número de níveis escritos.
+        """
+        slot = self._highestSlot() if self.occupied else None
+        return self._depth(slot, self._prevSlot, levels, arrays)
+
+    def iterFromMax(self, minPrice: float = 0) -> Optional[Order]:
+        """ Itera as ordens do livro a partir do máximo até o mínimo preço. """
+        slot = self._highestSlot() if self.occupied else None
+        while slot is not None:
+            order_queue = self.levels[slot]
+            if order_queue.price <= minPrice:
+                break
+            for order in order_queue:
+                yield order
+            slot = self._prevSlot(slot)
+
+    def iterFromMin(self, maxPrice: float = float('inf')) -> Optional[Order]:
+        """ Itera as ordens do livro a partir do mínimo até o máximo preço. """
+        slot = self._lowestSlot() if self.occupied else None
+        while slot is not None:
+            order_queue = self.levels[slot]
+            if order_queue.price >= maxPrice:
+                break
+            for order in order_queue:
+                yield order
+            slot = self._nextSlot(slot)
+
+    def popFirst(self, price: Optional[float]):
+        if price == None:
+            return None
+        slot = self._slot(price)
+        if slot is None or self.levels[slot] is None:
+            return None
+        order_queue = self.levels[slot]
+        order = order_queue.popleft()
+        self.index.pop(order.id, None)
+        self.size -= 1
+        self.totalQty -= order.qty
+        if len(order_queue) == 0:
+            self._clearSlot(slot)
+            if self.numLevels > self.minLevels:
+                self._shrink()
+        if self.feed is not None:
+            self.feed.levelChanged(self.side, order_queue.price, order_queue.qty, order_queue.count)
+        return order
+
+    def peekFirst(self, price: Optional[float]):
+        if price == None:
+            return None
+        order_queue = self.getQueue(price)
+        if order_queue is None:
+            return None
+        return order_queue.peekleft()
+
+    def getSize(self) -> int:
+        """ Retorna o número de ordens no livro. """
+        return self.size
+
+    def getTotalQty(self) -> int:
+        """ Retorna a quantidade total do livro. """
+        return self.totalQty
+
+    def getLevelQty(self, price: float) -> int:
+        """ Retorna a quantidade total do nível de preço. """
+        order_queue = self.getQueue(price)
+        if order_queue is None:
+            return 0
+        return order_queue.qty
+
+    def getLevelSize(self, price: float) -> int:
+        """ Retorna o número de ordens do nível de preço. """
+        order_queue = self.getQueue(price)
+        if order_queue is None:
+            return 0
+        return len(order_queue)
+
+    def __str__(self):
+        return "\n".join(str(order_queue.price) for order_queue in self.levels if order_queue is not None)
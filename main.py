@@ -1,55 +1,361 @@
-from typing import Optional, Any, List
+from typing import Optional, Any, List, TextIO
 from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
 from enum import Enum
+import argparse
+import asyncio
+import cProfile
+import functools
+import sys
 from order import Order, OrderSide, OrderType
 from orderbook import IOrderBook, OrderBook
-from matching_engine import MatchingEngine
+from ladder_orderbook import TickLadderOrderBook
+from matching_engine import MatchingEngine, TradingPhase
 from trade import Trade
+from fixed_point import FixedPointScale
+from trade_sink import StreamSink
+import binary_protocol
+from binary_protocol import MSG_LIMIT, MSG_MARKET, MSG_CANCEL, MSG_AMEND, MSG_AUCTION, MSG_UNCROSS, Record
+from router import SymbolRouter
+from persistence import Journal, restore, writeSnapshot
+from instrumentation import EngineInstrumentation
+
+
+# Tamanho dos blocos de leitura e do buffer de escrita no modo stream
+STREAM_CHUNK_SIZE = 1 << 20
+OUTPUT_BUFFER_SIZE = 1 << 16
+
+ORDER_TYPES = {'limit': OrderType.LIMIT, 'market': OrderType.MARKET,
+               'stop': OrderType.STOP, 'stop_limit': OrderType.STOP_LIMIT}
+ORDER_SIDES = {'buy': OrderSide.BUY, 'sell': OrderSide.SELL}
 
 
 def get_order_type(type: str) -> OrderType:
-    if type == 'limit':
-        return OrderType.LIMIT
-    elif type == 'market':
-        return OrderType.MARKET
-    else:
+    try:
+        return ORDER_TYPES[type]
+    except KeyError:
         raise ValueError(f"Valor de tipo inválido: <{type}>")
 
 def get_order_side(side: str) -> OrderSide:
-    if side == 'buy':
-        return OrderSide.BUY
-    elif side == 'sell':
-        return OrderSide.SELL
-    else:
+    try:
+        return ORDER_SIDES[side]
+    except KeyError:
         raise ValueError(f"Valor de side inválido: <{side}>")
 
-def getOrder() -> Order:
-    text = input("")
-    tokens = text.strip().split()
+def parsePrice(text: str, scale: Optional[FixedPointScale] = None) -> float:
+    if scale is None:
+        return float(text)
+    return scale.priceToTicks(text)
+
+def parseQty(text: str, scale: Optional[FixedPointScale] = None) -> float:
+    if scale is None:
+        return float(text)
+    return scale.qtyToLots(text)
 
+def parseOrder(tokens: List[str], scale: Optional[FixedPointScale] = None) -> Order:
     if tokens[0] == 'limit':
         return Order(
             type=get_order_type(tokens[0]),
             side=get_order_side(tokens[1]),
-            price=float(tokens[2]),
-            qty=float(tokens[3])
+            price=parsePrice(tokens[2], scale),
+            qty=parseQty(tokens[3], scale)
         )
     elif tokens[0] == 'market':
         return Order(
             type=get_order_type(tokens[0]),
             side=get_order_side(tokens[1]),
-            qty=float(tokens[2])
+            qty=parseQty(tokens[2], scale)
+        )
+    elif tokens[0] == 'stop':
+        return Order(
+            type=get_order_type(tokens[0]),
+            side=get_order_side(tokens[1]),
+            stopPrice=parsePrice(tokens[2], scale),
+            qty=parseQty(tokens[3], scale)
+        )
+    elif tokens[0] == 'stop_limit':
+        return Order(
+            type=get_order_type(tokens[0]),
+            side=get_order_side(tokens[1]),
+            stopPrice=parsePrice(tokens[2], scale),
+            price=parsePrice(tokens[3], scale),
+            qty=parseQty(tokens[4], scale)
         )
+    else:
+        raise ValueError(f"Valor de tipo inválido: <{tokens[0]}>")
 
-def main():
-    sellOrderBook = OrderBook()
-    buyOrderBook = OrderBook()
-    engine = MatchingEngine(buyOrderBook=buyOrderBook, sellOrderBook=sellOrderBook)
+def getOrder(scale: Optional[FixedPointScale] = None) -> Order:
+    text = input("")
+    tokens = text.strip().split()
+    return parseOrder(tokens, scale)
 
+def execute(engine: MatchingEngine, tokens: List[str]) -> None:
+    """ Executa um comando já separado em tokens. """
+    scale = engine.scale
+    if tokens[0] == 'cancel':
+        engine.cancel(int(tokens[1]))
+    elif tokens[0] == 'amend':
+        engine.amend(int(tokens[1]), parsePrice(tokens[2], scale), parseQty(tokens[3], scale))
+    elif tokens[0] == 'auction':
+        engine.startAuction()
+    elif tokens[0] == 'uncross':
+        engine.uncross(parsePrice(tokens[1], scale) if len(tokens) > 1 else None)
+    else:
+        engine.order(parseOrder(tokens, scale))
+
+def runInteractive(engine: MatchingEngine) -> None:
+    """ Lê um comando por vez do terminal, até EOF. """
     while True:
-        order = getOrder()
-        engine.order(order)
+        try:
+            text = input("")
+        except EOFError:
+            return
+        tokens = text.strip().split()
+        if tokens:
+            execute(engine, tokens)
+
+def runStream(engine: MatchingEngine, stream: TextIO) -> None:
+    """
+        Processa comandos lidos em blocos grandes de linhas, até EOF.
+        Linhas inválidas são reportadas em stderr e ignoradas. Ao fim de cada
+        bloco o journal é gravado e a saída descarregada.
+    """
+    execute_ = execute
+    readlines = stream.readlines
+    lineno = 0
+    while True:
+        lines = readlines(STREAM_CHUNK_SIZE)
+        if not lines:
+            return
+        for line in lines:
+            lineno += 1
+            tokens = line.split()
+            if not tokens:
+                continue
+            try:
+                execute_(engine, tokens)
+            except (ValueError, IndexError) as e:
+                print(f"Linha {lineno} ignorada: {e}", file=sys.stderr)
+        engine.flush()
+
+def parseRecord(tokens: List[str], scale: Optional[FixedPointScale] = None) -> Record:
+    """ Converte um comando em registro (tipo, lado, id, preço, quantidade) para o roteador. """
+    if tokens[0] == 'limit':
+        return (MSG_LIMIT, get_order_side(tokens[1]), 0, parsePrice(tokens[2], scale), parseQty(tokens[3], scale))
+    elif tokens[0] == 'market':
+        return (MSG_MARKET, get_order_side(tokens[1]), 0, 0, parseQty(tokens[2], scale))
+    elif tokens[0] == 'cancel':
+        return (MSG_CANCEL, 0, int(tokens[1]), 0, 0)
+    elif tokens[0] == 'amend':
+        return (MSG_AMEND, 0, int(tokens[1]), parsePrice(tokens[2], scale), parseQty(tokens[3], scale))
+    elif tokens[0] == 'auction':
+        return (MSG_AUCTION, 0, 0, 0, 0)
+    elif tokens[0] == 'uncross':
+        if len(tokens) > 1:
+            return (MSG_UNCROSS, 1, 0, parsePrice(tokens[1], scale), 0)
+        return (MSG_UNCROSS, 0, 0, 0, 0)
+    elif tokens[0] in ('stop', 'stop_limit'):
+        raise ValueError("Ordens stop não são suportadas no modo roteado")
+    else:
+        raise ValueError(f"Valor de tipo inválido: <{tokens[0]}>")
+
+def runRouted(router: SymbolRouter, stream: TextIO, output: TextIO, scale: Optional[FixedPointScale] = None) -> None:
+    """
+        Processa comandos prefixados pelo símbolo (<símbolo> <comando>), distribuídos
+        entre os workers do roteador. Os trades de cada bloco são escritos por símbolo.
+    """
+    readlines = stream.readlines
+    submit = router.submit
+    lineno = 0
+    while True:
+        lines = readlines(STREAM_CHUNK_SIZE)
+        if not lines:
+            return
+        for line in lines:
+            lineno += 1
+            tokens = line.split()
+            if not tokens:
+                continue
+            try:
+                submit(tokens[0], parseRecord(tokens[1:], scale))
+            except (ValueError, IndexError) as e:
+                print(f"Linha {lineno} ignorada: {e}", file=sys.stderr)
+
+        for symbol, trades in router.flush().items():
+            for trade in trades:
+                price, qty = trade.price, trade.qty
+                if scale is not None:
+                    price, qty = scale.ticksToPrice(price), scale.lotsToQty(qty)
+                output.write(f"{symbol} Trade, price: {price}, qty: {qty}\n")
+        for symbol, record, error in router.rejects:
+            print(f"Mensagem de {symbol} rejeitada: {error}", file=sys.stderr)
+
+def makeScale(args: argparse.Namespace) -> Optional[FixedPointScale]:
+    """ Cria a escala de ponto fixo, se o modo estiver ativo. """
+    if not args.fixed_point:
+        return None
+    return FixedPointScale(tickSize=args.tick_size, lotSize=args.lot_size)
+
+def makeOrderBook(args: argparse.Namespace, scale: Optional[FixedPointScale] = None,
+                  side: Optional[OrderSide] = None) -> IOrderBook:
+    """ Cria o livro de ordens do tipo escolhido na linha de comando. """
+    if args.book == 'ladder':
+        if scale is not None:
+            # Preços já chegam em ticks inteiros
+            return TickLadderOrderBook(referencePrice=scale.priceToTicks(args.reference_price))
+        return TickLadderOrderBook(tickSize=float(args.tick_size), referencePrice=float(args.reference_price))
+    return OrderBook(backend=args.book, side=side)
+
+def parseArgs(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Matching Engine simples.")
+    parser.add_argument('--book', choices=['avl', 'sorted-array', 'btree', 'ladder'], default='avl',
+                        help="Implementação do livro: árvore AVL, vetor ordenado, B-tree ou vetor de ticks.")
+    parser.add_argument('--fixed-point', action='store_true',
+                        help="Usa preços em ticks e quantidades em lotes inteiros dentro do engine.")
+    parser.add_argument('--tick-size', default='1',
+                        help="Tamanho do tick (ponto fixo e livro em vetor).")
+    parser.add_argument('--lot-size', default='1',
+                        help="Tamanho do lote (ponto fixo).")
+    parser.add_argument('--reference-price', default='0',
+                        help="Preço central inicial do livro em vetor.")
+    parser.add_argument('--stream', action='store_true',
+                        help="Lê comandos da entrada padrão em blocos, com saída bufferizada.")
+    parser.add_argument('--binary', action='store_true',
+                        help="Os arquivos são capturas no formato binário (binary_protocol).")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Modo multi-símbolo: linhas no formato '<símbolo> <comando>', "
+                             "com os símbolos distribuídos entre N processos (0: no próprio processo).")
+    parser.add_argument('--listen', metavar='HOST:PORT', default=None,
+                        help="Servidor TCP: recebe comandos de várias conexões (gateway.py).")
+    parser.add_argument('--unix', metavar='PATH', default=None,
+                        help="Servidor em socket Unix (gateway.py).")
+    parser.add_argument('--journal', metavar='PATH', default=None,
+                        help="Grava as mensagens num journal e recupera o estado dele ao iniciar (requer --fixed-point).")
+    parser.add_argument('--snapshot', metavar='PATH', default=None,
+                        help="Snapshot dos livros usado na recuperação, gravado também ao terminar.")
+    parser.add_argument('--snapshot-every', type=int, default=0,
+                        help="Grava o snapshot a cada N mensagens do journal.")
+    parser.add_argument('--profile', action='store_true',
+                        help="Mede as etapas do engine (modo stream) e imprime as estatísticas em stderr no fim.")
+    parser.add_argument('--cprofile', metavar='PATH', default=None,
+                        help="Executa o modo stream sob o cProfile e grava as estatísticas em PATH.")
+    parser.add_argument('files', nargs='*',
+                        help="Arquivos de ordens a processar em modo stream.")
+    return parser.parse_args(argv)
+
+async def serve(engine: MatchingEngine, listen: Optional[str] = None, unix: Optional[str] = None) -> None:
+    """ Atende conexões TCP e/ou Unix até o processo ser interrompido. """
+    # Importado aqui: gateway.py reutiliza o parsing deste módulo
+    from gateway import OrderGateway
+    gateway = OrderGateway(engine)
+    servers = []
+    if listen is not None:
+        host, _, port = listen.rpartition(':')
+        servers.append(await gateway.startTcp(host or '127.0.0.1', int(port)))
+    if unix is not None:
+        servers.append(await gateway.startUnix(unix))
+    await asyncio.gather(*(server.serve_forever() for server in servers))
+
+def makeJournal(args: argparse.Namespace, scale: Optional[FixedPointScale], groupSize: int = 256) -> Optional[Journal]:
+    """
+        Abre o journal, se pedido. Os registros binários exigem preços e
+        quantidades inteiros. No modo interativo os trades saem na hora, então
+        cada mensagem é gravada antes de processada (groupSize=1).
+    """
+    if args.journal is None:
+        return None
+    if scale is None:
+        raise SystemExit("--journal requer --fixed-point")
+    return Journal(args.journal, groupSize, snapshotPath=args.snapshot, snapshotEvery=args.snapshot_every)
+
+def recover(engine: MatchingEngine, args: argparse.Namespace) -> None:
+    """ Recupera o estado do snapshot e do journal, se houver journal. """
+    if engine.journal is not None:
+        restore(engine, args.snapshot, args.journal)
+
+def shutdown(engine: MatchingEngine, args: argparse.Namespace) -> None:
+    """ Grava o snapshot final e fecha o journal. """
+    if engine.journal is None:
+        return
+    if args.snapshot is not None and engine.phase == TradingPhase.CONTINUOUS:
+        writeSnapshot(engine, args.snapshot)
+    engine.journal.close()
+
+def main(argv: Optional[List[str]] = None):
+    args = parseArgs(argv)
+    scale = makeScale(args)
+    sellOrderBook = makeOrderBook(args, scale, OrderSide.SELL)
+    buyOrderBook = makeOrderBook(args, scale, OrderSide.BUY)
+
+    if args.listen is not None or args.unix is not None:
+        # Trades vão apenas para as sessões agressoras
+        engine = MatchingEngine(buyOrderBook=buyOrderBook, sellOrderBook=sellOrderBook, sinks=[], scale=scale,
+                                journal=makeJournal(args, scale))
+        recover(engine, args)
+        try:
+            asyncio.run(serve(engine, args.listen, args.unix))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            shutdown(engine, args)
+        return
+
+    if not args.stream and not args.files and args.workers is None:
+        engine = MatchingEngine(buyOrderBook=buyOrderBook, sellOrderBook=sellOrderBook, scale=scale,
+                                journal=makeJournal(args, scale, groupSize=1))
+        recover(engine, args)
+        try:
+            runInteractive(engine)
+        finally:
+            shutdown(engine, args)
+        return
+
+    # Trades são escritos num buffer grande, descarregado em blocos
+    output = open(sys.stdout.fileno(), 'w', buffering=OUTPUT_BUFFER_SIZE, closefd=False)
+
+    if args.workers is not None:
+        bookFactory = functools.partial(makeOrderBook, args, scale)
+        with SymbolRouter(numWorkers=args.workers, bookFactory=bookFactory) as router:
+            try:
+                for path in args.files or [None]:
+                    if path is None:
+                        stream = open(sys.stdin.fileno(), 'r', buffering=STREAM_CHUNK_SIZE, closefd=False)
+                    else:
+                        stream = open(path, 'r', buffering=STREAM_CHUNK_SIZE)
+                    with stream:
+                        runRouted(router, stream, output, scale)
+            finally:
+                output.flush()
+        return
+
+    engine = MatchingEngine(buyOrderBook=buyOrderBook, sellOrderBook=sellOrderBook,
+                            sinks=[StreamSink(output, scale)], scale=scale, journal=makeJournal(args, scale))
+    recover(engine, args)
+    instrumentation = EngineInstrumentation(engine) if args.profile else None
+    if instrumentation is not None:
+        instrumentation.install()
+    profiler = cProfile.Profile() if args.cprofile is not None else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        if args.binary:
+            for path in args.files:
+                binary_protocol.replay(engine, path)
+        elif args.files:
+            for path in args.files:
+                with open(path, 'r', buffering=STREAM_CHUNK_SIZE) as stream:
+                    runStream(engine, stream)
+        else:
+            with open(sys.stdin.fileno(), 'r', buffering=STREAM_CHUNK_SIZE, closefd=False) as stream:
+                runStream(engine, stream)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+        engine.flush()
+        shutdown(engine, args)
+        if instrumentation is not None:
+            print(instrumentation.report(), file=sys.stderr)
 
 if __name__ == '__main__':
     main()
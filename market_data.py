@@ -0,0 +1,89 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from enum import IntEnum
+from order import OrderSide
+from trade import Trade
+from trade_sink import ITradeSink
+
+
+class UpdateAction(IntEnum):
+    NEW = 0
+    CHANGE = 1
+    DELETE = 2
+
+
+@dataclass(slots=True)
+class LevelUpdate:
+    action: UpdateAction
+    side: OrderSide
+    price: float
+    qty: float
+    count: int
+
+
+@dataclass(slots=True)
+class UpdateBatch:
+    """ Alterações causadas por uma mensagem, com número de sequência. """
+    seq: int
+    levels: List[LevelUpdate] = field(default_factory=list)
+    trades: List[Trade] = field(default_factory=list)
+
+
+class MarketDataFeed(ITradeSink):
+    """
+        Feed incremental de L2. Os livros avisam cada alteração de nível e o
+        engine avisa cada trade; as alterações de uma mesma mensagem são
+        agrupadas (um único update por nível, com o estado final) e publicadas
+        num lote sequenciado para os assinantes.
+    """
+    def __init__(self):
+        self.seq = 0
+        self.subscribers: List[Callable[[UpdateBatch], None]] = []
+        # (lado, preço) -> [existia antes do lote, quantidade, número de ordens]
+        self._pending: Dict[Tuple[OrderSide, float], list] = {}
+        self._trades: List[Trade] = []
+
+    def subscribe(self, callback: Callable[[UpdateBatch], None]):
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[UpdateBatch], None]):
+        self.subscribers.remove(callback)
+
+    def levelChanged(self, side: OrderSide, price: float, qty: float, count: int, isNew: bool = False):
+        """ Registra o novo estado do nível (count zero remove o nível). """
+        state = self._pending.get((side, price))
+        if state is None:
+            self._pending[(side, price)] = [not isNew, qty, count]
+        else:
+            state[1] = qty
+            state[2] = count
+
+    def emit(self, trade: Trade):
+        self._trades.append(trade)
+
+    def publish(self) -> Optional[UpdateBatch]:
+        """ Publica as alterações pendentes num lote. Retorna o lote, ou None se vazio. """
+        if not self._pending and not self._trades:
+            return None
+
+        levels = []
+        for (side, price), (existed, qty, count) in self._pending.items():
+            if count == 0:
+                if existed:
+                    levels.append(LevelUpdate(UpdateAction.DELETE, side, price, 0, 0))
+            elif existed:
+                levels.append(LevelUpdate(UpdateAction.CHANGE, side, price, qty, count))
+            else:
+                levels.append(LevelUpdate(UpdateAction.NEW, side, price, qty, count))
+
+        self._pending = {}
+        trades = self._trades
+        self._trades = []
+        if not levels and not trades:
+            return None
+
+        self.seq += 1
+        batch = UpdateBatch(self.seq, levels, trades)
+        for callback in self.subscribers:
+            callback(batch)
+        return batch
@@ -1,18 +1,178 @@
-from typing import Optional, Any, List
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Optional, Any, List, Sequence, Tuple
 from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
-from enum import Enum
+from enum import Enum, IntEnum
 from order import Order, OrderSide, OrderType
-from orderbook import IOrderBook, OrderBook
+from orderbook import IOrderBook, OrderBook, np
 from trade import Trade
+from fixed_point import FixedPointScale
+from trade_sink import CallbackSink, ITradeSink, RingBufferSink, StreamSink
+from market_data import MarketDataFeed
+from trigger_book import TriggerBook
+from collections import deque
+import itertools
+from itertools import accumulate
 import math
+import sys
+
+if TYPE_CHECKING:
+    from persistence import Journal
+
+class TradingPhase(IntEnum):
+    CONTINUOUS = 0
+    AUCTION = 1
+
+
+def clearingPrice(bids: Sequence[Tuple[float, int]], asks: Sequence[Tuple[float, int]],
+                  marketBuy: int = 0, marketSell: int = 0,
+                  referencePrice: Optional[float] = None) -> Optional[Tuple[float, int]]:
+    """
+        Preço de equilíbrio do leilão, a partir dos níveis (preço, quantidade) de
+        cada lado e das quantidades a mercado. Em cada preço candidato, a demanda
+        é tudo o que compra a esse preço ou acima, e a oferta, tudo o que vende a
+        esse preço ou abaixo. Escolhe o preço de maior volume executável; no
+        empate, o de menor desequilíbrio; persistindo o empate, o mais alto se
+        sobra compra, o mais baixo se sobra venda, ou o mais próximo de
+        referencePrice (ou do meio da faixa empatada).
+        Retorna (preço, volume), ou None se nada cruza.
+    """
+    prices = sorted({price for price, _ in bids} | {price for price, _ in asks})
+    if not prices:
+        return None
+    position = {price: i for i, price in enumerate(prices)}
+    bidQty = [0] * len(prices)
+    askQty = [0] * len(prices)
+    for price, qty in bids:
+        bidQty[position[price]] += qty
+    for price, qty in asks:
+        askQty[position[price]] += qty
+
+    if np is not None:
+        # Curvas acumuladas de demanda e oferta
+        demand = marketBuy + np.cumsum(np.array(bidQty)[::-1])[::-1]
+        supply = marketSell + np.cumsum(np.array(askQty))
+        volume = np.minimum(demand, supply)
+        best = volume.max().item()
+        candidates = np.flatnonzero(volume == best).tolist()
+        demand = demand.tolist()
+        supply = supply.tolist()
+    else:
+        demand = [marketBuy + qty for qty in accumulate(reversed(bidQty))][::-1]
+        supply = [marketSell + qty for qty in accumulate(askQty)]
+        volume = [min(d, s) for d, s in zip(demand, supply)]
+        best = max(volume)
+        candidates = [i for i, v in enumerate(volume) if v == best]
+    if best <= 0:
+        return None
+
+    imbalance = min(abs(demand[i] - supply[i]) for i in candidates)
+    candidates = [i for i in candidates if abs(demand[i] - supply[i]) == imbalance]
+    if all(demand[i] > supply[i] for i in candidates):
+        i = candidates[-1]
+    elif all(demand[i] < supply[i] for i in candidates):
+        i = candidates[0]
+    else:
+        target = referencePrice
+        if target is None:
+            target = (prices[candidates[0]] + prices[candidates[-1]]) / 2
+        i = min(candidates, key=lambda i: abs(prices[i] - target))
+    return prices[i], best
+
+
+@dataclass(slots=True)
+class BatchFills:
+    """
+        Resultado de order_many, em colunas: o id atribuído a cada ordem do lote
+        e os preenchimentos (índice da ordem no lote, preço, quantidade), um por nível.
+    """
+    orderIds: Any
+    index: Any
+    price: Any
+    qty: Any
+
 
 @dataclass
 class MatchingEngine:
 
     buyOrderBook: IOrderBook
     sellOrderBook: IOrderBook
-    previousTrades: List[Trade] = field(default_factory=list)
+    # Últimos trades, com capacidade fixa (None desliga o histórico)
+    history: Optional[RingBufferSink] = field(default_factory=RingBufferSink)
+    # Destinos dos trades; se None, a saída padrão
+    sinks: Optional[List[ITradeSink]] = None
+    # Escala de ponto fixo: se definida, preços e quantidades são ticks e lotes inteiros
+    scale: Optional[FixedPointScale] = None
+    # Feed incremental de L2: recebe as alterações dos livros e os trades,
+    # publicados num lote por mensagem
+    feed: Optional[MarketDataFeed] = None
+    # Journal (write-ahead): cada mensagem aceita é gravada antes de ser processada
+    journal: Optional['Journal'] = None
+    # Gerador de ids sequenciais para ordens recebidas sem id
+    orderIds: Iterator[int] = field(default_factory=lambda: itertools.count(1), repr=False)
+    # Chamado com cada ordem stop disparada, logo antes de ela ser processada (opcional)
+    onStopRelease: Optional[Callable[[Order], None]] = field(default=None, repr=False)
+    # Métodos emit de todos os destinos, chamados em sequência a cada trade
+    _emitters: Tuple[Callable[[Trade], None], ...] = field(init=False, repr=False, default=())
+    # Validação de preço de cada livro (por lado), ou None se o livro aceita qualquer preço
+    _priceChecks: Tuple[Optional[Callable[[float], None]], ...] = field(init=False, repr=False, default=())
+    # Fase de negociação: contínua, ou leilão (ordens acumulam até uncross)
+    phase: TradingPhase = field(init=False, default=TradingPhase.CONTINUOUS)
+    # Ordens a mercado recebidas durante o leilão, por id, em ordem de chegada
+    _auctionMarket: Dict[int, Order] = field(init=False, repr=False, default_factory=dict)
+    # Ordens stop aguardando o disparo, por lado
+    buyStops: TriggerBook = field(init=False, repr=False, default_factory=lambda: TriggerBook(OrderSide.BUY))
+    sellStops: TriggerBook = field(init=False, repr=False, default_factory=lambda: TriggerBook(OrderSide.SELL))
+    # Com ordens stop guardadas, os trades passam por _triggerStops (um destino a mais em _emitters)
+    _stopsArmed: bool = field(init=False, repr=False, default=False)
+    # Ordens stop disparadas, processadas ao fim da mensagem atual
+    _triggered: deque = field(init=False, repr=False, default_factory=deque)
+
+    def __post_init__(self):
+        self._priceChecks = tuple(None if type(book).checkPrice is IOrderBook.checkPrice else book.checkPrice
+                                  for book in (self.buyOrderBook, self.sellOrderBook))
+        if self.sinks is None:
+            self.sinks = [StreamSink(sys.stdout, self.scale)]
+        if self.feed is not None:
+            self.buyOrderBook.attachFeed(self.feed, OrderSide.BUY)
+            self.sellOrderBook.attachFeed(self.feed, OrderSide.SELL)
+        if self.journal is not None:
+            self.journal.attach(self)
+        self._updateEmitters()
+
+    def _updateEmitters(self):
+        emitters = [sink.emit for sink in self.sinks]
+        if self.history is not None:
+            emitters.insert(0, self.history.emit)
+        if self.feed is not None:
+            emitters.append(self.feed.emit)
+        if self._stopsArmed:
+            emitters.append(self._triggerStops)
+        self._emitters = tuple(emitters)
+
+    def addSink(self, sink: ITradeSink):
+        self.sinks.append(sink)
+        self._updateEmitters()
+
+    def removeSink(self, sink: ITradeSink):
+        self.sinks.remove(sink)
+        self._updateEmitters()
+
+    def flush(self):
+        """
+            Descarrega os destinos bufferizados. O journal é gravado antes, para
+            que nenhum trade saia antes das mensagens que o geraram.
+        """
+        if self.journal is not None:
+            self.journal.commit()
+        for sink in self.sinks:
+            sink.flush()
+
+    @property
+    def previousTrades(self) -> List[Trade]:
+        """ Últimos trades guardados no histórico. """
+        if self.history is None:
+            return []
+        return list(self.history)
 
     def _add(self, order: Order):
         if order.side == OrderSide.BUY:
@@ -26,17 +186,14 @@ class MatchingEngine:
             Tenta completar a ordem até não haver mais ordens no livro,
             ou ultrapassar o valor limite (se for um limit order).
         """
-        # Acha a ordem de venda com menor valor
-        minPrice = self.sellOrderBook.getMinPrice()
-        qty = order.qty
+        # Percorre os níveis de venda a partir do menor preço, numa única passada,
+        # parando no preço limite
+        maxPrice = order.price if order.type == OrderType.LIMIT else math.inf
+        fills = self.sellOrderBook.sweepFromMin(order.qty, maxPrice)
 
-        # Enquanto houver ordens disponíveis dentro do melhor preço 
-        # e a quantidade de ordens não for atingida, executar a compra
-        filled = self.sellOrderBook.popQty(minPrice, qty)
-
-        # Se não foi possível completar a ordem, sai do loop
-        if filled > 0:
-            self.exec(Trade(price=minPrice, qty=filled))
+        for price, filled in fills:
+            order.qty -= filled
+            self.exec(Trade(price=price, qty=filled))
 
 
     def _fillSellOrder(self, order: Order):
@@ -44,34 +201,399 @@ class MatchingEngine:
             Tenta completar a ordem até não haver mais ordens no livro,
             ou ultrapassar o valor limite (se for um limit order).
         """
-        # Acha a ordem de compra com maior valor
-        maxPrice = self.buyOrderBook.getMaxPrice()
-        qty = order.qty
-
+        # Percorre os níveis de compra a partir do maior preço, numa única passada,
+        # parando no preço limite
+        minPrice = order.price if order.type == OrderType.LIMIT else -math.inf
+        fills = self.buyOrderBook.sweepFromMax(order.qty, minPrice)
 
-        # Enquanto houver ordens disponíveis dentro do preço máximo
-        # e a quantidade de ordens não for atingida, executar a compra
-        filled = self.buyOrderBook.popQty(maxPrice, qty)
-
-        if filled > 0:
-            self.exec(Trade(price=maxPrice, qty=filled))
+        for price, filled in fills:
+            order.qty -= filled
+            self.exec(Trade(price=price, qty=filled))
 
 
     def match(self, order: Order):
         """
-            Acha um match para a ordem de mercado.
+            Acha um match para a ordem no livro oposto.
         """
         if order.side == OrderSide.BUY:
             self._fillBuyOrder(order)
         else:
             self._fillSellOrder(order)
 
+    def _checkPrice(self, side: OrderSide, price: Optional[float]):
+        """ Rejeita o preço antes de qualquer efeito (journal, match ou livro). """
+        check = self._priceChecks[side]
+        if check is not None and price is not None:
+            check(price)
+
     def order(self, order: Order):
+        if order.type >= OrderType.STOP:
+            # Mesmo erro com ou sem journal
+            self._checkStop(order)
+        if order.type == OrderType.LIMIT or order.type == OrderType.STOP_LIMIT:
+            self._checkPrice(order.side, order.price)
+        if self.journal is not None:
+            # O id é atribuído antes, para a reprodução do journal ser determinística
+            if order.id is None:
+                order.id = next(self.orderIds)
+            self.journal.order(order)
+        self._process(order)
+        if self._triggered:
+            self._releaseStops()
+        if self.feed is not None:
+            self.feed.publish()
+
+    def order_many(self, orders: Optional[Sequence[Order]] = None, *, sides: Optional[Sequence] = None,
+                   types: Optional[Sequence] = None, prices: Optional[Sequence] = None,
+                   qtys: Optional[Sequence] = None) -> BatchFills:
+        """
+            Processa um lote de ordens numa única chamada: uma lista de Order, ou
+            colunas (listas ou vetores NumPy) de lado, tipo, preço e quantidade.
+            O resultado é o mesmo de chamar order() para cada ordem, mas sem
+            criar Order para as ordens que não ficam no livro e sem despacho por
+            ordem. Os preenchimentos voltam em colunas (vetores NumPy, se as
+            colunas de entrada forem NumPy). Ordens stop só podem vir em orders
+            (as colunas não têm stopPrice).
+        """
+        if self.phase != TradingPhase.CONTINUOUS:
+            # Em leilão não há match: cada ordem segue o caminho normal
+            if orders is None:
+                sides, types, prices, qtys = [column.tolist() if hasattr(column, 'tolist') else column
+                                              for column in (sides, types, prices, qtys)]
+                orders = [Order(OrderType(type_), OrderSide(side), price if type_ == OrderType.LIMIT else None, qty)
+                          for side, type_, price, qty in zip(sides, types, prices, qtys)]
+            for order in orders:
+                self.order(order)
+            return BatchFills([order.id for order in orders], [], [], [])
+
+        if orders is not None:
+            sides = [order.side for order in orders]
+            types = [order.type for order in orders]
+            prices = [order.price for order in orders]
+            qtys = [order.qty for order in orders]
+        else:
+            if sides is None or types is None or prices is None or qtys is None:
+                raise ValueError("Informe orders ou as colunas sides, types, prices e qtys")
+            if not len(sides) == len(types) == len(prices) == len(qtys):
+                raise ValueError("Colunas com tamanhos diferentes")
+        asNumpy = np is not None and isinstance(sides, np.ndarray)
+        # Valores NumPy viram objetos Python de uma vez
+        sides, types, prices, qtys = [column.tolist() if hasattr(column, 'tolist') else column
+                                      for column in (sides, types, prices, qtys)]
+        if self._stopsArmed or max(types, default=OrderType.LIMIT) >= OrderType.STOP:
+            if orders is None:
+                raise ValueError("Ordens stop precisam de stopPrice: informe orders")
+            return self._orderEach(orders, asNumpy)
+        if self._priceChecks != (None, None):
+            # O lote inteiro é rejeitado antes da primeira ordem
+            for side, type_, price in zip(sides, types, prices):
+                if type_ == OrderType.LIMIT:
+                    self._checkPrice(side, price)
+
+        # Atributos e métodos usados no laço
+        sweepSell = self.sellOrderBook.sweepFromMin
+        sweepBuy = self.buyOrderBook.sweepFromMax
+        addBuy = self.buyOrderBook.add
+        addSell = self.sellOrderBook.add
+        emitters = self._emitters
+        orderIds = self.orderIds
+        journal = self.journal
+        feed = self.feed
+        LIMIT = OrderType.LIMIT
+        BUY = OrderSide.BUY
+        SIDES = (OrderSide.BUY, OrderSide.SELL)
+        TYPES = (OrderType.LIMIT, OrderType.MARKET)
+        inf = math.inf
+
+        ids = []
+        fillIndex = []
+        fillPrice = []
+        fillQty = []
+        for i in range(len(sides)):
+            side = sides[i]
+            type_ = types[i]
+            price = prices[i]
+            qty = qtys[i]
+            order = orders[i] if orders is not None else None
+            if order is None:
+                orderId = next(orderIds)
+            else:
+                if order.id is None:
+                    order.id = next(orderIds)
+                orderId = order.id
+            ids.append(orderId)
+
+            if journal is not None:
+                if order is None:
+                    order = Order(TYPES[type_], SIDES[side], price if type_ == LIMIT else None, qty, orderId)
+                journal.order(order)
+
+            if side == BUY:
+                fills = sweepSell(qty, price if type_ == LIMIT else inf)
+            else:
+                fills = sweepBuy(qty, price if type_ == LIMIT else -inf)
+            for fill in fills:
+                filled = fill[1]
+                qty -= filled
+                trade = Trade(fill[0], filled)
+                for emit in emitters:
+                    emit(trade)
+                fillIndex.append(i)
+                fillPrice.append(fill[0])
+                fillQty.append(filled)
+
+            if order is not None:
+                order.qty = qty
+            if type_ == LIMIT and qty > 0:
+                # Somente ordens que ficam no livro viram Order
+                if order is None:
+                    order = Order(LIMIT, SIDES[side], price, qty, orderId)
+                if side == BUY:
+                    addBuy(order)
+                else:
+                    addSell(order)
+            if feed is not None:
+                feed.publish()
+
+        if asNumpy:
+            return BatchFills(np.asarray(ids, dtype='int64'), np.asarray(fillIndex, dtype='int64'),
+                              np.asarray(fillPrice), np.asarray(fillQty))
+        return BatchFills(ids, fillIndex, fillPrice, fillQty)
+
+    def _orderEach(self, orders: Sequence[Order], asNumpy: bool) -> BatchFills:
+        """
+            order_many com ordens stop no lote ou no livro: ordens disparadas entram
+            no meio do lote, então cada ordem segue o caminho normal de order(). Os
+            trades das stops disparadas são atribuídos à ordem que as disparou.
+        """
+        fillIndex = []
+        fillPrice = []
+        fillQty = []
+        current = [0]
+
+        def onTrade(trade: Trade):
+            fillIndex.append(current[0])
+            fillPrice.append(trade.price)
+            fillQty.append(trade.qty)
+
+        sink = CallbackSink(onTrade)
+        self.addSink(sink)
+        try:
+            for i, order in enumerate(orders):
+                current[0] = i
+                self.order(order)
+        finally:
+            self.removeSink(sink)
+        ids = [order.id for order in orders]
+        if asNumpy:
+            return BatchFills(np.asarray(ids, dtype='int64'), np.asarray(fillIndex, dtype='int64'),
+                              np.asarray(fillPrice), np.asarray(fillQty))
+        return BatchFills(ids, fillIndex, fillPrice, fillQty)
+
+    def startAuction(self):
+        """
+            Inicia o leilão: ordens limite se acumulam nos livros, sem match, e
+            ordens a mercado ficam guardadas à parte, até uncross().
+        """
+        if self.phase == TradingPhase.AUCTION:
+            return
+        if self.journal is not None:
+            self.journal.startAuction()
+        self.phase = TradingPhase.AUCTION
+        # Troca o processamento na instância, sem testar a fase a cada ordem
+        self._process = self._processAuction
+
+    def _processAuction(self, order: Order):
+        if order.id is None:
+            order.id = next(self.orderIds)
         if order.type == OrderType.MARKET:
+            self._auctionMarket[order.id] = order
+        elif order.type == OrderType.LIMIT:
+            self._add(order)
+        else:
+            self._addStop(order)
+
+    def uncross(self, referencePrice: Optional[float] = None) -> Optional[Trade]:
+        """
+            Encerra o leilão: executa todo o volume cruzado num único preço de
+            equilíbrio (clearingPrice) e volta à negociação contínua. Ordens a
+            mercado têm prioridade e o que não for executado delas é descartado;
+            ordens limite seguem prioridade de preço e tempo, e o restante fica no
+            livro. Retorna o trade do leilão, ou None se nada cruzou.
+        """
+        if self.phase != TradingPhase.AUCTION:
+            return None
+        if self.journal is not None:
+            self.journal.uncross(referencePrice)
+
+        marketBuys = [order for order in self._auctionMarket.values() if order.side == OrderSide.BUY]
+        marketSells = [order for order in self._auctionMarket.values() if order.side == OrderSide.SELL]
+        bids = [(price, qty) for price, qty, _ in self.buyOrderBook.depthFromMax(self.buyOrderBook.getSize())]
+        asks = [(price, qty) for price, qty, _ in self.sellOrderBook.depthFromMin(self.sellOrderBook.getSize())]
+        result = clearingPrice(bids, asks, sum(order.qty for order in marketBuys),
+                               sum(order.qty for order in marketSells), referencePrice)
+
+        trade = None
+        if result is not None:
+            price, volume = result
+            for marketOrders, book, sweep in ((marketBuys, self.buyOrderBook, self.buyOrderBook.sweepFromMax),
+                                              (marketSells, self.sellOrderBook, self.sellOrderBook.sweepFromMin)):
+                remaining = volume
+                for order in marketOrders:
+                    filled = min(order.qty, remaining)
+                    order.qty -= filled
+                    remaining -= filled
+                if remaining > 0:
+                    sweep(remaining, price)
+            trade = Trade(price=price, qty=volume)
+            self.exec(trade)
+
+        self._auctionMarket.clear()
+        self.phase = TradingPhase.CONTINUOUS
+        del self._process
+        if self._triggered:
+            self._releaseStops()
+        if self.feed is not None:
+            self.feed.publish()
+        return trade
+
+    def _process(self, order: Order):
+        if order.id is None:
+            order.id = next(self.orderIds)
+
+        if order.type == OrderType.MARKET:
+            self.match(order)
+        elif order.type == OrderType.LIMIT:
+            # Ordem limite agressiva cruza com o livro oposto até o preço limite,
+            # e somente o restante fica no livro
             self.match(order)
+            if order.qty > 0:
+                self._add(order)
         else:
-            self._add(order)
+            self._addStop(order)
+
+    def _addStop(self, order: Order):
+        """
+            Guarda a ordem stop até um trade a stopPrice ou além (acima na compra,
+            abaixo na venda). O disparo vem apenas de trades posteriores.
+        """
+        self._checkStop(order)
+        if order.side == OrderSide.BUY:
+            self.buyStops.add(order)
+        else:
+            self.sellStops.add(order)
+        if not self._stopsArmed:
+            self._stopsArmed = True
+            self._updateEmitters()
+
+    @staticmethod
+    def _checkStop(order: Order):
+        """ Rejeita ordem stop incompleta, antes de qualquer efeito. """
+        if order.stopPrice is None:
+            raise ValueError(f"Ordem stop sem stopPrice: <{order.id}>")
+        if order.type == OrderType.STOP_LIMIT and order.price is None:
+            raise ValueError(f"Ordem stop limit sem preço limite: <{order.id}>")
+
+    def _disarmStops(self):
+        """ Sem ordens stop guardadas, os trades deixam de passar por _triggerStops. """
+        if self._stopsArmed and not self.buyStops and not self.sellStops:
+            self._stopsArmed = False
+            self._updateEmitters()
+
+    def _triggerStops(self, trade: Trade):
+        """ Destino dos trades: separa as ordens stop disparadas pelo preço do trade. """
+        triggered = self.buyStops.popTriggered(trade.price)
+        triggered += self.sellStops.popTriggered(trade.price)
+        if triggered:
+            self._triggered.extend(triggered)
+            self._disarmStops()
+
+    def _releaseStops(self):
+        """
+            Processa as ordens stop disparadas, como ordens a mercado (STOP) ou
+            limite (STOP_LIMIT). Os trades delas podem disparar outras ordens
+            stop, processadas no mesmo laço, em cascata, sem recursão.
+        """
+        triggered = self._triggered
+        process = self._process
+        release = self.onStopRelease
+        MARKET = OrderType.MARKET
+        LIMIT = OrderType.LIMIT
+        STOP = OrderType.STOP
+        while triggered:
+            order = triggered.popleft()
+            order.type = MARKET if order.type == STOP else LIMIT
+            if release is not None:
+                release(order)
+            process(order)
+
+    def _getBook(self, side: OrderSide) -> IOrderBook:
+        return self.buyOrderBook if side == OrderSide.BUY else self.sellOrderBook
+
+    def getOrder(self, orderId: int) -> Optional[Order]:
+        """ Retorna a ordem em livro com o id informado. """
+        order = self.buyOrderBook.getOrder(orderId)
+        if order is None:
+            order = self.sellOrderBook.getOrder(orderId)
+        return order
+
+    def cancel(self, orderId: int) -> Optional[Order]:
+        """ Cancela a ordem em livro. Retorna a ordem cancelada, ou None. """
+        if self.journal is not None:
+            self.journal.cancel(orderId)
+        order = self.buyOrderBook.cancel(orderId)
+        if order is None:
+            order = self.sellOrderBook.cancel(orderId)
+        if order is None and self._auctionMarket:
+            order = self._auctionMarket.pop(orderId, None)
+        if order is None and self._stopsArmed:
+            order = self.buyStops.cancel(orderId)
+            if order is None:
+                order = self.sellStops.cancel(orderId)
+            self._disarmStops()
+        if self.feed is not None:
+            self.feed.publish()
+        return order
+
+    def amend(self, orderId: int, price: float, qty: int) -> Optional[Order]:
+        """
+            Altera preço e/ou quantidade da ordem em livro.
+            Redução de quantidade no mesmo preço mantém a prioridade;
+            qualquer outra alteração reinsere a ordem (que pode cruzar o livro).
+        """
+        order = self.getOrder(orderId)
+        if order is not None:
+            self._checkPrice(order.side, price)
+        if self.journal is not None:
+            self.journal.amend(orderId, price, qty)
+        if order is None:
+            return None
+
+        book = self._getBook(order.side)
+        if price == order.price and qty <= order.qty:
+            book.reduce(orderId, qty)
+        else:
+            book.cancel(orderId)
+            order.price = price
+            order.qty = qty
+            self._process(order)
+            if self._triggered:
+                self._releaseStops()
+        if self.feed is not None:
+            self.feed.publish()
+        return order
+
+    def getDepth(self, levels: int, bidArrays: Optional[Tuple[Any, Any, Any]] = None,
+                 askArrays: Optional[Tuple[Any, Any, Any]] = None):
+        """
+            Retorna (compras, vendas) com os primeiros níveis agregados de cada lado,
+            do melhor preço para o pior. Com vetores pré-alocados (allocDepthArrays),
+            preenche-os e retorna o número de níveis escritos de cada lado.
+        """
+        bids = self.buyOrderBook.depthFromMax(levels, bidArrays)
+        asks = self.sellOrderBook.depthFromMin(levels, askArrays)
+        return bids, asks
 
     def exec(self, trade: Trade):
-        self.previousTrades.append(trade)
-        print(f"Trade, price: {trade.price}, qty: {trade.qty}")
+        for emit in self._emitters:
+            emit(trade)
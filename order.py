@@ -2,24 +2,36 @@ from datetime import datetime
 from typing import Optional, Any, List
 from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
-from enum import Enum
+from enum import IntEnum
 from datetime import datetime as dt
 import math
 
 
-class OrderType(Enum):
+# Enums inteiros: comparações usam int.__eq__ e cabem em um inteiro pequeno
+class OrderType(IntEnum):
     LIMIT = 0
     MARKET = 1
+    # Aguardam um trade no preço de disparo (stopPrice) e viram MARKET ou LIMIT
+    STOP = 2
+    STOP_LIMIT = 3
 
 
-class OrderSide(Enum):
+class OrderSide(IntEnum):
     BUY = 0
     SELL = 1
 
 
-@dataclass
+# slots: sem __dict__ por instância, reduzindo memória por ordem em livro
+@dataclass(slots=True)
 class Order:
     type: OrderType
     side: OrderSide
     price: float = None
     qty: float = 0
+    id: Optional[int] = field(default=None, compare=False)
+    # Preço de disparo das ordens STOP e STOP_LIMIT
+    stopPrice: Optional[float] = None
+    # Encadeamento intrusivo na fila do nível de preço (OrderPriorityQueue)
+    prev: Optional['Order'] = field(default=None, compare=False, repr=False)
+    next: Optional['Order'] = field(default=None, compare=False, repr=False)
+    queue: Optional[Any] = field(default=None, compare=False, repr=False)
@@ -1,10 +1,33 @@
-from typing import Generator, Optional, Any, List
+from typing import Generator, Iterable, Iterator, Optional, Any, List, Tuple
 from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
 from enum import Enum
-from avl_tree import AVLNode, AVLTree
+from avl_tree import AVLNode, AVLTree, AugmentedAVLTree
+from ordered_map import BTreeMap, SortedArrayMap
 from order import Order, OrderSide, OrderType
 from collections import deque
+import math
+
+try:
+    import numpy as np
+except ImportError:  # numpy é opcional, usado só na exportação de profundidade
+    np = None
+
+# Nível agregado de profundidade: (preço, quantidade total, número de ordens)
+DepthLevel = Tuple[float, int, int]
+
+# Mapas ordenados de níveis de preço disponíveis para OrderBook
+BACKENDS = ('avl', 'sorted-array', 'btree')
+
+
+def allocDepthArrays(levels: int, priceDtype: Any = 'float64', qtyDtype: Any = 'float64') -> Tuple[Any, Any, Any]:
+    """
+        Aloca os vetores NumPy (preços, quantidades, número de ordens) usados por
+        depthFromMin/depthFromMax. Podem ser reutilizados entre consultas.
+    """
+    if np is None:
+        raise ImportError("numpy é necessário para exportar a profundidade em vetores")
+    return np.empty(levels, dtype=priceDtype), np.empty(levels, dtype=qtyDtype), np.empty(levels, dtype='int64')
 
 class IOrderBook(ABC):
     @abstractmethod
@@ -31,6 +54,14 @@ class IOrderBook(ABC):
     def popQty(self, price: float, qty: int) -> int:
         pass
 
+    @abstractmethod
+    def sweepFromMin(self, qty: int, maxPrice: float = math.inf) -> List[Tuple[float, int]]:
+        pass
+
+    @abstractmethod
+    def sweepFromMax(self, qty: int, minPrice: float = -math.inf) -> List[Tuple[float, int]]:
+        pass
+
     @abstractmethod
     def getMinPrice(self) -> Optional[float]:
         pass
@@ -47,84 +78,322 @@ class IOrderBook(ABC):
     def getSize(self) -> int:
         pass
 
+    @abstractmethod
+    def getTotalQty(self) -> int:
+        pass
+
+    @abstractmethod
+    def attachFeed(self, feed: Any, side: OrderSide):
+        pass
+
+    @abstractmethod
+    def depthFromMin(self, levels: int, arrays: Optional[Tuple[Any, Any, Any]] = None):
+        pass
+
+    @abstractmethod
+    def depthFromMax(self, levels: int, arrays: Optional[Tuple[Any, Any, Any]] = None):
+        pass
+
+    @abstractmethod
+    def getLevelQty(self, price: float) -> int:
+        pass
+
+    @abstractmethod
+    def getLevelSize(self, price: float) -> int:
+        pass
+
+    @abstractmethod
+    def load_levels(self, levels: Iterable[Tuple[float, 'OrderPriorityQueue']]):
+        pass
+
+    @abstractmethod
+    def getOrder(self, orderId: int) -> Optional[Order]:
+        pass
+
+    @abstractmethod
+    def cancel(self, orderId: int) -> Optional[Order]:
+        pass
+
+    @abstractmethod
+    def reduce(self, orderId: int, qty: int) -> Optional[Order]:
+        pass
+
+    def checkPrice(self, price: float) -> None:
+        """
+            Valida o preço de uma ordem limite antes do match (ValueError se o
+            livro não puder guardá-la). Livros sem restrição de preço não
+            sobrescrevem, e o engine não chama a validação.
+        """
+
 class OrderPriorityQueue():
-    def __init__(self, order: Order):
-        self.limit_queue = deque()
-        self.limit_queue.append(order)
+    """
+        Fila de ordens de um nível de preço, por tempo de chegada.
+        Lista duplamente encadeada intrusiva (usa Order.prev/Order.next),
+        permitindo remover uma ordem do meio da fila em O(1).
+    """
+    __slots__ = ('head', 'tail', 'count', 'qty', 'price', 'node')
+
+    def __init__(self, order: Optional[Order] = None):
+        self.head: Optional[Order] = None
+        self.tail: Optional[Order] = None
+        self.count = 0
+        # Quantidade total do nível, mantida a cada alteração
+        self.qty = 0
+        self.price = order.price if order is not None else None
+        # Nó da árvore que contém esta fila, para remover o nível sem busca
+        self.node: Optional[AVLNode] = None
+        if order is not None:
+            self.append(order)
 
     def appendleft(self , order: Order):
-        self.limit_queue.appendleft(order)
+        order.queue = self
+        order.prev = None
+        order.next = self.head
+        if self.head is None:
+            self.tail = order
+        else:
+            self.head.prev = order
+        self.head = order
+        self.count += 1
+        self.qty += order.qty
 
     def append(self, order: Order):
-        self.limit_queue.append(order)
+        order.queue = self
+        order.prev = self.tail
+        order.next = None
+        if self.tail is None:
+            self.head = order
+        else:
+            self.tail.next = order
+        self.tail = order
+        self.count += 1
+        self.qty += order.qty
+
+    def remove(self, order: Order):
+        """ Remove a ordem da fila em O(1). """
+        if order.prev is None:
+            self.head = order.next
+        else:
+            order.prev.next = order.next
+        if order.next is None:
+            self.tail = order.prev
+        else:
+            order.next.prev = order.prev
+        order.prev = order.next = order.queue = None
+        self.count -= 1
+        self.qty -= order.qty
 
     def popleft(self) -> Optional[Order]:
-        if self.limit_queue:
-            return self.limit_queue.popleft()
-        else:
-            return None 
+        order = self.head
+        if order is not None:
+            self.remove(order)
+        return order
 
     def pop(self) -> Optional[Order]:
-        if self.limit_queue:
-            return self.limit_queue.pop()
-        else:
-            return None
+        order = self.tail
+        if order is not None:
+            self.remove(order)
+        return order
+
+    def peekleft(self) -> Optional[Order]:
+        return self.head
+
+    def fill(self, qty: int, index: dict) -> int:
+        """
+            Abate a quantidade das ordens da fila, por ordem de chegada.
+            Ordens completamente preenchidas saem da fila e do índice.
+            Retorna a quantidade abatida.
+        """
+        qty_removed = 0
+        while self.head is not None and qty_removed < qty:
+            order = self.head
+            # Se ordem tiver quantidade mais que suficiente
+            if order.qty > qty - qty_removed:
+                sobra = qty - qty_removed
+                order.qty -= sobra
+                self.qty -= sobra
+                qty_removed += sobra
+            else:
+                qty_removed += order.qty
+                self.remove(order)
+                index.pop(order.id, None)
+        return qty_removed
 
     def __len__(self):
-        return len(self.limit_queue)
+        return self.count
 
     def __iter__(self):
-        for order in self.limit_queue:
+        order = self.head
+        while order is not None:
+            # Guarda o próximo antes de entregar, caso a ordem seja removida
+            next_order = order.next
             yield order
+            order = next_order
 
 
 class OrderBook(IOrderBook):
-    def __init__(self):
-        # Implementação de fila de prioridade com árvore AVL
-        # Cada nó da árvore, ordenada por preço, é uma fila de ordens, por tempo de chegada
-        self.orders = AVLTree()
+    def __init__(self, augmented: bool = False, backend: str = 'avl', side: Optional[OrderSide] = None):
+        # Implementação de fila de prioridade com mapa ordenado por preço (árvore AVL por padrão)
+        # Cada nó do mapa é uma fila de ordens, por tempo de chegada
+        # Com augmented, os nós guardam somas da subárvore (liquidityUpTo, costFromMin, ...)
+        # Com backend 'sorted-array', side coloca o melhor preço no fim do vetor
+        if backend not in BACKENDS:
+            raise ValueError(f"Mapa de níveis desconhecido: <{backend}>")
+        if augmented and backend != 'avl':
+            raise ValueError("augmented requer o backend 'avl'")
+        self.augmented = augmented
+        self.backend = backend
+        # Feed de market data avisado a cada alteração de nível (opcional)
+        self.feed = None
+        self.side = side
+        self.orders = self._levelMap()
+        # Índice de ordens por id, para cancelamento e alteração em O(1)
+        self.index = {}
+        # Totais do livro, mantidos a cada alteração
+        self.size = 0
+        self.totalQty = 0
+
+    def _levelMap(self, levels: Iterable[Tuple[float, 'OrderPriorityQueue']] = ()):
+        """ Cria o mapa de níveis do backend escolhido, a partir de níveis em ordem crescente de preço. """
+        if self.augmented:
+            return AugmentedAVLTree.fromSorted(levels)
+        if self.backend == 'sorted-array':
+            # Livro de venda consome a partir do menor preço
+            return SortedArrayMap.fromSorted(levels, reverse=self.side == OrderSide.SELL)
+        if self.backend == 'btree':
+            return BTreeMap.fromSorted(levels)
+        return AVLTree.fromSorted(levels)
+
+    def attachFeed(self, feed: Any, side: OrderSide):
+        """ Liga o livro a um MarketDataFeed, identificando o lado. """
+        self.feed = feed
+        self.side = side
 
     def add(self, order: Order):
         """ Adiciona ordem ao livro. """
+        self.size += 1
+        self.totalQty += order.qty
         price_node = self.orders.get(key=order.price)
-        order_queue = OrderPriorityQueue(order)
 
         if price_node:
             # Se já existe uma ordem com o mesmo preço, adiciona ordem ao final da fila
             order_queue = price_node.data
             order_queue.append(order)
+            isNew = False
+            if self.augmented:
+                self.orders.updateAggregates(price_node)
         else:
             # Se não existe ordem com o mesmo preço, cria uma fila de ordens
-            price_node = AVLNode(key=order.price, data=order_queue)
+            order_queue = OrderPriorityQueue(order)
+            price_node = self.orders.nodeClass(key=order.price, data=order_queue)
+            order_queue.node = price_node
             self.orders.insert(price_node)
+            isNew = True
+
+        if order.id is not None:
+            self.index[order.id] = order
+        if self.feed is not None:
+            self.feed.levelChanged(self.side, order_queue.price, order_queue.qty, order_queue.count, isNew)
+
+    def load_levels(self, levels: Iterable[Tuple[float, OrderPriorityQueue]]):
+        """
+            Carrega o livro vazio com os níveis (preço, fila) em ordem crescente
+            de preço, construindo a árvore de uma vez em O(n).
+        """
+        if self.size:
+            raise ValueError("O livro precisa estar vazio para carregar níveis")
+        self.orders = self._levelMap(levels)
+        index = self.index
+        for node in self.orders.iterRange():
+            order_queue = node.data
+            order_queue.node = node
+            for order in order_queue:
+                if order.id is not None:
+                    index[order.id] = order
+            self.size += order_queue.count
+            self.totalQty += order_queue.qty
+            if self.feed is not None:
+                self.feed.levelChanged(self.side, order_queue.price, order_queue.qty, order_queue.count, True)
 
     def remove(self, price: float):
-        """ Remove ordem do livro. """
+        """ Remove o nível de preço do livro, com todas as suas ordens. """
         price_node = self.orders.get(key=price)
         if price_node == None:
             return None
+        order_queue = price_node.data
+        for order in order_queue:
+            self.index.pop(order.id, None)
+        self.size -= len(order_queue)
+        self.totalQty -= order_queue.qty
         self.orders.delete(price_node)
+        if self.feed is not None:
+            self.feed.levelChanged(self.side, order_queue.price, 0, 0)
+
+    def getOrder(self, orderId: int) -> Optional[Order]:
+        """ Retorna a ordem com o id informado, se estiver no livro. """
+        return self.index.get(orderId)
+
+    def cancel(self, orderId: int) -> Optional[Order]:
+        """ Remove a ordem do livro em O(1), sem buscar o nível na árvore. """
+        order = self.index.pop(orderId, None)
+        if order is None:
+            return None
+        self.size -= 1
+        self.totalQty -= order.qty
+        order_queue = order.queue
+        order_queue.remove(order)
+        if len(order_queue) == 0:
+            self.orders.delete(order_queue.node)
+        elif self.augmented:
+            self.orders.updateAggregates(order_queue.node)
+        if self.feed is not None:
+            self.feed.levelChanged(self.side, order_queue.price, order_queue.qty, order_queue.count)
+        return order
+
+    def reduce(self, orderId: int, qty: int) -> Optional[Order]:
+        """
+            Reduz a quantidade da ordem para qty, mantendo sua prioridade na fila.
+            Quantidade zero cancela a ordem.
+        """
+        order = self.index.get(orderId)
+        if order is None:
+            return None
+        if qty > order.qty:
+            raise ValueError(f"Redução não pode aumentar a quantidade: <{qty}>")
+        if qty <= 0:
+            return self.cancel(orderId)
+        order_queue = order.queue
+        self.totalQty -= order.qty - qty
+        order_queue.qty -= order.qty - qty
+        order.qty = qty
+        if self.augmented:
+            self.orders.updateAggregates(order_queue.node)
+        if self.feed is not None:
+            self.feed.levelChanged(self.side, order_queue.price, order_queue.qty, order_queue.count)
+        return order
 
     def _pop(self, order_queue: OrderPriorityQueue) -> Optional[Order]:
         """ Remove a ordem de primeira chegada. """
         order = order_queue.popleft()
+        if order is not None:
+            self.index.pop(order.id, None)
+            self.size -= 1
+            self.totalQty -= order.qty
         return order
 
     def _peek(self, order_queue: OrderPriorityQueue) -> Optional[Order]:
         """ Retorna ordem de primeira chegada. """
-        order = order_queue.popleft()
-        order_queue.appendleft(order)
-        return order
+        return order_queue.peekleft()
 
     def getMinPrice(self) -> Optional[float]:
-        price_node = self.orders.getMin(self.orders.root)
+        price_node = self.orders.minNode
         if price_node:
             return price_node.key
         else:
             return None
 
     def getMaxPrice(self) -> Optional[float]:
-        price_node = self.orders.getMax(self.orders.root)
+        price_node = self.orders.maxNode
         if price_node:
             return price_node.key
         else:
@@ -147,45 +416,157 @@ class OrderBook(IOrderBook):
         if order_queue == None:
             return 0
 
-        qty_removed = 0
-        while len(order_queue) > 0 and qty_removed < qty:
-            order = self._peek(order_queue)
-            # Se ordem tiver quantidade mais que suficiente
-            if order.qty > qty - qty_removed:
-                sobra = qty - qty_removed
-                order.qty -= sobra
-                qty_removed += sobra
-            else:
-                qty_removed += order.qty
-                self._pop(order_queue)
+        count = len(order_queue)
+        qty_removed = order_queue.fill(qty, self.index)
+        self.size -= count - len(order_queue)
+        self.totalQty -= qty_removed
 
         if len(order_queue) == 0:
-            self.remove(price)
+            self.orders.delete(order_queue.node)
+        elif self.augmented:
+            self.orders.updateAggregates(order_queue.node)
+        if self.feed is not None:
+            self.feed.levelChanged(self.side, order_queue.price, order_queue.qty, order_queue.count)
 
         return  qty_removed
 
+    def sweepFromMin(self, qty: int, maxPrice: float = math.inf) -> List[Tuple[float, int]]:
+        """
+            Abate a quantidade percorrendo os níveis de preço a partir do mínimo,
+            até o preço máximo (inclusivo). Níveis esvaziados são removidos no caminho.
+            Retorna a lista de preenchimentos (preço, quantidade) por nível.
+        """
+        fills = []
+        node = self.orders.minNode
+        while node is not None and qty > 0 and node.key <= maxPrice:
+            order_queue = node.data
+            count = len(order_queue)
+            filled = order_queue.fill(qty, self.index)
+            self.size -= count - len(order_queue)
+            self.totalQty -= filled
+            if self.feed is not None:
+                self.feed.levelChanged(self.side, order_queue.price, order_queue.qty, order_queue.count)
+            fills.append((node.key, filled))
+            qty -= filled
+            if len(order_queue) > 0:
+                if self.augmented:
+                    self.orders.updateAggregates(node)
+                break
+            # Nós mantêm identidade na remoção, então o sucessor continua válido
+            next_node = self.orders.getSuccessor(node)
+            self.orders.delete(node)
+            node = next_node
+        return fills
+
+    def sweepFromMax(self, qty: int, minPrice: float = -math.inf) -> List[Tuple[float, int]]:
+        """
+            Abate a quantidade percorrendo os níveis de preço a partir do máximo,
+            até o preço mínimo (inclusivo). Níveis esvaziados são removidos no caminho.
+            Retorna a lista de preenchimentos (preço, quantidade) por nível.
+        """
+        fills = []
+        node = self.orders.maxNode
+        while node is not None and qty > 0 and node.key >= minPrice:
+            order_queue = node.data
+            count = len(order_queue)
+            filled = order_queue.fill(qty, self.index)
+            self.size -= count - len(order_queue)
+            self.totalQty -= filled
+            if self.feed is not None:
+                self.feed.levelChanged(self.side, order_queue.price, order_queue.qty, order_queue.count)
+            fills.append((node.key, filled))
+            qty -= filled
+            if len(order_queue) > 0:
+                if self.augmented:
+                    self.orders.updateAggregates(node)
+                break
+            next_node = self.orders.getPredecessor(node)
+            self.orders.delete(node)
+            node = next_node
+        return fills
+
+    def _depth(self, node: Optional[AVLNode], step, levels: int, arrays):
+        """ Agrega até levels níveis a partir de node, andando com step. """
+        if arrays is None:
+            depth = []
+            while node is not None and len(depth) < levels:
+                order_queue = node.data
+                depth.append((node.key, order_queue.qty, order_queue.count))
+                node = step(node)
+            return depth
+
+        prices, qtys, counts = arrays
+        levels = min(levels, len(prices))
+        n = 0
+        while node is not None and n < levels:
+            order_queue = node.data
+            prices[n] = node.key
+            qtys[n] = order_queue.qty
+            counts[n] = order_queue.count
+            n += 1
+            node = step(node)
+        return n
+
+    def depthFromMin(self, levels: int, arrays: Optional[Tuple[Any, Any, Any]] = None):
+        """
+            Retorna os primeiros níveis agregados a partir do menor preço, como lista
+            de (preço, quantidade, número de ordens). Se arrays (ver allocDepthArrays)
+            for informado, preenche os vetores e retorna o número de níveis escritos.
+        """
+        return self._depth(self.orders.minNode, self.orders.getSuccessor, levels, arrays)
+
+    def depthFromMax(self, levels: int, arrays: Optional[Tuple[Any, Any, Any]] = None):
+        """
+            Retorna os primeiros níveis agregados a partir do maior preço, como lista
+            de (preço, quantidade, número de ordens). Se arrays (ver allocDepthArrays)
+            for informado, preenche os vetores e retorna o número de níveis escritos.
+        """
+        return self._depth(self.orders.maxNode, self.orders.getPredecessor, levels, arrays)
+
     def iterFromMax(self, minPrice: float = 0) -> Optional[Order]:
-        """ Itera as ordens do livro a partir do máximo até o mínimo preço. """
-        node = self.orders.getMax(self.orders.root)
-        while node != None:
-            if node.key > minPrice:
-                for order in node.data:
-                    yield order
-            node = self.orders.getPredecessor(node)
+        """ Itera as ordens do livro a partir do máximo, parando no preço mínimo (exclusivo). """
+        for node in self.orders.iterRange(reverse=True):
+            if node.key <= minPrice:
+                break
+            yield from node.data
 
     def iterFromMin(self, maxPrice: float = float('inf')) -> Optional[Order]:
-        """ Itera as ordens do livro a partir do mínimo até o máximo preço. """
-        node = self.orders.getMin(self.orders.root)
-        while node != None:
-            if node.key < maxPrice:
-                for order in node.data:
-                    yield order
-            node = self.orders.getSuccessor(node)
+        """ Itera as ordens do livro a partir do mínimo, parando no preço máximo (exclusivo). """
+        for node in self.orders.iterRange():
+            if node.key >= maxPrice:
+                break
+            yield from node.data
+
+    def iterLevels(self, low: float = -math.inf, high: float = math.inf,
+                   reverse: bool = False) -> Iterator[OrderPriorityQueue]:
+        """
+            Itera os níveis com preço entre low e high (inclusivos), do menor para
+            o maior (ou ao contrário, com reverse). O primeiro nível é achado em
+            O(log n) e a iteração para no limite.
+        """
+        for node in self.orders.iterRange(None if low == -math.inf else low,
+                                          None if high == math.inf else high, reverse):
+            yield node.data
+
+    def iterRange(self, low: float = -math.inf, high: float = math.inf, reverse: bool = False) -> Iterator[Order]:
+        """ Itera as ordens dos níveis entre low e high (inclusivos), por preço e chegada. """
+        for order_queue in self.iterLevels(low, high, reverse):
+            yield from order_queue
 
     def popFirst(self, price: Optional[float]):
         if price == None:
             return None
-        return self._pop(self.getQueue(price))
+        order_queue = self.getQueue(price)
+        if order_queue is None:
+            return None
+        order = self._pop(order_queue)
+        if len(order_queue) == 0:
+            self.orders.delete(order_queue.node)
+        elif self.augmented:
+            self.orders.updateAggregates(order_queue.node)
+        if self.feed is not None:
+            self.feed.levelChanged(self.side, order_queue.price, order_queue.qty, order_queue.count)
+        return order
 
     def peekFirst(self, price: Optional[float]):
         if price == None:
@@ -193,12 +574,103 @@ class OrderBook(IOrderBook):
         return self._peek(self.getQueue(price))
 
     def getSize(self) -> int:
-        """ Retorna o tamanho do livro. """
-        size = 0
-        for price_node in self.orders.traverse(self.orders.root):
-            size += len(price_node.data)
-        return size
+        """ Retorna o número de ordens no livro. """
+        return self.size
+
+    def getTotalQty(self) -> int:
+        """ Retorna a quantidade total do livro. """
+        return self.totalQty
+
+    def getLevelQty(self, price: float) -> int:
+        """ Retorna a quantidade total do nível de preço. """
+        order_queue = self.getQueue(price)
+        if order_queue is None:
+            return 0
+        return order_queue.qty
 
+    def getLevelSize(self, price: float) -> int:
+        """ Retorna o número de ordens do nível de preço. """
+        order_queue = self.getQueue(price)
+        if order_queue is None:
+            return 0
+        return len(order_queue)
+
+
+    def _aggregatedRoot(self) -> Optional[AVLNode]:
+        if not self.augmented:
+            raise ValueError("Consulta requer um livro criado com augmented=True")
+        return self.orders.root
+
+    def liquidityUpTo(self, price: float) -> int:
+        """ Quantidade total dos níveis com preço até price (inclusivo), em O(log n). """
+        node = self._aggregatedRoot()
+        total = 0
+        while node is not None:
+            if node.key <= price:
+                # O nó e toda a subárvore esquerda estão na faixa
+                if node.left is not None:
+                    total += node.left.sumQty
+                total += node.data.qty
+                node = node.right
+            else:
+                node = node.left
+        return total
+
+    def liquidityDownTo(self, price: float) -> int:
+        """ Quantidade total dos níveis com preço a partir de price (inclusivo), em O(log n). """
+        node = self._aggregatedRoot()
+        total = 0
+        while node is not None:
+            if node.key >= price:
+                if node.right is not None:
+                    total += node.right.sumQty
+                total += node.data.qty
+                node = node.left
+            else:
+                node = node.right
+        return total
+
+    def costFromMin(self, qty: int, maxPrice: float = math.inf) -> Tuple[int, float]:
+        """
+            Custo de abater qty a partir do menor preço, até maxPrice, sem alterar o livro.
+            Retorna (quantidade preenchível, valor financeiro); o preço médio é valor / quantidade.
+        """
+        if maxPrice != math.inf:
+            qty = min(qty, self.liquidityUpTo(maxPrice))
+        return self._cost(qty, 'left', 'right')
+
+    def costFromMax(self, qty: int, minPrice: float = -math.inf) -> Tuple[int, float]:
+        """
+            Custo de abater qty a partir do maior preço, até minPrice, sem alterar o livro.
+            Retorna (quantidade preenchível, valor financeiro); o preço médio é valor / quantidade.
+        """
+        if minPrice != -math.inf:
+            qty = min(qty, self.liquidityDownTo(minPrice))
+        return self._cost(qty, 'right', 'left')
+
+    def _cost(self, qty: int, near: str, far: str) -> Tuple[int, float]:
+        """ Desce a árvore consumindo primeiro a subárvore do lado near (melhores preços). """
+        node = self._aggregatedRoot()
+        remaining = qty
+        notional = 0
+        while node is not None and remaining > 0:
+            nearNode = getattr(node, near)
+            nearQty = nearNode.sumQty if nearNode is not None else 0
+            if remaining <= nearQty:
+                node = nearNode
+                continue
+            if nearNode is not None:
+                notional += nearNode.sumNotional
+            remaining -= nearQty
+            levelQty = node.data.qty
+            if remaining <= levelQty:
+                notional += remaining * node.key
+                remaining = 0
+                break
+            notional += levelQty * node.key
+            remaining -= levelQty
+            node = getattr(node, far)
+        return qty - remaining, notional
 
     def __str__(self):
-        return "\n".join(map(lambda node: str(node.key), self.orders.traverse(self.orders.root)))
+        return "\n".join(map(lambda node: str(node.key), self.orders.iterRange()))
@@ -0,0 +1,477 @@
+from typing import Any, Iterable, Iterator, List, Optional, Tuple, Union
+from dataclasses import dataclass
+from bisect import bisect_left, bisect_right
+
+
+@dataclass(slots=True)
+class MapEntry:
+    """ Entrada de SortedArrayMap, com a mesma interface de AVLNode usada pelo livro. """
+    key: Any
+    data: Optional[Any] = None
+
+
+class SortedArrayMap:
+    """
+        Mapa ordenado em dois vetores paralelos (chaves e entradas), com busca
+        por bisect. Os vetores ficam contíguos na memória e sem ponteiros por nó,
+        mas inserir ou remover no meio desloca os elementos seguintes.
+
+        O melhor preço fica no fim do vetor, onde remover é O(1): em ordem
+        crescente (maior chave no fim, livro de compra) ou, com reverse, em
+        ordem decrescente (menor chave no fim, livro de venda). Com reverse as
+        chaves são guardadas negadas, então precisam ser numéricas.
+
+        Expõe a mesma interface de AVLTree usada pelo OrderBook: get, insert,
+        delete, minNode, maxNode, getSuccessor, getPredecessor, iterRange e fromSorted.
+    """
+    nodeClass = MapEntry
+
+    def __init__(self, reverse: bool = False):
+        self.reverse = reverse
+        # Chaves em ordem crescente de armazenamento (negadas com reverse)
+        self.keys: List[Any] = []
+        self.entries: List[MapEntry] = []
+
+    @classmethod
+    def fromSorted(cls, pairs: Iterable[Tuple[Any, Any]], reverse: bool = False) -> 'SortedArrayMap':
+        """ Constrói o mapa a partir de pares (chave, dado) em ordem estritamente crescente de chave, em O(n). """
+        tree = cls(reverse)
+        entries = [cls.nodeClass(key=key, data=data) for key, data in pairs]
+        for i in range(1, len(entries)):
+            if not entries[i - 1].key < entries[i].key:
+                raise ValueError(f"Chaves fora de ordem: <{entries[i - 1].key}>, <{entries[i].key}>")
+        if reverse:
+            entries.reverse()
+            tree.keys = [-entry.key for entry in entries]
+        else:
+            tree.keys = [entry.key for entry in entries]
+        tree.entries = entries
+        return tree
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _position(self, entry: MapEntry) -> int:
+        i = bisect_left(self.keys, -entry.key if self.reverse else entry.key)
+        if i == len(self.entries) or self.entries[i] is not entry:
+            raise KeyError(entry.key)
+        return i
+
+    @property
+    def minNode(self) -> Optional[MapEntry]:
+        if not self.entries:
+            return None
+        return self.entries[-1] if self.reverse else self.entries[0]
+
+    @property
+    def maxNode(self) -> Optional[MapEntry]:
+        if not self.entries:
+            return None
+        return self.entries[0] if self.reverse else self.entries[-1]
+
+    def get(self, key: Any) -> Optional[MapEntry]:
+        keys = self.keys
+        stored = -key if self.reverse else key
+        # O melhor preço, no fim, é o mais consultado
+        if keys and keys[-1] == stored:
+            return self.entries[-1]
+        i = bisect_left(keys, stored)
+        if i < len(keys) and keys[i] == stored:
+            return self.entries[i]
+        return None
+
+    def insert(self, insert_node: MapEntry) -> None:
+        keys = self.keys
+        stored = -insert_node.key if self.reverse else insert_node.key
+        if not keys or stored > keys[-1]:
+            keys.append(stored)
+            self.entries.append(insert_node)
+            return
+        i = bisect_left(keys, stored)
+        if keys[i] == stored:
+            return
+        keys.insert(i, stored)
+        self.entries.insert(i, insert_node)
+
+    def delete(self, node: MapEntry) -> None:
+        entries = self.entries
+        if entries and entries[-1] is node:
+            # Melhor preço: O(1)
+            entries.pop()
+            self.keys.pop()
+            return
+        i = self._position(node)
+        del entries[i]
+        del self.keys[i]
+
+    def _step(self, node: MapEntry, offset: int) -> Optional[MapEntry]:
+        i = self._position(node) + offset
+        if 0 <= i < len(self.entries):
+            return self.entries[i]
+        return None
+
+    def getSuccessor(self, node: MapEntry) -> Optional[MapEntry]:
+        return self._step(node, -1 if self.reverse else 1)
+
+    def getPredecessor(self, node: MapEntry) -> Optional[MapEntry]:
+        return self._step(node, 1 if self.reverse else -1)
+
+    def iterRange(self, low: Any = None, high: Any = None, reverse: bool = False) -> Iterator[MapEntry]:
+        """
+            Entradas com low <= chave <= high (None: sem limite), em ordem
+            crescente, ou decrescente com reverse. A entrada entregue pode ser
+            removida durante a iteração.
+        """
+        keys = self.keys
+        entries = self.entries
+        # Em armazenamento: faixa [start, stop) e direção
+        if self.reverse:
+            low, high = (None if high is None else -high), (None if low is None else -low)
+            reverse = not reverse
+        start = 0 if low is None else bisect_left(keys, low)
+        stop = len(keys) if high is None else bisect_right(keys, high)
+        if not reverse:
+            # Se a entrada entregue foi removida, a próxima ocupa a mesma posição
+            i = start
+            while i < stop:
+                entry = entries[i]
+                yield entry
+                if i < len(entries) and entries[i] is entry:
+                    i += 1
+                else:
+                    stop -= 1
+        else:
+            # Remoções só deslocam posições já visitadas
+            i = min(stop, len(entries)) - 1
+            while i >= start:
+                yield entries[i]
+                i -= 1
+
+
+class _Leaf:
+    """ Folha da BTreeMap: chaves e entradas ordenadas, ligada às folhas vizinhas. """
+    __slots__ = ('keys', 'entries', 'prev', 'next')
+
+    def __init__(self, keys: List[Any], entries: List['BTreeEntry']):
+        self.keys = keys
+        self.entries = entries
+        self.prev: Optional[_Leaf] = None
+        self.next: Optional[_Leaf] = None
+        for entry in entries:
+            entry.leaf = self
+
+
+class _Inner:
+    """ Nó interno: children[i] tem as chaves < keys[i], e children[i + 1] as >= keys[i]. """
+    __slots__ = ('keys', 'children')
+
+    def __init__(self, keys: List[Any], children: List[Union['_Inner', _Leaf]]):
+        self.keys = keys
+        self.children = children
+
+
+@dataclass(slots=True)
+class BTreeEntry:
+    """ Entrada de BTreeMap, com a mesma interface de AVLNode usada pelo livro. """
+    key: Any
+    data: Optional[Any] = None
+    # Folha que contém a entrada, para sucessor e predecessor sem busca
+    leaf: Optional[_Leaf] = None
+
+
+def _groups(items: list, order: int) -> List[list]:
+    """ Divide items em grupos de tamanho parecido, com no máximo order elementos cada. """
+    n = len(items)
+    count = max(1, -(-n // order))
+    size, extra = divmod(n, count)
+    groups = []
+    start = 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        groups.append(items[start:end])
+        start = end
+    return groups
+
+
+class BTreeMap:
+    """
+        Mapa ordenado em B+ tree de nós largos: as entradas ficam em folhas
+        com até order chaves num vetor, ligadas em lista, e os nós internos
+        guardam só chaves separadoras. A altura é log(n) na base order, e a
+        busca dentro de cada nó é um bisect sobre um vetor contíguo.
+
+        Expõe a mesma interface de AVLTree usada pelo OrderBook: get, insert,
+        delete, minNode, maxNode, getSuccessor, getPredecessor, iterRange e
+        fromSorted. As entradas mantêm identidade na remoção.
+    """
+    nodeClass = BTreeEntry
+
+    def __init__(self, order: int = 64):
+        if order < 4:
+            raise ValueError(f"Ordem da B-tree deve ser ao menos 4: <{order}>")
+        self.order = order
+        self.root: Union[_Inner, _Leaf] = _Leaf([], [])
+        # Primeira e última folhas, para os extremos em O(1)
+        self.head = self.tail = self.root
+        self.size = 0
+
+    @classmethod
+    def fromSorted(cls, pairs: Iterable[Tuple[Any, Any]], order: int = 64) -> 'BTreeMap':
+        """ Constrói a árvore a partir de pares (chave, dado) em ordem estritamente crescente de chave, em O(n). """
+        tree = cls(order)
+        entries = [cls.nodeClass(key=key, data=data) for key, data in pairs]
+        for i in range(1, len(entries)):
+            if not entries[i - 1].key < entries[i].key:
+                raise ValueError(f"Chaves fora de ordem: <{entries[i - 1].key}>, <{entries[i].key}>")
+        if not entries:
+            return tree
+
+        leaves = [_Leaf([entry.key for entry in group], group) for group in _groups(entries, order)]
+        for left, right in zip(leaves, leaves[1:]):
+            left.next = right
+            right.prev = left
+        tree.head = leaves[0]
+        tree.tail = leaves[-1]
+        tree.size = len(entries)
+
+        # Menor chave de cada nó do nível, usada como separadora no nível de cima
+        level = leaves
+        minKeys = [leaf.keys[0] for leaf in leaves]
+        while len(level) > 1:
+            nextLevel = []
+            nextMinKeys = []
+            start = 0
+            for group in _groups(level, order + 1):
+                end = start + len(group)
+                nextLevel.append(_Inner(minKeys[start + 1:end], group))
+                nextMinKeys.append(minKeys[start])
+                start = end
+            level = nextLevel
+            minKeys = nextMinKeys
+        tree.root = level[0]
+        return tree
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def minNode(self) -> Optional[BTreeEntry]:
+        entries = self.head.entries
+        return entries[0] if entries else None
+
+    @property
+    def maxNode(self) -> Optional[BTreeEntry]:
+        entries = self.tail.entries
+        return entries[-1] if entries else None
+
+    def _findLeaf(self, key: Any) -> _Leaf:
+        node = self.root
+        while type(node) is _Inner:
+            node = node.children[bisect_right(node.keys, key)]
+        return node
+
+    def get(self, key: Any) -> Optional[BTreeEntry]:
+        leaf = self._findLeaf(key)
+        keys = leaf.keys
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return leaf.entries[i]
+        return None
+
+    def insert(self, insert_node: BTreeEntry) -> None:
+        key = insert_node.key
+        # Caminho da raiz até a folha: (nó interno, índice do filho)
+        path = []
+        node = self.root
+        while type(node) is _Inner:
+            i = bisect_right(node.keys, key)
+            path.append((node, i))
+            node = node.children[i]
+        leaf = node
+        i = bisect_left(leaf.keys, key)
+        if i < len(leaf.keys) and leaf.keys[i] == key:
+            return
+        leaf.keys.insert(i, key)
+        leaf.entries.insert(i, insert_node)
+        insert_node.leaf = leaf
+        self.size += 1
+        if len(leaf.keys) <= self.order:
+            return
+
+        # Folha cheia: metade de cima vai para uma folha nova, à direita
+        mid = len(leaf.keys) // 2
+        right = _Leaf(leaf.keys[mid:], leaf.entries[mid:])
+        del leaf.keys[mid:]
+        del leaf.entries[mid:]
+        right.prev = leaf
+        right.next = leaf.next
+        if leaf.next is not None:
+            leaf.next.prev = right
+        else:
+            self.tail = right
+        leaf.next = right
+        separator = right.keys[0]
+        newNode = right
+
+        # Sobe a separadora, dividindo os nós internos cheios
+        while path:
+            parent, i = path.pop()
+            parent.keys.insert(i, separator)
+            parent.children.insert(i + 1, newNode)
+            if len(parent.children) <= self.order + 1:
+                return
+            mid = len(parent.keys) // 2
+            separator = parent.keys[mid]
+            newNode = _Inner(parent.keys[mid + 1:], parent.children[mid + 1:])
+            del parent.keys[mid:]
+            del parent.children[mid + 1:]
+        self.root = _Inner([separator], [self.root, newNode])
+
+    def delete(self, node: BTreeEntry) -> None:
+        key = node.key
+        path = []
+        current = self.root
+        while type(current) is _Inner:
+            i = bisect_right(current.keys, key)
+            path.append((current, i))
+            current = current.children[i]
+        leaf = current
+        i = bisect_left(leaf.keys, key)
+        if i == len(leaf.keys) or leaf.entries[i] is not node:
+            raise KeyError(key)
+        del leaf.keys[i]
+        del leaf.entries[i]
+        node.leaf = None
+        self.size -= 1
+
+        minKeys = self.order // 2
+        current = leaf
+        while path:
+            parent, i = path.pop()
+            if type(current) is _Leaf:
+                if len(current.keys) >= minKeys:
+                    return
+                self._fixLeaf(parent, i, minKeys)
+            else:
+                if len(current.children) >= minKeys:
+                    return
+                self._fixInner(parent, i, minKeys)
+            current = parent
+
+        # Raiz interna com um só filho perde um nível
+        if type(self.root) is _Inner and len(self.root.children) == 1:
+            self.root = self.root.children[0]
+
+    def _fixLeaf(self, parent: _Inner, i: int, minKeys: int) -> None:
+        """ Completa a folha parent.children[i] com a vizinha, ou junta as duas. """
+        leaf = parent.children[i]
+        if i > 0 and len(parent.children[i - 1].keys) > minKeys:
+            left = parent.children[i - 1]
+            entry = left.entries.pop()
+            leaf.keys.insert(0, left.keys.pop())
+            leaf.entries.insert(0, entry)
+            entry.leaf = leaf
+            parent.keys[i - 1] = leaf.keys[0]
+        elif i + 1 < len(parent.children) and len(parent.children[i + 1].keys) > minKeys:
+            right = parent.children[i + 1]
+            entry = right.entries.pop(0)
+            leaf.keys.append(right.keys.pop(0))
+            leaf.entries.append(entry)
+            entry.leaf = leaf
+            parent.keys[i] = right.keys[0]
+        else:
+            if i > 0:
+                left, right, separator = parent.children[i - 1], leaf, i - 1
+            else:
+                left, right, separator = leaf, parent.children[i + 1], i
+            for entry in right.entries:
+                entry.leaf = left
+            left.keys.extend(right.keys)
+            left.entries.extend(right.entries)
+            left.next = right.next
+            if right.next is not None:
+                right.next.prev = left
+            else:
+                self.tail = left
+            del parent.keys[separator]
+            del parent.children[separator + 1]
+
+    def _fixInner(self, parent: _Inner, i: int, minChildren: int) -> None:
+        """ Completa o nó interno parent.children[i] com o vizinho, ou junta os dois. """
+        node = parent.children[i]
+        if i > 0 and len(parent.children[i - 1].children) > minChildren:
+            left = parent.children[i - 1]
+            node.keys.insert(0, parent.keys[i - 1])
+            node.children.insert(0, left.children.pop())
+            parent.keys[i - 1] = left.keys.pop()
+        elif i + 1 < len(parent.children) and len(parent.children[i + 1].children) > minChildren:
+            right = parent.children[i + 1]
+            node.keys.append(parent.keys[i])
+            node.children.append(right.children.pop(0))
+            parent.keys[i] = right.keys.pop(0)
+        else:
+            if i > 0:
+                left, right, separator = parent.children[i - 1], node, i - 1
+            else:
+                left, right, separator = node, parent.children[i + 1], i
+            left.keys.append(parent.keys[separator])
+            left.keys.extend(right.keys)
+            left.children.extend(right.children)
+            del parent.keys[separator]
+            del parent.children[separator + 1]
+
+    def getSuccessor(self, node: BTreeEntry) -> Optional[BTreeEntry]:
+        leaf = node.leaf
+        i = bisect_right(leaf.keys, node.key)
+        if i < len(leaf.entries):
+            return leaf.entries[i]
+        leaf = leaf.next
+        return leaf.entries[0] if leaf is not None else None
+
+    def getPredecessor(self, node: BTreeEntry) -> Optional[BTreeEntry]:
+        leaf = node.leaf
+        i = bisect_left(leaf.keys, node.key) - 1
+        if i >= 0:
+            return leaf.entries[i]
+        leaf = leaf.prev
+        return leaf.entries[-1] if leaf is not None else None
+
+    def iterRange(self, low: Any = None, high: Any = None, reverse: bool = False) -> Iterator[BTreeEntry]:
+        """
+            Entradas com low <= chave <= high (None: sem limite), em ordem
+            crescente, ou decrescente com reverse. A entrada entregue pode ser
+            removida durante a iteração.
+        """
+        if not reverse:
+            if low is None:
+                node = self.minNode
+            else:
+                node = None
+                leaf = self._findLeaf(low)
+                i = bisect_left(leaf.keys, low)
+                if i < len(leaf.entries):
+                    node = leaf.entries[i]
+                elif leaf.next is not None:
+                    node = leaf.next.entries[0]
+            getNext = self.getSuccessor
+            while node is not None and (high is None or node.key <= high):
+                # Entradas mantêm identidade na remoção, então a próxima continua válida
+                next_node = getNext(node)
+                yield node
+                node = next_node
+        else:
+            if high is None:
+                node = self.maxNode
+            else:
+                node = None
+                leaf = self._findLeaf(high)
+                i = bisect_right(leaf.keys, high) - 1
+                if i >= 0:
+                    node = leaf.entries[i]
+                elif leaf.prev is not None:
+                    node = leaf.prev.entries[-1]
+            getNext = self.getPredecessor
+            while node is not None and (low is None or node.key >= low):
+                next_node = getNext(node)
+                yield node
+                node = next_node
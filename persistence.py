@@ -0,0 +1,247 @@
+from typing import Iterator, List, Optional
+from contextlib import contextmanager
+from order import Order, OrderSide, OrderType
+from orderbook import OrderPriorityQueue
+from matching_engine import MatchingEngine, TradingPhase
+from binary_protocol import (MSG_LIMIT, MSG_MARKET, MSG_CANCEL, MSG_AMEND, MSG_AUCTION, MSG_UNCROSS, MSG_STOP, RECORD,
+                             SIDES, dispatch, encode, encodeOrder)
+import itertools
+import os
+import struct
+
+# Cabeçalho do snapshot: identificador, posição no journal (em registros),
+# próximo id de ordem e número de registros. Seguem as ordens em livro como
+# registros MSG_LIMIT de binary_protocol, por lado e em ordem de prioridade,
+# e as ordens stop guardadas, como em encodeOrder (prefixo MSG_STOP e a ordem).
+SNAPSHOT_MAGIC = b'MESNAP01'
+SNAPSHOT_HEADER = struct.Struct('<8sqqq')
+
+
+class Journal:
+    """
+        Journal append-only das mensagens aceitas pelo engine, no formato de
+        binary_protocol (preços e quantidades inteiros, como no modo de ponto fixo).
+
+        As mensagens são gravadas antes de serem processadas, e as escritas são
+        agrupadas (group commit): um write (e um fsync) a cada groupSize
+        mensagens, ou em commit(). Com snapshotPath e snapshotEvery, um snapshot
+        dos livros é gravado a cada snapshotEvery mensagens, o que limita o
+        trecho do journal reproduzido na recuperação.
+    """
+    def __init__(self, path: str, groupSize: int = 256, fsync: bool = True,
+                 snapshotPath: Optional[str] = None, snapshotEvery: int = 0):
+        self.path = path
+        self.groupSize = groupSize
+        self.fsync = fsync
+        self.snapshotPath = snapshotPath
+        self.snapshotEvery = snapshotEvery
+        self.engine: Optional[MatchingEngine] = None
+        self.file = open(path, 'ab')
+        size = self.file.seek(0, 2)
+        # Descarta um registro incompleto (queda durante a escrita)
+        if size % RECORD.size != 0:
+            size -= size % RECORD.size
+            self.file.truncate(size)
+        # e um prefixo MSG_STOP sem a ordem, que valeria para a próxima ordem gravada
+        if size and self._lastType(size) == MSG_STOP:
+            size -= RECORD.size
+            self.file.truncate(size)
+        # Número de mensagens no journal, incluindo as ainda não gravadas
+        self.offset = size // RECORD.size
+        self.sinceSnapshot = 0
+        self._buffer: List[bytes] = []
+
+    def _lastType(self, size: int) -> int:
+        with open(self.path, 'rb') as f:
+            f.seek(size - RECORD.size)
+            return f.read(1)[0]
+
+    def attach(self, engine: MatchingEngine):
+        self.engine = engine
+
+    def append(self, record: bytes):
+        """ Acrescenta uma mensagem (um ou mais registros, gravados sempre juntos). """
+        if (self.snapshotEvery and self.sinceSnapshot >= self.snapshotEvery
+                and self.engine.phase == TradingPhase.CONTINUOUS):
+            # O estado dos livros ainda não inclui a mensagem nova.
+            # Durante o leilão o snapshot fica para depois do uncross.
+            self.checkpoint()
+        self._buffer.append(record)
+        self.offset += len(record) // RECORD.size
+        self.sinceSnapshot += 1
+        if len(self._buffer) >= self.groupSize:
+            self.commit()
+
+    def order(self, order: Order):
+        self.append(encodeOrder(order))
+
+    def cancel(self, orderId: int):
+        self.append(encode(MSG_CANCEL, 0, orderId))
+
+    def amend(self, orderId: int, price: int, qty: int):
+        self.append(encode(MSG_AMEND, 0, orderId, price, qty))
+
+    def startAuction(self):
+        self.append(encode(MSG_AUCTION))
+
+    def uncross(self, referencePrice: Optional[int] = None):
+        if referencePrice is None:
+            self.append(encode(MSG_UNCROSS))
+        else:
+            self.append(encode(MSG_UNCROSS, 1, 0, referencePrice))
+
+    def commit(self):
+        """ Grava as mensagens pendentes numa única escrita. """
+        if self._buffer:
+            self.file.write(b"".join(self._buffer))
+            self._buffer.clear()
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+    def checkpoint(self):
+        """ Grava um snapshot dos livros na posição atual do journal. """
+        writeSnapshot(self.engine, self.snapshotPath)
+        self.sinceSnapshot = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.commit()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _peekNextId(engine: MatchingEngine) -> int:
+    nextId = next(engine.orderIds)
+    engine.orderIds = itertools.count(nextId)
+    return nextId
+
+def writeSnapshot(engine: MatchingEngine, path: str) -> None:
+    """
+        Grava os dois livros num snapshot binário. Se o engine tiver journal,
+        as mensagens pendentes são gravadas antes e o snapshot guarda a posição
+        dele. O arquivo é substituído atomicamente. O snapshot não guarda o
+        estado do leilão, então só pode ser gravado na negociação contínua.
+    """
+    if engine.phase != TradingPhase.CONTINUOUS:
+        raise ValueError("Snapshot não pode ser gravado durante o leilão")
+    offset = 0
+    if engine.journal is not None:
+        engine.journal.commit()
+        offset = engine.journal.offset
+
+    pack = RECORD.pack
+    records = []
+    for side, book in ((0, engine.buyOrderBook), (1, engine.sellOrderBook)):
+        for order in book.iterFromMin():
+            records.append(pack(MSG_LIMIT, side, order.id, order.price, order.qty))
+    for stops in (engine.buyStops, engine.sellStops):
+        for order in stops:
+            records.append(encodeOrder(order))
+
+    tmpPath = path + '.tmp'
+    with open(tmpPath, 'wb') as f:
+        data = b"".join(records)
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, offset, _peekNextId(engine), len(data) // RECORD.size))
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmpPath, path)
+
+def loadSnapshot(engine: MatchingEngine, path: str) -> int:
+    """ Carrega o snapshot nos livros (vazios) do engine. Retorna a posição do journal. """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < SNAPSHOT_HEADER.size:
+        raise ValueError(f"Snapshot inválido: <{path}>")
+    magic, offset, nextId, count = SNAPSHOT_HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC or len(data) != SNAPSHOT_HEADER.size + count * RECORD.size:
+        raise ValueError(f"Snapshot inválido: <{path}>")
+
+    # As ordens estão em ordem de preço e de prioridade: os níveis são montados
+    # direto e cada livro é construído de uma vez
+    levels = ([], [])
+    stops = []
+    LIMIT = OrderType.LIMIT
+    stopPrice = None
+    for msgType, side, orderId, price, qty in RECORD.iter_unpack(memoryview(data)[SNAPSHOT_HEADER.size:]):
+        if msgType == MSG_STOP:
+            stopPrice = price
+            continue
+        if stopPrice is not None:
+            if msgType == MSG_MARKET:
+                stops.append(Order(OrderType.STOP, SIDES[side], None, qty, orderId, stopPrice))
+            else:
+                stops.append(Order(OrderType.STOP_LIMIT, SIDES[side], price, qty, orderId, stopPrice))
+            stopPrice = None
+            continue
+        sideLevels = levels[side]
+        if not sideLevels or sideLevels[-1][0] != price:
+            order_queue = OrderPriorityQueue()
+            order_queue.price = price
+            sideLevels.append((price, order_queue))
+        sideLevels[-1][1].append(Order(LIMIT, SIDES[side], price, qty, orderId))
+    engine.buyOrderBook.load_levels(levels[0])
+    engine.sellOrderBook.load_levels(levels[1])
+    for order in stops:
+        engine._addStop(order)
+    engine.orderIds = itertools.count(nextId)
+    return offset
+
+@contextmanager
+def _muted(engine: MatchingEngine) -> Iterator[None]:
+    """
+        Desliga journal, destinos, histórico e feed do engine durante a
+        reprodução: as mensagens já estão no journal e os trades e alterações
+        de livro já foram entregues antes da queda.
+    """
+    journal, sinks, history, feed = engine.journal, engine.sinks, engine.history, engine.feed
+    engine.journal = None
+    engine.sinks = []
+    engine.history = None
+    engine.feed = None
+    if feed is not None:
+        engine.buyOrderBook.attachFeed(None, OrderSide.BUY)
+        engine.sellOrderBook.attachFeed(None, OrderSide.SELL)
+    engine._updateEmitters()
+    try:
+        yield
+    finally:
+        engine.journal = journal
+        engine.sinks = sinks
+        engine.history = history
+        engine.feed = feed
+        if feed is not None:
+            engine.buyOrderBook.attachFeed(feed, OrderSide.BUY)
+            engine.sellOrderBook.attachFeed(feed, OrderSide.SELL)
+        engine._updateEmitters()
+
+def restore(engine: MatchingEngine, snapshotPath: Optional[str] = None, journalPath: Optional[str] = None) -> int:
+    """
+        Recupera o estado: carrega o snapshot (se existir) e reproduz apenas o
+        trecho do journal posterior a ele, sem emitir trades nem alterações de
+        livro. Retorna o número de mensagens reproduzidas.
+    """
+    with _muted(engine):
+        offset = 0
+        if snapshotPath is not None and os.path.exists(snapshotPath):
+            offset = loadSnapshot(engine, snapshotPath)
+        if journalPath is None or not os.path.exists(journalPath):
+            return 0
+
+        with open(journalPath, 'rb') as f:
+            f.seek(offset * RECORD.size)
+            data = f.read()
+        data = data[:len(data) - len(data) % RECORD.size]
+        records = list(RECORD.iter_unpack(data))
+        count = dispatch(engine, records)
+
+        # Os ids reproduzidos já foram usados
+        maxId = max((record[2] for record in records if record[0] in (MSG_LIMIT, MSG_MARKET)), default=0)
+        engine.orderIds = itertools.count(max(_peekNextId(engine), maxId + 1))
+        return count
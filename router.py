@@ -0,0 +1,202 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from order import Order, OrderSide, OrderType
+from orderbook import IOrderBook, OrderBook
+from matching_engine import MatchingEngine
+from trade import Trade
+from trade_sink import CallbackSink
+from binary_protocol import MSG_LIMIT, MSG_MARKET, Record, dispatch
+import multiprocessing
+import queue
+import time
+import zlib
+
+# Mensagem roteada: (símbolo, registro no formato de binary_protocol)
+Message = Tuple[str, Record]
+# Mensagem rejeitada pelo engine: (símbolo, registro, erro)
+Reject = Tuple[str, Record, str]
+
+# Intervalo, em segundos, entre as verificações dos workers durante o flush
+FLUSH_POLL_INTERVAL = 0.1
+
+
+def orderRecord(order: Order) -> Record:
+    """ Converte uma nova ordem para registro (tipo, lado, id, preço, quantidade). """
+    if order.type >= OrderType.STOP:
+        # Ocupariam dois registros, e o worker despacha um registro por vez
+        raise ValueError("Ordens stop não são suportadas pelo roteador")
+    if order.type == OrderType.MARKET:
+        return (MSG_MARKET, int(order.side), order.id or 0, 0, order.qty)
+    return (MSG_LIMIT, int(order.side), order.id or 0, order.price, order.qty)
+
+
+def _makeOrderBook(side: OrderSide) -> IOrderBook:
+    """ Livro padrão dos engines roteados. """
+    return OrderBook(side=side)
+
+
+class _Shard:
+    """ Conjunto de engines (um por símbolo) de um worker. """
+    def __init__(self, bookFactory: Callable[[OrderSide], IOrderBook]):
+        self.bookFactory = bookFactory
+        self.engines: Dict[str, MatchingEngine] = {}
+        self.trades: Dict[str, List[Trade]] = {}
+
+    def _getEngine(self, symbol: str) -> MatchingEngine:
+        engine = self.engines.get(symbol)
+        if engine is None:
+            trades = self.trades[symbol] = []
+            # O lado orienta alguns mapas de níveis (sorted-array guarda o melhor preço no fim)
+            engine = MatchingEngine(self.bookFactory(OrderSide.BUY), self.bookFactory(OrderSide.SELL),
+                                    history=None, sinks=[CallbackSink(trades.append)])
+            self.engines[symbol] = engine
+        return engine
+
+    def process(self, batch: List[Message]) -> Tuple[List[Tuple[str, List[Trade]]], List[Reject]]:
+        """
+            Processa um lote e retorna os trades gerados, por símbolo, em ordem,
+            e as mensagens rejeitadas. Um erro numa mensagem não interrompe o lote.
+        """
+        getEngine = self._getEngine
+        rejects = []
+        for symbol, record in batch:
+            try:
+                dispatch(getEngine(symbol), (record,))
+            except Exception as e:
+                rejects.append((symbol, record, str(e) or type(e).__name__))
+
+        results = []
+        for symbol, trades in self.trades.items():
+            if trades:
+                results.append((symbol, trades[:]))
+                trades.clear()
+        return results, rejects
+
+
+def _runWorker(workerId: int, inbox, outbox, bookFactory: Callable[[OrderSide], IOrderBook]):
+    shard = _Shard(bookFactory)
+    while True:
+        batch = inbox.get()
+        if batch is None:
+            return
+        outbox.put((workerId, shard.process(batch)))
+
+
+class SymbolRouter:
+    """
+        Roteia mensagens de vários símbolos para um pool de processos. Cada
+        símbolo fica fixo num worker (hash estável do símbolo), que mantém um
+        MatchingEngine por símbolo. As mensagens são enviadas em lotes, e os
+        trades voltam agrupados por símbolo, na ordem em que ocorreram.
+
+        Com numWorkers=0 tudo roda no próprio processo. bookFactory recebe
+        o lado (OrderSide) do livro a criar.
+        Ordens sem id recebem ids sequenciais por símbolo, a partir de 1.
+        Mensagens rejeitadas pelo engine ficam em rejects após o flush.
+    """
+    def __init__(self, numWorkers: Optional[int] = None, bookFactory: Callable[[OrderSide], IOrderBook] = _makeOrderBook,
+                 batchSize: int = 4096):
+        if numWorkers is None:
+            numWorkers = multiprocessing.cpu_count()
+        self.numWorkers = numWorkers
+        self.batchSize = batchSize
+        self._localShard = _Shard(bookFactory) if numWorkers == 0 else None
+        self._localResults = []
+        # Mensagens rejeitadas no último flush
+        self.rejects: List[Reject] = []
+        self._buffers: List[List[Message]] = [[] for _ in range(max(numWorkers, 1))]
+        # Lotes enviados a cada worker ainda sem resposta
+        self._pending = [0] * max(numWorkers, 1)
+        self._inboxes = []
+        self._workers = []
+        if numWorkers > 0:
+            self._outbox = multiprocessing.Queue()
+            for workerId in range(numWorkers):
+                inbox = multiprocessing.Queue()
+                worker = multiprocessing.Process(target=_runWorker, args=(workerId, inbox, self._outbox, bookFactory),
+                                                 daemon=True)
+                worker.start()
+                self._inboxes.append(inbox)
+                self._workers.append(worker)
+
+    def workerOf(self, symbol: str) -> int:
+        """ Worker responsável pelo símbolo (estável entre processos e execuções). """
+        if self.numWorkers == 0:
+            return 0
+        return zlib.crc32(symbol.encode()) % self.numWorkers
+
+    def submit(self, symbol: str, record: Record):
+        """ Enfileira uma mensagem; o lote do worker é enviado ao atingir batchSize. """
+        workerId = self.workerOf(symbol)
+        buffer = self._buffers[workerId]
+        buffer.append((symbol, record))
+        if len(buffer) >= self.batchSize:
+            self._send(workerId)
+
+    def order(self, symbol: str, order: Order):
+        self.submit(symbol, orderRecord(order))
+
+    def _send(self, workerId: int):
+        batch = self._buffers[workerId]
+        if not batch:
+            return
+        self._buffers[workerId] = []
+        self._pending[workerId] += 1
+        if self._localShard is not None:
+            self._localResults.append(self._localShard.process(batch))
+        else:
+            self._inboxes[workerId].put(batch)
+
+    def flush(self, timeout: Optional[float] = None) -> Dict[str, List[Trade]]:
+        """
+            Envia os lotes pendentes e espera os resultados. Retorna os trades por
+            símbolo. Levanta RuntimeError se um worker com lotes pendentes morrer,
+            e TimeoutError se os resultados não chegarem em timeout segundos.
+        """
+        for workerId in range(len(self._buffers)):
+            self._send(workerId)
+
+        merged: Dict[str, List[Trade]] = {}
+        if self._localShard is not None:
+            results = self._localResults
+            self._localResults = []
+            self._pending[0] = 0
+        else:
+            results = []
+            deadline = None if timeout is None else time.monotonic() + timeout
+            # Cada worker responde seus lotes em ordem, e cada símbolo é de um só worker
+            while any(self._pending):
+                try:
+                    workerId, result = self._outbox.get(timeout=FLUSH_POLL_INTERVAL)
+                except queue.Empty:
+                    self._checkWorkers(deadline)
+                    continue
+                self._pending[workerId] -= 1
+                results.append(result)
+
+        self.rejects = []
+        for result, rejects in results:
+            for symbol, trades in result:
+                merged.setdefault(symbol, []).extend(trades)
+            self.rejects.extend(rejects)
+        return merged
+
+    def _checkWorkers(self, deadline: Optional[float]):
+        for workerId, worker in enumerate(self._workers):
+            if self._pending[workerId] and not worker.is_alive():
+                raise RuntimeError(f"Worker {workerId} terminou com lotes pendentes (exitcode {worker.exitcode})")
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError("Tempo esgotado esperando os resultados dos workers")
+
+    def close(self):
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._inboxes = []
+        self._workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
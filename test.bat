@@ -1,3 +1,16 @@
 python -m tests.test_avl_tree --verbose
+python -m tests.test_ordered_map --verbose
 python -m tests.test_orderbook --verbose
+python -m tests.test_ladder_orderbook --verbose
+python -m tests.test_trigger_book --verbose
 python -m tests.test_matching_engine --verbose
+python -m tests.test_fixed_point --verbose
+python -m tests.test_main --verbose
+python -m tests.test_binary_protocol --verbose
+python -m tests.test_trade_sink --verbose
+python -m tests.test_market_data --verbose
+python -m tests.test_router --verbose
+python -m tests.test_gateway --verbose
+python -m tests.test_persistence --verbose
+python -m tests.test_benchmarks --verbose
+python -m tests.test_instrumentation --verbose
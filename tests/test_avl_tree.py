@@ -1,4 +1,5 @@
 import unittest
+import random
 from avl_tree import AVLTree, AVLNode
 
 class TestAVLTree(unittest.TestCase):
@@ -162,6 +163,131 @@ class TestAVLTree(unittest.TestCase):
         self.assertEqual(avl.get(node.key), node, "Não retorna nó com key (0,1.5).")
         self.assertEqual(avl.get(avl.root.key), avl.root, "Não retorna raiz da árvore.")
         self.assertEqual(avl.get((1,-1)), None, "Não retorna None se não encontrar nó com key (1,-1).")
+    def _checkBalanced(self, avl: AVLTree, node: AVLNode) -> int:
+        """ Verifica balanceamento e ponteiros parent, retornando a altura. """
+        if node is None:
+            return 0
+        if node.left is not None:
+            self.assertIs(node.left.parent, node)
+        if node.right is not None:
+            self.assertIs(node.right.parent, node)
+        left = self._checkBalanced(avl, node.left)
+        right = self._checkBalanced(avl, node.right)
+        self.assertLessEqual(abs(left - right), 1, f"Nó {node.key} desbalanceado.")
+        self.assertEqual(node.height, max(left, right) + 1)
+        return max(left, right) + 1
+
+    def test_min_max_cache(self):
+        avl = AVLTree()
+        self.assertIsNone(avl.minNode)
+        nodes = {}
+        for key in [5, 3, 8, 1, 9]:
+            nodes[key] = AVLNode(key=key)
+            avl.insert(nodes[key])
+        self.assertIs(avl.minNode, nodes[1])
+        self.assertIs(avl.maxNode, nodes[9])
+
+        avl.delete(nodes[1])
+        avl.delete(nodes[9])
+        self.assertIs(avl.minNode, nodes[3], "Mínimo não avança para o sucessor.")
+        self.assertIs(avl.maxNode, nodes[8], "Máximo não recua para o predecessor.")
+
+        for key in [3, 5, 8]:
+            avl.delete(nodes[key])
+        self.assertIsNone(avl.minNode)
+        self.assertIsNone(avl.maxNode)
+        self.assertIsNone(avl.root)
+
+    def test_delete_rebalance(self):
+        rng = random.Random(42)
+        avl = AVLTree()
+        nodes = {}
+        for key in rng.sample(range(1000), 300):
+            nodes[key] = AVLNode(key=key)
+            avl.insert(nodes[key])
+
+        # Remove sempre pela ponta, como os preenchimentos de um livro
+        for key in sorted(nodes)[:250]:
+            avl.delete(nodes.pop(key))
+            self._checkBalanced(avl, avl.root)
+        self.assertEqual(avl.minNode.key, min(nodes))
+        self.assertEqual(avl.maxNode.key, max(nodes))
+        self.assertEqual([node.key for node in avl.traverse(avl.root)], sorted(nodes))
+
+        # Remove o restante em ordem aleatória, incluindo nós internos
+        for key in rng.sample(sorted(nodes), len(nodes)):
+            avl.delete(nodes.pop(key))
+            self._checkBalanced(avl, avl.root)
+            self.assertEqual([node.key for node in avl.traverse(avl.root)], sorted(nodes))
+
+    def test_fromSorted(self):
+        for n in (0, 1, 2, 7, 100, 1023):
+            avl = AVLTree.fromSorted((key, str(key)) for key in range(n))
+            self.assertEqual([(node.key, node.data) for node in avl.traverse(avl.root)],
+                             [(key, str(key)) for key in range(n)])
+            if n == 0:
+                self.assertIsNone(avl.root)
+                continue
+            self._checkBalanced(avl, avl.root)
+            self.assertIsNone(avl.root.parent)
+            for node in avl.traverse(avl.root):
+                for child in (node.left, node.right):
+                    if child is not None:
+                        self.assertIs(child.parent, node, "Pai do nó incorreto.")
+            self.assertEqual(avl.minNode.key, 0)
+            self.assertEqual(avl.maxNode.key, n - 1)
+
+        # A árvore construída continua válida para inserções e remoções
+        avl = AVLTree.fromSorted((key, None) for key in range(0, 200, 2))
+        avl.insert(AVLNode(key=51))
+        avl.delete(avl.get(0))
+        avl.delete(avl.get(100))
+        self._checkBalanced(avl, avl.root)
+        self.assertEqual(avl.minNode.key, 2)
+
+        with self.assertRaises(ValueError):
+            AVLTree.fromSorted([(2, None), (1, None)])
+
+
+    def test_iterRange(self):
+        rng = random.Random(3)
+        keys = rng.sample(range(2000), 500)
+        avl = AVLTree()
+        for key in keys:
+            avl.insert(AVLNode(key=key))
+        keys.sort()
+
+        for _ in range(50):
+            low, high = sorted(rng.sample(range(-10, 2010), 2))
+            expected = [key for key in keys if low <= key <= high]
+            self.assertEqual([node.key for node in avl.iterRange(low, high)], expected, "Faixa crescente incorreta.")
+            self.assertEqual([node.key for node in avl.iterRange(low, high, reverse=True)], expected[::-1])
+        self.assertEqual([node.key for node in avl.iterRange()], keys)
+        self.assertEqual([node.key for node in avl.iterRange(high=keys[2])], keys[:3])
+        self.assertEqual([node.key for node in avl.iterRange(low=keys[-2], reverse=True)], keys[:-3:-1])
+        self.assertEqual(avl.ceilingNode(keys[10] + 0.5).key, keys[11])
+        self.assertEqual(avl.floorNode(keys[10] + 0.5).key, keys[10])
+        self.assertIsNone(avl.ceilingNode(keys[-1] + 1))
+        self.assertIsNone(avl.floorNode(keys[0] - 1))
+
+        # Termina no limite, sem percorrer o resto da árvore
+        calls = []
+        getSuccessor = avl.getSuccessor
+        avl.getSuccessor = lambda node: calls.append(node) or getSuccessor(node)
+        self.assertEqual(len(list(avl.iterRange(keys[100], keys[104]))), 5)
+        self.assertEqual(len(calls), 5)
+        del avl.getSuccessor
+
+        # O nó entregue pode ser removido durante a iteração
+        for node in avl.iterRange(keys[0], keys[249]):
+            avl.delete(node)
+        self.assertEqual([node.key for node in avl.traverse(avl.root)], keys[250:])
+        self._checkBalanced(avl, avl.root)
+
+    def test_traverse_deep(self):
+        avl = AVLTree.fromSorted((key, None) for key in range(100000))
+        self.assertEqual(sum(1 for _ in avl.traverse(avl.root)), 100000)
+        self.assertEqual(list(avl.traverse(None)), [])
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from benchmarks.order_flow import PROFILES, generate
+from benchmarks import run
+from binary_protocol import MSG_CANCEL, dispatch
+from matching_engine import MatchingEngine
+from orderbook import OrderBook
+from trade_sink import NullSink
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_generate(self):
+        for profile in PROFILES:
+            records = generate(profile, 500, seed=3)
+            self.assertEqual(len(records), 500)
+            self.assertEqual(records, generate(profile, 500, seed=3), "Fluxo deveria ser reprodutível pela semente.")
+            self.assertNotEqual(records, generate(profile, 500, seed=4))
+
+            engine = MatchingEngine(OrderBook(), OrderBook(), history=None, sinks=[NullSink()])
+            self.assertEqual(dispatch(engine, records), 500)
+
+        churn = generate('churn', 1000)
+        self.assertGreater(sum(1 for record in churn if record[0] == MSG_CANCEL), 300)
+
+        with self.assertRaises(ValueError):
+            generate('foo', 10)
+
+    def test_run(self):
+        current = run.runAll(count=200, profiles=('passive', 'sweep'), books=('avl', 'ladder'))
+        results = current['results']
+        self.assertIn('engine.order/ladder/sweep', results)
+        self.assertIn('avl.delete', results)
+        for result in results.values():
+            self.assertGreater(result['ops'], 0)
+            self.assertLessEqual(result['p50_ns'], result['p99_ns'])
+            self.assertLessEqual(result['p99_ns'], result['max_ns'])
+
+        baseline = {'meta': current['meta'], 'results': {name: dict(result) for name, result in results.items()}}
+        baseline['results']['avl.get']['throughput'] *= 2
+        lines, regressions = run.compare(baseline, current, threshold=0.1)
+        self.assertEqual(regressions, ['avl.get'], "Queda de vazão não foi detectada.")
+        self.assertEqual(len(lines), len(results) + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+import binary_protocol
+from binary_protocol import MSG_LIMIT, MSG_MARKET, MSG_CANCEL, MSG_AMEND, MSG_STOP, encode, encodeOrder
+from matching_engine import MatchingEngine
+from orderbook import OrderBook
+from order import Order, OrderSide, OrderType
+from trade import Trade
+from trade_sink import NullSink
+
+
+class TestBinaryProtocol(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.engine = MatchingEngine(OrderBook(), OrderBook(), sinks=[NullSink()])
+        fd, self.path = tempfile.mkstemp(suffix='.bin')
+        os.close(fd)
+
+    def tearDown(self) -> None:
+        os.remove(self.path)
+
+    def test_record_size(self):
+        self.assertEqual(binary_protocol.RECORD.size, 32)
+        order = Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=2001, qty=3, id=7)
+        self.assertEqual(encodeOrder(order), encode(MSG_LIMIT, 1, 7, 2001, 3))
+
+    def test_stop_records(self):
+        # Ordem stop: prefixo com o preço de disparo, seguido da ordem
+        order = Order(type=OrderType.STOP_LIMIT, side=OrderSide.BUY, price=26, qty=50, id=9, stopPrice=25)
+        self.assertEqual(encodeOrder(order), encode(MSG_STOP, 0, 9, 25) + encode(MSG_LIMIT, 0, 9, 26, 50))
+        with self.assertRaises(ValueError):
+            encodeOrder(Order(type=OrderType.STOP_LIMIT, side=OrderSide.BUY, qty=50, stopPrice=25))
+        binary_protocol.writeMessages(self.path, [
+            encode(MSG_LIMIT, OrderSide.SELL, 0, 25, 100),
+            encode(MSG_LIMIT, OrderSide.SELL, 0, 26, 100),
+            encodeOrder(Order(type=OrderType.STOP, side=OrderSide.BUY, qty=30, stopPrice=25)),
+            encodeOrder(order),
+            encode(MSG_MARKET, OrderSide.BUY, qty=10),
+        ])
+        self.assertEqual(binary_protocol.replay(self.engine, self.path), 7)
+        self.assertEqual(self.engine.previousTrades, [Trade(price=25, qty=10), Trade(price=25, qty=30),
+                                                      Trade(price=25, qty=50)])
+        self.assertEqual(self.engine.sellOrderBook.depthFromMin(5), [(25, 10, 1), (26, 100, 1)])
+
+    def test_replay(self):
+        binary_protocol.writeMessages(self.path, [
+            encode(MSG_LIMIT, OrderSide.BUY, 0, 20, 200),
+            encode(MSG_LIMIT, OrderSide.BUY, 0, 19, 100),
+            encode(MSG_LIMIT, OrderSide.SELL, 0, 25, 100),
+            encode(MSG_CANCEL, orderId=2),
+            encode(MSG_AMEND, orderId=3, price=24, qty=50),
+            encode(MSG_MARKET, OrderSide.SELL, qty=300),
+        ])
+
+        count = binary_protocol.replay(self.engine, self.path)
+        self.assertEqual(count, 6)
+        self.assertEqual(self.engine.previousTrades, [Trade(price=20, qty=200)], "Cancelamento não foi aplicado.")
+        self.assertEqual(self.engine.sellOrderBook.getOrder(3).price, 24, "Alteração não foi aplicada.")
+
+    def test_replay_empty(self):
+        self.assertEqual(binary_protocol.replay(self.engine, self.path), 0)
+
+    def test_truncated(self):
+        binary_protocol.writeMessages(self.path, [encode(MSG_LIMIT, 0, 0, 20, 200)[:-1]])
+        self.assertRaises(ValueError, binary_protocol.replay, self.engine, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
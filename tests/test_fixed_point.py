@@ -0,0 +1,45 @@
+import unittest
+from decimal import Decimal
+from fixed_point import FixedPointScale
+from matching_engine import MatchingEngine
+from orderbook import OrderBook
+from order import Order, OrderSide, OrderType
+from trade import Trade
+
+
+class TestFixedPointScale(unittest.TestCase):
+
+    def test_conversion(self):
+        scale = FixedPointScale(tickSize='0.01', lotSize='100')
+        self.assertEqual(scale.priceToTicks('20.01'), 2001)
+        self.assertEqual(scale.priceToTicks(0.3), 30, "Float deve ser convertido sem erro de representação.")
+        self.assertEqual(scale.qtyToLots('300'), 3)
+        self.assertEqual(scale.ticksToPrice(2001), Decimal('20.01'))
+        self.assertEqual(scale.lotsToQty(3), Decimal('300'))
+
+    def test_off_tick(self):
+        scale = FixedPointScale(tickSize='0.05')
+        self.assertRaises(ValueError, scale.priceToTicks, '20.01')
+        self.assertRaises(ValueError, scale.priceToTicks, 'abc')
+        self.assertRaises(ValueError, FixedPointScale, tickSize='0')
+
+    def test_invalid_values(self):
+        scale = FixedPointScale()
+        for value in ('1e400', 'inf', '-Infinity', 'nan', float('inf')):
+            self.assertRaises(ValueError, scale.priceToTicks, value)
+        self.assertRaises(ValueError, scale.qtyToLots, '1e400')
+
+    def test_engine_integer_prices(self):
+        scale = FixedPointScale(tickSize='0.1')
+        engine = MatchingEngine(OrderBook(), OrderBook(), scale=scale)
+        # 0.1 + 0.2 em ticks é exato
+        engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=scale.priceToTicks('0.3'), qty=1))
+        engine.order(Order(type=OrderType.LIMIT, side=OrderSide.BUY,
+                           price=scale.priceToTicks('0.1') + scale.priceToTicks('0.2'), qty=1))
+
+        self.assertEqual(engine.previousTrades, [Trade(price=3, qty=1)])
+        self.assertIsInstance(engine.previousTrades[0].price, int)
+
+
+if __name__ == '__main__':
+    unittest.main()
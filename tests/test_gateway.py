@@ -0,0 +1,158 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+from gateway import OrderGateway
+from matching_engine import MatchingEngine
+from orderbook import OrderBook
+from fixed_point import FixedPointScale
+
+
+class TestOrderGateway(unittest.IsolatedAsyncioTestCase):
+
+    def makeEngine(self, scale=None):
+        return MatchingEngine(OrderBook(), OrderBook(), sinks=[], scale=scale)
+
+    async def asyncSetUp(self):
+        self.engine = self.makeEngine()
+        self.gateway = OrderGateway(self.engine)
+        self.server = await self.gateway.startTcp('127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.gateway.stop()
+
+    async def _send(self, lines):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write("".join(line + "\n" for line in lines).encode())
+        await writer.drain()
+        writer.write_eof()
+        data = await reader.read()
+        writer.close()
+        return data.decode().splitlines()
+
+    async def test_orders(self):
+        response = await self._send(["limit sell 10 5", "limit sell 11 5", "market buy 7"])
+        self.assertEqual(response, [
+            "Order, id: 1",
+            "Order, id: 2",
+            "Order, id: 3",
+            "Trade, price: 10.0, qty: 5.0",
+            "Trade, id: 1, price: 10.0, qty: 5.0",
+            "Trade, price: 11.0, qty: 2.0",
+            "Trade, id: 2, price: 11.0, qty: 2.0",
+        ], "Respostas do gateway incorretas.")
+
+    async def test_trades_to_both_sides(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write(b"limit sell 10 5\nlimit sell 11 5\n")
+        self.assertEqual(await reader.readline(), b"Order, id: 1\n")
+        self.assertEqual(await reader.readline(), b"Order, id: 2\n")
+
+        response = await self._send(["limit buy 10 3"])
+        self.assertEqual(response, ["Order, id: 3", "Trade, price: 10.0, qty: 3.0"],
+                         "Trade deveria ser enviado à sessão agressora.")
+        self.assertEqual(await reader.readline(), b"Trade, id: 1, price: 10.0, qty: 3.0\n",
+                         "Trade deveria ser enviado à dona da ordem em livro.")
+        self.assertEqual(self.engine.sellOrderBook.getTotalQty(), 7)
+
+        # Ordem alterada continua acompanhada no novo nível; execução completa
+        writer.write(b"amend 2 12 4\n")
+        response = await self._send(["market buy 6"])
+        self.assertEqual(response, ["Order, id: 4", "Trade, price: 10.0, qty: 2.0", "Trade, price: 12.0, qty: 4.0"])
+        self.assertEqual(await reader.readline(), b"Trade, id: 1, price: 10.0, qty: 2.0\n")
+        self.assertEqual(await reader.readline(), b"Trade, id: 2, price: 12.0, qty: 4.0\n")
+        writer.write_eof()
+        self.assertEqual(await reader.read(), b"")
+        writer.close()
+        self.assertEqual(self.gateway._owners, {})
+
+    async def test_stops_to_owner(self):
+        await self._send(["limit sell 10 5", "limit sell 11 5"])
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write(b"stop buy 10 3\nstop_limit buy 10 12 20\n")
+        self.assertEqual(await reader.readline(), b"Order, id: 3\n")
+        self.assertEqual(await reader.readline(), b"Order, id: 4\n")
+
+        # Os trades das ordens disparadas vão para a dona delas, não para a sessão que disparou
+        response = await self._send(["market buy 2"])
+        self.assertEqual(response, ["Order, id: 5", "Trade, price: 10.0, qty: 2.0"])
+        self.assertEqual(await reader.readline(), b"Trade, price: 10.0, qty: 3.0\n")
+        self.assertEqual(await reader.readline(), b"Trade, price: 11.0, qty: 5.0\n")
+
+        # A stop limit que ficou em livro é acompanhada
+        self.assertEqual(self.engine.buyOrderBook.getOrder(4).qty, 15)
+        await self._send(["limit sell 12 4"])
+        self.assertEqual(await reader.readline(), b"Trade, id: 4, price: 12.0, qty: 4.0\n")
+        writer.write_eof()
+        self.assertEqual(await reader.read(), b"")
+        writer.close()
+
+    async def test_uncross_to_owners(self):
+        response = await self._send(["auction", "limit sell 10 5", "limit buy 12 3", "limit buy 11 3", "uncross"])
+        # No leilão todos os níveis cruzados executam ao mesmo preço
+        self.assertEqual(response[:3], ["Order, id: 1", "Order, id: 2", "Order, id: 3"])
+        self.assertEqual(sorted(response[3:]), sorted([
+            "Trade, price: 11.0, qty: 5.0",
+            "Trade, id: 1, price: 11.0, qty: 5.0", "Trade, id: 2, price: 11.0, qty: 3.0",
+            "Trade, id: 3, price: 11.0, qty: 2.0",
+        ]))
+
+    async def test_cancel_and_errors(self):
+        response = await self._send(["limit sell 10 5", "cancel 1", "limit foo 10 5", "market buy 5"])
+        self.assertEqual(response[0], "Order, id: 1")
+        self.assertTrue(response[1].startswith("Erro:"), "Comando inválido deveria retornar erro.")
+        self.assertEqual(response[2], "Order, id: 2")
+        self.assertEqual(len(response), 3, "Ordem cancelada não deveria gerar trade.")
+
+    async def test_unexpected_error(self):
+        # Erro inesperado do engine vira resposta de erro, e o matching continua
+        with mock.patch.object(self.engine, 'cancel', side_effect=RuntimeError("falha")):
+            response = await self._send(["limit sell 10 5", "cancel 1", "market buy 2"])
+        self.assertEqual(response, ["Order, id: 1", "Erro: falha", "Order, id: 2", "Trade, price: 10.0, qty: 2.0",
+                                    "Trade, id: 1, price: 10.0, qty: 2.0"])
+        response = await self._send(["market buy 1"])
+        self.assertEqual(response, ["Order, id: 3", "Trade, price: 10.0, qty: 1.0"])
+
+    async def test_close_waits_own_session(self):
+        # Mensagem de outra sessão ainda sem resposta não atrasa o fechamento desta
+        queue = self.gateway.queue
+        queue.put_nowait(None)
+        queue.get_nowait()
+        response = await asyncio.wait_for(self._send(["limit sell 10 5"]), 5)
+        self.assertEqual(response, ["Order, id: 1"])
+        queue.task_done()
+
+    async def test_concurrent_sessions(self):
+        responses = await asyncio.gather(*(self._send([f"limit sell {10 + i} 1"]) for i in range(10)))
+        self.assertEqual(sorted(r[0] for r in responses),
+                         sorted(f"Order, id: {i}" for i in range(1, 11)))
+        self.assertEqual(self.engine.sellOrderBook.getSize(), 10)
+
+    @unittest.skipUnless(hasattr(asyncio, 'start_unix_server'), "Sem suporte a sockets Unix")
+    async def test_unix(self):
+        engine = self.makeEngine(FixedPointScale())
+        gateway = OrderGateway(engine)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'gateway.sock')
+            server = await gateway.startUnix(path)
+            try:
+                reader, writer = await asyncio.open_unix_connection(path)
+                writer.write(b"limit sell 10.25 5\nmarket buy 2\n")
+                writer.write_eof()
+                data = await reader.read()
+                writer.close()
+            finally:
+                server.close()
+                await server.wait_closed()
+                await gateway.stop()
+        self.assertEqual(data.decode().splitlines(),
+                         ["Order, id: 1", "Order, id: 2", "Trade, price: 10.25, qty: 2",
+                          "Trade, id: 1, price: 10.25, qty: 2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
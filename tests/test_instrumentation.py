@@ -0,0 +1,70 @@
+import unittest
+from instrumentation import EngineInstrumentation, LogHistogram, bucketOf, bucketUpperBound
+from matching_engine import MatchingEngine
+from orderbook import OrderBook
+from order import Order, OrderSide, OrderType
+from trade import Trade
+from trade_sink import CallbackSink
+
+
+class TestLogHistogram(unittest.TestCase):
+
+    def test_buckets(self):
+        for value in list(range(1000)) + [10 ** 6, 2 ** 40 + 12345]:
+            bucket = bucketOf(value)
+            self.assertLessEqual(value, bucketUpperBound(bucket))
+            self.assertLessEqual(bucketUpperBound(bucket), value * 1.25 + 1, "Erro relativo acima de 25%.")
+
+    def test_percentile(self):
+        histogram = LogHistogram()
+        for value in range(1, 1001):
+            histogram.record(value)
+        self.assertEqual(histogram.count, 1000)
+        self.assertEqual(histogram.max, 1000)
+        self.assertAlmostEqual(histogram.mean(), 500.5)
+        self.assertTrue(500 <= histogram.percentile(50) <= 625)
+        self.assertTrue(990 <= histogram.percentile(99) <= 1000)
+        self.assertEqual(histogram.percentile(100), 1000)
+        self.assertEqual(LogHistogram().percentile(50), 0)
+
+    def test_fixed_memory(self):
+        histogram = LogHistogram()
+        histogram.record(2 ** 70)
+        self.assertEqual(len(histogram.buckets), 256)
+        self.assertEqual(histogram.buckets[-1], 1)
+
+
+class TestEngineInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.trades = []
+        self.engine = MatchingEngine(OrderBook(), OrderBook(), history=None, sinks=[CallbackSink(self.trades.append)])
+
+    def test_install(self):
+        engine = self.engine
+        with EngineInstrumentation(engine) as instrumentation:
+            self.assertIn('order', vars(engine))
+            for price in (10, 11, 12):
+                engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=price, qty=5))
+            engine.order(Order(type=OrderType.MARKET, side=OrderSide.BUY, qty=12))
+
+        stats = instrumentation.stats()
+        self.assertEqual(stats['order']['count'], 4)
+        self.assertEqual(stats['match']['count'], 4)
+        self.assertEqual(stats['_add']['count'], 3)
+        self.assertEqual(stats['exec']['count'], 3)
+        self.assertEqual(stats['levelsTouched']['max'], 3, "Agressão deveria tocar 3 níveis.")
+        self.assertEqual(stats['ordersFilled']['max'], 2, "Duas ordens deveriam ser preenchidas.")
+        self.assertEqual(self.trades, [Trade(10, 5), Trade(11, 5), Trade(12, 2)])
+        self.assertIn('levelsTouched', instrumentation.report())
+
+        # Desligada, a instância volta a usar os métodos da classe
+        for stage in EngineInstrumentation.STAGES:
+            self.assertNotIn(stage, vars(engine))
+        engine.order(Order(type=OrderType.MARKET, side=OrderSide.BUY, qty=3))
+        self.assertEqual(instrumentation.stats()['order']['count'], 4)
+        self.assertEqual(self.trades[-1], Trade(12, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
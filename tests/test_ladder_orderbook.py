@@ -0,0 +1,148 @@
+import unittest
+from ladder_orderbook import TickLadderOrderBook
+from orderbook import OrderPriorityQueue
+from order import Order, OrderSide, OrderType
+from tests.test_orderbook import BookCountersTest
+
+
+class TestTickLadderOrderbook(BookCountersTest, unittest.TestCase):
+
+    def makeCountersBook(self):
+        # Faixa pequena: o teste também passa por recentralizações e reduções do vetor
+        return TickLadderOrderBook(tickSize=1, referencePrice=15, numLevels=8)
+
+    def setUp(self) -> None:
+        self.ob = TickLadderOrderBook(tickSize=1, referencePrice=30, numLevels=64)
+        orders = [
+            Order(OrderSide.BUY, OrderType.LIMIT, 30, 20, id=1),
+            Order(OrderSide.BUY, OrderType.LIMIT, 30, 23, id=2),
+            Order(OrderSide.BUY, OrderType.LIMIT, 10, 10, id=3),
+            Order(OrderSide.BUY, OrderType.LIMIT, 10, 30, id=4),
+            Order(OrderSide.BUY, OrderType.LIMIT, 50, 23, id=5),
+        ]
+        for order in orders:
+            self.ob.add(order)
+
+    def test_iter(self):
+        itered_orders = [(order.price, order.qty) for order in self.ob.iterFromMin()]
+        expected_orders = [(10, 10), (10, 30), (30, 20), (30, 23), (50, 23)]
+        self.assertEqual(itered_orders, expected_orders, "Ordens não foram iteradas corretamente.")
+
+        itered_orders = [(order.price, order.qty) for order in self.ob.iterFromMax()]
+        expected_orders = [(50, 23), (30, 20), (30, 23), (10, 10), (10, 30)]
+        self.assertEqual(itered_orders, expected_orders, "Ordens não foram iteradas corretamente.")
+
+    def test_min_max(self):
+        self.assertEqual(self.ob.getMinPrice(), 10)
+        self.assertEqual(self.ob.getMaxPrice(), 50)
+        self.assertEqual(self.ob.getSize(), 5)
+
+    def test_depth(self):
+        self.assertEqual(self.ob.depthFromMax(2), [(50, 23, 1), (30, 43, 2)])
+        self.assertEqual(self.ob.depthFromMin(5), [(10, 40, 2), (30, 43, 2), (50, 23, 1)])
+        arrays = ([0] * 2, [0] * 2, [0] * 2)
+        self.assertEqual(self.ob.depthFromMin(5, arrays), 2)
+        self.assertEqual(arrays, ([10, 30], [40, 43], [2, 2]))
+
+    def test_popQty(self):
+        self.ob.popQty(10, 60)
+        self.assertEqual(self.ob.getMinPrice(), 30, "Preço não removido ao preencher quantidade.")
+        self.ob.popQty(30, 40)
+        itered_orders = [(order.price, order.qty) for order in self.ob.iterFromMin()]
+        self.assertEqual(itered_orders, [(30, 3), (50, 23)], "Ordem (30,23) não teve abatimento correto da quantidade.")
+
+    def test_sweep(self):
+        fills = self.ob.sweepFromMin(60, maxPrice=30)
+        self.assertEqual(fills, [(10, 40), (30, 20)])
+        self.assertEqual(self.ob.getMinPrice(), 30)
+
+        fills = self.ob.sweepFromMax(100)
+        self.assertEqual(fills, [(50, 23), (30, 23)])
+        self.assertIsNone(self.ob.getMaxPrice())
+        self.assertEqual(self.ob.getSize(), 0)
+
+    def test_cancel(self):
+        self.ob.cancel(5)
+        self.assertEqual(self.ob.getMaxPrice(), 30, "Nível vazio não foi removido no cancelamento.")
+        self.ob.cancel(1)
+        self.assertEqual([order.id for order in self.ob.iterFromMax()], [2, 3, 4])
+
+    def test_recenter(self):
+        # Preços fora da faixa recentralizam e ampliam o vetor
+        self.ob.add(Order(OrderSide.BUY, OrderType.LIMIT, 500, 1, id=6))
+        self.ob.add(Order(OrderSide.BUY, OrderType.LIMIT, -200, 1, id=7))
+        self.assertEqual(self.ob.getMaxPrice(), 500)
+        self.assertEqual(self.ob.getMinPrice(), -200)
+        prices = [order.price for order in self.ob.iterFromMin()]
+        self.assertEqual(prices, [-200, 10, 10, 30, 30, 50, 500])
+
+        # Com os extremos esvaziados, o vetor é reduzido (a faixa ocupada, de 41 níveis, cabe num quarto)
+        self.assertEqual(self.ob.numLevels, 1024)
+        self.ob.cancel(6)
+        self.ob.sweepFromMin(1)
+        self.assertEqual(self.ob.numLevels, 128)
+        self.assertEqual([order.id for order in self.ob.iterFromMin()], [3, 4, 1, 2, 5])
+        self.assertEqual(self.ob.sweepFromMin(45), [(10, 40), (30, 5)])
+        self.ob.sweepFromMin(100)
+        self.assertEqual(self.ob.numLevels, 64)
+
+    def test_max_levels(self):
+        ob = TickLadderOrderBook(tickSize=0.01, referencePrice=100, numLevels=1024)
+        ob.add(Order(OrderSide.BUY, OrderType.LIMIT, 100, 5, id=1))
+        # Preço que exigiria uma faixa acima de maxLevels é rejeitado sem alterar o livro
+        with self.assertRaises(ValueError):
+            ob.checkPrice(100000)
+        with self.assertRaises(ValueError):
+            ob.add(Order(OrderSide.BUY, OrderType.LIMIT, 100000, 5, id=2))
+        self.assertEqual(ob.numLevels, 1024)
+        self.assertEqual((ob.getSize(), ob.getTotalQty()), (1, 5))
+        self.assertIsNone(ob.getOrder(2))
+        ob.checkPrice(600)
+        ob.add(Order(OrderSide.BUY, OrderType.LIMIT, 600, 5, id=3))
+        self.assertLessEqual(ob.numLevels, ob.maxLevels)
+        self.assertEqual((ob.getMinPrice(), ob.getMaxPrice()), (100, 600))
+
+    def test_tick_size(self):
+        ob = TickLadderOrderBook(tickSize=0.5, referencePrice=10, numLevels=16)
+        ob.add(Order(OrderSide.BUY, OrderType.LIMIT, 10.5, 1))
+        self.assertEqual(ob.getMaxPrice(), 10.5)
+        self.assertRaises(ValueError, ob.add, Order(OrderSide.BUY, OrderType.LIMIT, 10.3, 1))
+
+    def test_counters_rejected_add(self):
+        ob = TickLadderOrderBook(tickSize=0.5, referencePrice=20, numLevels=16)
+        with self.assertRaises(ValueError):
+            ob.add(Order(OrderSide.BUY, OrderType.LIMIT, 20.3, 10, id=1))
+        # Ordem rejeitada não altera os totais
+        self.assertEqual((ob.getSize(), ob.getTotalQty()), (0, 0))
+        self.assertIsNone(ob.getOrder(1))
+
+    def test_load_levels(self):
+        levels = []
+        orderId = 0
+        for price in range(10, 200, 5):
+            order_queue = OrderPriorityQueue()
+            order_queue.price = price
+            for qty in (1, 2):
+                orderId += 1
+                order_queue.append(Order(OrderSide.BUY, OrderType.LIMIT, price, qty, id=orderId))
+            levels.append((price, order_queue))
+
+        ob = TickLadderOrderBook(tickSize=1, referencePrice=30, numLevels=64)
+        ob.load_levels(levels)
+        self.assertEqual(ob.getSize(), 2 * len(levels))
+        self.assertEqual(ob.getTotalQty(), 3 * len(levels))
+        self.assertEqual((ob.getMinPrice(), ob.getMaxPrice()), (10, 195))
+        self.assertEqual([order.id for order in ob.iterFromMin()], list(range(1, orderId + 1)))
+
+        # O livro carregado funciona normalmente
+        self.assertEqual(ob.cancel(3).price, 15)
+        self.assertEqual(ob.sweepFromMin(5), [(10, 3), (15, 2)])
+        ob.add(Order(OrderSide.BUY, OrderType.LIMIT, 12, 7, id=1000))
+        self.assertEqual(ob.getMinPrice(), 12)
+        self.assertEqual(ob.getLevelQty(195), 3)
+
+        with self.assertRaises(ValueError):
+            ob.load_levels(levels)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import io
+import unittest
+from contextlib import redirect_stderr
+from main import runStream, parseOrder
+from matching_engine import MatchingEngine
+from orderbook import OrderBook
+from order import Order, OrderSide, OrderType
+from trade import Trade
+from trade_sink import StreamSink
+
+
+class TestMain(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.output = io.StringIO()
+        self.engine = MatchingEngine(OrderBook(), OrderBook(), sinks=[StreamSink(self.output)])
+
+    def test_parseOrder(self):
+        self.assertEqual(parseOrder(['limit', 'buy', '20', '200']),
+                         Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=20, qty=200))
+        self.assertEqual(parseOrder(['market', 'sell', '5']),
+                         Order(type=OrderType.MARKET, side=OrderSide.SELL, qty=5))
+        self.assertRaises(ValueError, parseOrder, ['limit', 'hold', '20', '200'])
+        self.assertEqual(parseOrder(['stop', 'buy', '21', '5']),
+                         Order(type=OrderType.STOP, side=OrderSide.BUY, qty=5, stopPrice=21))
+        self.assertEqual(parseOrder(['stop_limit', 'sell', '19', '18.5', '5']),
+                         Order(type=OrderType.STOP_LIMIT, side=OrderSide.SELL, price=18.5, qty=5, stopPrice=19))
+
+    def test_runStream(self):
+        stream = io.StringIO("limit buy 20 200\n\nlimit sell 21 100\nmarket sell 150\ncancel 2\nmarket buy 10\n")
+        runStream(self.engine, stream)
+
+        self.assertEqual(self.engine.previousTrades, [Trade(price=20, qty=150)])
+        self.assertEqual(self.output.getvalue(), "Trade, price: 20.0, qty: 150.0\n")
+
+    def test_runStream_invalid_line(self):
+        stream = io.StringIO("limit buy 20 200\nlimit buy\nmarket sell 10\n")
+        errors = io.StringIO()
+        with redirect_stderr(errors):
+            runStream(self.engine, stream)
+
+        self.assertIn("Linha 2", errors.getvalue(), "Linha inválida não foi reportada.")
+        self.assertEqual(self.engine.previousTrades, [Trade(price=20, qty=10)], "Linhas seguintes não foram processadas.")
+
+
+if __name__ == '__main__':
+    unittest.main()
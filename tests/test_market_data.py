@@ -0,0 +1,92 @@
+import unittest
+from market_data import MarketDataFeed, LevelUpdate, UpdateAction
+from matching_engine import MatchingEngine
+from orderbook import OrderBook
+from ladder_orderbook import TickLadderOrderBook
+from order import Order, OrderSide, OrderType
+from trade import Trade
+
+
+class TestMarketDataFeed(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.batches = []
+        self.feed = MarketDataFeed()
+        self.feed.subscribe(self.batches.append)
+        self.engine = MatchingEngine(self.makeBook(), self.makeBook(), sinks=[], feed=self.feed)
+
+    def makeBook(self):
+        return OrderBook()
+
+    def test_new_and_change(self):
+        self.engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=101, qty=5))
+        self.engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=101, qty=3))
+
+        self.assertEqual([batch.seq for batch in self.batches], [1, 2], "Lotes não são sequenciados.")
+        self.assertEqual(self.batches[0].levels, [LevelUpdate(UpdateAction.NEW, OrderSide.SELL, 101, 5, 1)])
+        self.assertEqual(self.batches[1].levels, [LevelUpdate(UpdateAction.CHANGE, OrderSide.SELL, 101, 8, 2)])
+
+    def test_sweep_coalesced(self):
+        for price in (101, 102, 103):
+            self.engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=price, qty=5))
+        self.batches.clear()
+
+        # Uma ordem agressiva que varre dois níveis e descansa o restante: um único lote
+        self.engine.order(Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=102, qty=12))
+
+        self.assertEqual(len(self.batches), 1, "Alterações de uma mensagem não foram agrupadas.")
+        batch = self.batches[0]
+        self.assertEqual(batch.seq, 4)
+        self.assertEqual(batch.levels, [
+            LevelUpdate(UpdateAction.DELETE, OrderSide.SELL, 101, 0, 0),
+            LevelUpdate(UpdateAction.DELETE, OrderSide.SELL, 102, 0, 0),
+            LevelUpdate(UpdateAction.NEW, OrderSide.BUY, 102, 2, 1),
+        ])
+        self.assertEqual(batch.trades, [Trade(price=101, qty=5), Trade(price=102, qty=5)])
+
+    def test_cancel_and_noop(self):
+        o1 = Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=99, qty=5)
+        self.engine.order(o1)
+        self.engine.cancel(o1.id)
+        self.engine.cancel(o1.id)
+
+        self.assertEqual(len(self.batches), 2, "Mensagem sem efeito não deve gerar lote.")
+        self.assertEqual(self.batches[1].levels, [LevelUpdate(UpdateAction.DELETE, OrderSide.BUY, 99, 0, 0)])
+
+    def test_replica(self):
+        """ Um assinante mantém uma cópia do livro só com os lotes incrementais. """
+        replica = {}
+
+        def apply(batch):
+            for update in batch.levels:
+                if update.action == UpdateAction.DELETE:
+                    del replica[(update.side, update.price)]
+                else:
+                    replica[(update.side, update.price)] = (update.qty, update.count)
+        self.feed.subscribe(apply)
+
+        orders = [
+            Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=101, qty=5),
+            Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=102, qty=5),
+            Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=99, qty=5),
+            Order(type=OrderType.MARKET, side=OrderSide.BUY, qty=7),
+            Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=99, qty=2),
+        ]
+        for o in orders:
+            self.engine.order(o)
+        self.engine.amend(3, 98, 3)
+
+        bids, asks = self.engine.getDepth(10)
+        expected = {(OrderSide.BUY, price): (qty, count) for price, qty, count in bids}
+        expected.update({(OrderSide.SELL, price): (qty, count) for price, qty, count in asks})
+        self.assertEqual(replica, expected, "Cópia do assinante diverge do livro.")
+
+
+class TestMarketDataFeedTickLadder(TestMarketDataFeed):
+
+    def makeBook(self):
+        return TickLadderOrderBook(referencePrice=100, numLevels=16)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,13 @@
 import unittest
-from matching_engine import MatchingEngine
-from orderbook import OrderBook
+from unittest import mock
+import matching_engine
+from matching_engine import MatchingEngine, TradingPhase, clearingPrice
+from orderbook import OrderBook, np
+from ladder_orderbook import TickLadderOrderBook
 from order import Order, OrderSide, OrderType
 from trade import Trade
 import math
+import random
 
 
 class TestMatchingEngine(unittest.TestCase):
@@ -13,8 +17,11 @@ class TestMatchingEngine(unittest.TestCase):
         self.buyBook = OrderBook()
         self.engine = MatchingEngine(self.buyBook, self.sellBook)
 
+    def makeBook(self):
+        return OrderBook()
+
     def test_order(self):
-        o1 = Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=100, qty=10)
+        o1 = Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=99, qty=10)
         o2 = Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=100, qty=10)
         self.engine.order(o1)
         self.engine.order(o2)
@@ -63,6 +70,337 @@ class TestMatchingEngine(unittest.TestCase):
         ]
         self.assertEqual(self.engine.previousTrades, expectedTradeList, "Ordens não são completadas parcialmente.")
 
+    def test_match_sweeps_multiple_levels(self):
+        orders = [
+            Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=101, qty=5),
+            Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=100, qty=5),
+            Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=102, qty=5),
+            Order(type=OrderType.MARKET, side=OrderSide.BUY, qty=12),
+        ]
+        for o in orders:
+            self.engine.order(o)
+
+        expectedTradeList = [
+            Trade(price=100, qty=5),
+            Trade(price=101, qty=5),
+            Trade(price=102, qty=2),
+        ]
+        self.assertEqual(self.engine.previousTrades, expectedTradeList, "Order MARKET não percorre os níveis seguintes.")
+        self.assertEqual(self.sellBook.getMinPrice(), 102, "Níveis esvaziados não foram removidos.")
+        self.assertEqual(self.sellBook.getSize(), 1)
+
+    def test_limit_order_crosses_on_entry(self):
+        orders = [
+            Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=100, qty=5),
+            Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=101, qty=5),
+            Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=103, qty=5),
+            Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=102, qty=15),
+        ]
+        for o in orders:
+            self.engine.order(o)
+
+        expectedTradeList = [
+            Trade(price=100, qty=5),
+            Trade(price=101, qty=5),
+        ]
+        self.assertEqual(self.engine.previousTrades, expectedTradeList, "Ordem LIMIT agressiva não cruza até o preço limite.")
+        self.assertEqual(self.buyBook.getMaxPrice(), 102, "Restante da ordem LIMIT não ficou no livro.")
+        self.assertEqual(self.buyBook.peekFirst(102).qty, 5)
+        self.assertEqual(self.sellBook.getMinPrice(), 103, "Livro continua cruzado.")
+
+    def test_limit_order_sell_crosses_on_entry(self):
+        self.engine.order(Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=100, qty=10))
+        self.engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=100, qty=4))
+
+        self.assertEqual(self.engine.previousTrades, [Trade(price=100, qty=4)])
+        self.assertEqual(self.buyBook.getSize(), 1)
+        self.assertIsNone(self.sellBook.getMinPrice(), "Ordem LIMIT preenchida não deve ficar no livro.")
+
+    def test_order_ids(self):
+        o1 = Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=99, qty=10)
+        o2 = Order(type=OrderType.MARKET, side=OrderSide.SELL, qty=1)
+        o3 = Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=100, qty=10)
+        for o in (o1, o2, o3):
+            self.engine.order(o)
+
+        self.assertEqual([o1.id, o2.id, o3.id], [1, 2, 3], "Ids não são sequenciais.")
+        self.assertIs(self.engine.getOrder(3), o3)
+
+    def test_cancel(self):
+        o1 = Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=100, qty=10)
+        self.engine.order(o1)
+        self.assertEqual(self.engine.cancel(o1.id), o1)
+        self.assertEqual(self.sellBook.getSize(), 0)
+
+        self.engine.order(Order(type=OrderType.MARKET, side=OrderSide.BUY, qty=10))
+        self.assertEqual(self.engine.previousTrades, [], "Ordem cancelada foi executada.")
+
+    def test_amend(self):
+        o1 = Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=100, qty=10)
+        o2 = Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=100, qty=10)
+        self.engine.order(o1)
+        self.engine.order(o2)
+
+        # Redução mantém a prioridade
+        self.engine.amend(o1.id, 100, 4)
+        self.assertIs(self.sellBook.peekFirst(100), o1)
+        self.assertEqual(o1.qty, 4)
+
+        # Aumento reinsere no fim da fila
+        self.engine.amend(o1.id, 100, 6)
+        self.assertIs(self.sellBook.peekFirst(100), o2)
+
+        # Alteração de preço que cruza o livro gera trade
+        self.engine.order(Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=99, qty=3))
+        self.engine.amend(o2.id, 99, 10)
+        self.assertEqual(self.engine.previousTrades, [Trade(price=99, qty=3)])
+        self.assertEqual(self.sellBook.getMinPrice(), 99)
+        self.assertEqual(self.sellBook.getSize(), 2)
+
+    def test_getDepth(self):
+        orders = [
+            Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=101, qty=5),
+            Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=102, qty=5),
+            Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=102, qty=1),
+            Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=99, qty=7),
+            Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=98, qty=3),
+        ]
+        for o in orders:
+            self.engine.order(o)
+
+        bids, asks = self.engine.getDepth(1)
+        self.assertEqual(bids, [(99, 7, 1)], "Melhor compra incorreta.")
+        self.assertEqual(asks, [(101, 5, 1)], "Melhor venda incorreta.")
+
+        bids, asks = self.engine.getDepth(5)
+        self.assertEqual(bids, [(99, 7, 1), (98, 3, 1)])
+        self.assertEqual(asks, [(101, 5, 1), (102, 6, 2)])
+
+
+    def _batch(self):
+        rng = random.Random(5)
+        batch = []
+        for _ in range(600):
+            side = rng.choice((OrderSide.BUY, OrderSide.SELL))
+            if rng.random() < 0.15:
+                batch.append((side, OrderType.MARKET, 0, rng.randint(1, 30)))
+            else:
+                offset = rng.randint(-3, 10)
+                price = 100 - offset if side == OrderSide.BUY else 100 + offset
+                batch.append((side, OrderType.LIMIT, price, rng.randint(1, 10)))
+        return batch
+
+    def _state(self, engine):
+        return [(order.id, order.price, order.qty)
+                for book in (engine.buyOrderBook, engine.sellOrderBook) for order in book.iterFromMin()]
+
+    def test_order_many(self):
+        batch = self._batch()
+        reference = MatchingEngine(self.makeBook(), self.makeBook(), sinks=[])
+        for side, type_, price, qty in batch:
+            reference.order(Order(type=type_, side=side, price=price if type_ == OrderType.LIMIT else None, qty=qty))
+
+        engine = MatchingEngine(self.makeBook(), self.makeBook(), sinks=[])
+        sides, types, prices, qtys = zip(*batch)
+        fills = engine.order_many(sides=list(sides), types=list(types), prices=list(prices), qtys=list(qtys))
+
+        self.assertEqual(engine.previousTrades, reference.previousTrades, "Lote gerou trades diferentes.")
+        self.assertEqual(self._state(engine), self._state(reference), "Lote deixou o livro diferente.")
+        self.assertEqual(fills.orderIds, list(range(1, len(batch) + 1)))
+        self.assertEqual([Trade(p, q) for p, q in zip(fills.price, fills.qty)], engine.previousTrades[-len(fills.qty):])
+        for i, qty in zip(fills.index, fills.qty):
+            self.assertLessEqual(qty, batch[i][3])
+
+        # Lista de Order: as ordens que sobram ficam no livro como os próprios objetos
+        engine = MatchingEngine(self.makeBook(), self.makeBook(), sinks=[])
+        orders = [Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=10, qty=5),
+                  Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=10, qty=8)]
+        fills = engine.order_many(orders)
+        self.assertEqual((fills.index, fills.price, fills.qty), ([1], [10], [5]))
+        self.assertIs(engine.getOrder(2), orders[1])
+        self.assertEqual(orders[1].qty, 3)
+
+        with self.assertRaises(ValueError):
+            engine.order_many(sides=[0], types=[0], prices=[1, 2], qtys=[1])
+
+    @unittest.skipIf(np is None, "numpy não instalado")
+    def test_order_many_numpy(self):
+        batch = self._batch()
+        sides, types, prices, qtys = (np.array(column) for column in zip(*batch))
+        engine = MatchingEngine(self.makeBook(), self.makeBook(), sinks=[])
+        fills = engine.order_many(sides=sides, types=types, prices=prices, qtys=qtys)
+        self.assertIsInstance(fills.qty, np.ndarray)
+        self.assertEqual(len(fills.orderIds), len(batch))
+
+
+    def test_auction(self):
+        engine = MatchingEngine(self.makeBook(), self.makeBook(), sinks=[])
+        engine.startAuction()
+        self.assertEqual(engine.phase, TradingPhase.AUCTION)
+        for side, price, qty in ((OrderSide.SELL, 99, 15), (OrderSide.SELL, 100, 25), (OrderSide.SELL, 101, 20),
+                                 (OrderSide.BUY, 102, 10), (OrderSide.BUY, 101, 20), (OrderSide.BUY, 100, 30)):
+            engine.order(Order(type=OrderType.LIMIT, side=side, price=price, qty=qty))
+        engine.order(Order(type=OrderType.MARKET, side=OrderSide.BUY, qty=5))
+        cancelled = Order(type=OrderType.MARKET, side=OrderSide.SELL, qty=50)
+        engine.order(cancelled)
+        self.assertIs(engine.cancel(cancelled.id), cancelled)
+        self.assertEqual(engine.previousTrades, [], "Leilão não deveria executar ordens antes do uncross.")
+
+        self.assertEqual(engine.uncross(), Trade(price=100, qty=40))
+        self.assertEqual(engine.previousTrades, [Trade(price=100, qty=40)], "Leilão deveria gerar um único trade.")
+        self.assertEqual(engine.phase, TradingPhase.CONTINUOUS)
+        self.assertNotIn('_process', vars(engine))
+        self.assertEqual(engine.buyOrderBook.depthFromMax(5), [(100, 25, 1)])
+        self.assertEqual(engine.sellOrderBook.depthFromMin(5), [(101, 20, 1)])
+
+        # De volta à negociação contínua
+        engine.order(Order(type=OrderType.MARKET, side=OrderSide.SELL, qty=5))
+        self.assertEqual(engine.previousTrades[-1], Trade(price=100, qty=5))
+
+    def test_stops(self):
+        engine = MatchingEngine(self.makeBook(), self.makeBook(), sinks=[])
+        for price in (100, 101, 102, 103):
+            engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=price, qty=10))
+        engine.order(Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=98, qty=10))
+        # Cada stop disparada compra o nível seguinte e dispara a próxima, em cascata
+        stops = [Order(type=OrderType.STOP, side=OrderSide.BUY, qty=10, stopPrice=price) for price in (101, 100)]
+        stopLimit = Order(type=OrderType.STOP_LIMIT, side=OrderSide.BUY, price=102, qty=15, stopPrice=102)
+        far = Order(type=OrderType.STOP, side=OrderSide.BUY, qty=10, stopPrice=110)
+        sellStop = Order(type=OrderType.STOP, side=OrderSide.SELL, qty=5, stopPrice=97)
+        for order in stops + [stopLimit, far, sellStop]:
+            engine.order(order)
+        self.assertEqual(engine.previousTrades, [], "Ordem stop não deveria executar antes do disparo.")
+        self.assertEqual(len(engine.buyStops), 4)
+        self.assertIs(engine.cancel(far.id), far)
+        self.assertIsNone(engine.cancel(far.id))
+
+        engine.order(Order(type=OrderType.MARKET, side=OrderSide.BUY, qty=1))
+        self.assertEqual(engine.previousTrades, [Trade(price=100, qty=1), Trade(price=100, qty=9),
+                                                 Trade(price=101, qty=1), Trade(price=101, qty=9),
+                                                 Trade(price=102, qty=1), Trade(price=102, qty=9)],
+                         "Ordens stop não dispararam em cascata.")
+        self.assertEqual([order.type for order in stops + [stopLimit]],
+                         [OrderType.MARKET, OrderType.MARKET, OrderType.LIMIT])
+        # O restante da stop limit fica no livro ao preço limite
+        self.assertEqual(engine.buyOrderBook.depthFromMax(1), [(102, 6, 1)])
+        self.assertEqual(len(engine.buyStops), 0)
+
+        # Venda dispara com trade no preço de disparo ou abaixo
+        engine.cancel(stopLimit.id)
+        engine.order(Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=96, qty=10))
+        engine.order(Order(type=OrderType.MARKET, side=OrderSide.SELL, qty=4))
+        self.assertEqual(len(engine.sellStops), 1)
+        engine.order(Order(type=OrderType.MARKET, side=OrderSide.SELL, qty=7))
+        self.assertEqual(engine.previousTrades[-3:], [Trade(price=98, qty=6), Trade(price=96, qty=1),
+                                                      Trade(price=96, qty=5)])
+        self.assertEqual(len(engine.sellStops), 0)
+        # Sem ordens stop, os trades não passam pelo disparo
+        self.assertNotIn(engine._triggerStops, engine._emitters)
+
+        with self.assertRaises(ValueError):
+            engine.order(Order(type=OrderType.STOP, side=OrderSide.BUY, qty=1))
+
+    def test_stops_order_many(self):
+        engine = MatchingEngine(self.makeBook(), self.makeBook(), sinks=[])
+        engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=100, qty=10))
+        engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=101, qty=10))
+        result = engine.order_many([
+            Order(type=OrderType.STOP, side=OrderSide.BUY, qty=10, stopPrice=100),
+            Order(type=OrderType.MARKET, side=OrderSide.BUY, qty=5),
+        ])
+        # Os trades da stop disparada são atribuídos à ordem que a disparou
+        self.assertEqual(list(result.index), [1, 1, 1])
+        self.assertEqual(list(result.price), [100, 100, 101])
+        self.assertEqual(list(result.qty), [5, 5, 5])
+        with self.assertRaises(ValueError):
+            engine.order_many(sides=[0], types=[int(OrderType.STOP)], prices=[0], qtys=[1])
+
+    def test_auction_no_cross(self):
+        engine = MatchingEngine(self.makeBook(), self.makeBook(), sinks=[])
+        engine.startAuction()
+        engine.order(Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=99, qty=10))
+        engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=100, qty=10))
+        fills = engine.order_many(sides=[OrderSide.BUY], types=[OrderType.LIMIT], prices=[98], qtys=[1])
+        self.assertEqual(fills.orderIds, [3])
+        self.assertIsNone(engine.uncross())
+        self.assertEqual(engine.buyOrderBook.getSize(), 2)
+        self.assertIsNone(engine.uncross(), "Uncross fora do leilão não faz nada.")
+
+    def _clearingPrice(self):
+        self.assertEqual(clearingPrice([(102, 10), (101, 20), (100, 30)], [(99, 15), (100, 25), (101, 20)]), (100, 40))
+        self.assertIsNone(clearingPrice([(99, 10)], [(100, 10)]))
+        self.assertIsNone(clearingPrice([], []))
+        self.assertEqual(clearingPrice([], [(100, 10)], marketBuy=5), (100, 5))
+        # Empate de volume: menor desequilíbrio
+        self.assertEqual(clearingPrice([(101, 10)], [(100, 10), (101, 10)]), (100, 10))
+        # Sobra de compra: preço mais alto; sobra de venda: mais baixo
+        self.assertEqual(clearingPrice([(102, 10)], [(100, 5)]), (102, 5))
+        self.assertEqual(clearingPrice([(102, 5)], [(100, 10)]), (100, 5))
+        # Sem desequilíbrio: mais próximo da referência
+        self.assertEqual(clearingPrice([(102, 5)], [(100, 5)], referencePrice=102), (102, 5))
+        self.assertEqual(clearingPrice([(102, 5)], [(100, 5)]), (100, 5))
+
+    def test_clearingPrice(self):
+        self._clearingPrice()
+        # Mesmo resultado sem numpy
+        with mock.patch.object(matching_engine, 'np', None):
+            self._clearingPrice()
+
+class TestMatchingEngineSortedArray(TestMatchingEngine):
+    """ Mesmos cenários, com níveis em vetor ordenado. """
+
+    def setUp(self) -> None:
+        self.sellBook = OrderBook(backend='sorted-array', side=OrderSide.SELL)
+        self.buyBook = OrderBook(backend='sorted-array', side=OrderSide.BUY)
+        self.engine = MatchingEngine(self.buyBook, self.sellBook)
+
+    def makeBook(self):
+        return OrderBook(backend='sorted-array', side=OrderSide.SELL)
+
+class TestMatchingEngineBTree(TestMatchingEngine):
+    """ Mesmos cenários, com níveis em B-tree. """
+
+    def setUp(self) -> None:
+        self.sellBook = OrderBook(backend='btree')
+        self.buyBook = OrderBook(backend='btree')
+        self.engine = MatchingEngine(self.buyBook, self.sellBook)
+
+    def makeBook(self):
+        return OrderBook(backend='btree')
+
+class TestMatchingEngineTickLadder(TestMatchingEngine):
+    """ Mesmos cenários, com livros em vetor de ticks. """
+
+    def setUp(self) -> None:
+        self.sellBook = TickLadderOrderBook(referencePrice=100, numLevels=16)
+        self.buyBook = TickLadderOrderBook(referencePrice=100, numLevels=16)
+        self.engine = MatchingEngine(self.buyBook, self.sellBook)
+
+    def makeBook(self):
+        return TickLadderOrderBook(referencePrice=100, numLevels=16)
+
+    def test_off_tick_rejected(self):
+        engine = MatchingEngine(TickLadderOrderBook(tickSize=0.5, referencePrice=20),
+                                TickLadderOrderBook(tickSize=0.5, referencePrice=20), sinks=[])
+        engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=20, qty=5))
+        # Preço fora do tick é rejeitado antes do match, sem efeitos
+        with self.assertRaises(ValueError):
+            engine.order(Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=20.3, qty=10))
+        with self.assertRaises(ValueError):
+            engine.order_many(sides=[0, 0], types=[0, 0], prices=[20, 20.3], qtys=[1, 1])
+        with self.assertRaises(ValueError):
+            engine.amend(1, 20.1, 5)
+        self.assertEqual(engine.previousTrades, [], "Ordem rejeitada não deveria executar.")
+        self.assertEqual(engine.sellOrderBook.depthFromMin(5), [(20, 5, 1)])
+        self.assertEqual((engine.buyOrderBook.getSize(), engine.buyOrderBook.getTotalQty()), (0, 0))
+
+        # Preço fora da faixa máxima do livro também
+        engine.order(Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=19, qty=1))
+        with self.assertRaises(ValueError):
+            engine.order(Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=100000, qty=10))
+        self.assertEqual(engine.previousTrades, [])
+        self.assertEqual(engine.sellOrderBook.depthFromMin(5), [(20, 5, 1)])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,11 +1,52 @@
 import unittest
-from orderbook import OrderBook
+from orderbook import BACKENDS, OrderBook, OrderPriorityQueue, allocDepthArrays, np
 from order import Order, OrderSide, OrderType
 from avl_tree import AVLTree, AVLNode
 from typing import Optional
 import math
-
-class TestOrderbook(unittest.TestCase):
+import random
+
+class BookCountersTest:
+    """ Teste dos totais mantidos pelo livro, comum a todos os livros (ver makeCountersBook). """
+
+    def makeCountersBook(self):
+        return OrderBook()
+
+    def test_counters(self):
+        # Operações aleatórias: totais do livro e dos níveis batem com as ordens em livro
+        rng = random.Random(7)
+        ob = self.makeCountersBook()
+        ids = []
+        for i in range(2000):
+            action = rng.random()
+            if action < 0.5 or not ids:
+                order = Order(OrderSide.BUY, OrderType.LIMIT, rng.randint(1, 30), rng.randint(1, 10), id=i)
+                ob.add(order)
+                ids.append(i)
+            elif action < 0.7:
+                ob.cancel(ids.pop(rng.randrange(len(ids))))
+            elif action < 0.8:
+                order = ob.getOrder(rng.choice(ids))
+                if order is not None:
+                    ob.reduce(order.id, rng.randint(0, order.qty))
+            elif action < 0.9:
+                ob.sweepFromMin(rng.randint(1, 40))
+            else:
+                price = ob.getMaxPrice()
+                if price is not None:
+                    ob.popQty(price, rng.randint(1, 20))
+
+            orders = list(ob.iterFromMin())
+            self.assertEqual(ob.getSize(), len(orders))
+            self.assertEqual(ob.getTotalQty(), sum(order.qty for order in orders))
+
+        for price in range(1, 31):
+            level = [order for order in orders if order.price == price]
+            self.assertEqual(ob.getLevelSize(price), len(level))
+            self.assertEqual(ob.getLevelQty(price), sum(order.qty for order in level))
+
+
+class TestOrderbook(BookCountersTest, unittest.TestCase):
 
     def test_add(self):
         ob = OrderBook()
@@ -144,6 +185,247 @@ class TestOrderbook(unittest.TestCase):
         expected_orders = [(30,3), (50,23)]
         self.assertEqual(itered_orders, expected_orders, "Ordem (30,23) não teve abatimento correto da quantidade.")
 
+    def test_sweepFromMin(self):
+        ob = OrderBook()
+
+        orders = [
+            Order(OrderSide.BUY, OrderType.LIMIT, 30, 20),
+            Order(OrderSide.BUY, OrderType.LIMIT, 30, 23),
+            Order(OrderSide.BUY, OrderType.LIMIT, 10, 10),
+            Order(OrderSide.BUY, OrderType.LIMIT, 50, 23)
+        ]
+
+        for order in orders:
+            ob.add(order)
+
+        fills = ob.sweepFromMin(40)
+        self.assertEqual(fills, [(10, 10), (30, 30)], "Preenchimentos por nível incorretos.")
+        itered_orders = [(order.price, order.qty) for order in ob.iterFromMin()]
+        self.assertEqual(itered_orders, [(30, 13), (50, 23)], "Níveis não foram abatidos corretamente.")
+
+        fills = ob.sweepFromMin(100, maxPrice=30)
+        self.assertEqual(fills, [(30, 13)], "Varredura ultrapassa o preço limite.")
+        self.assertEqual(ob.getMinPrice(), 50)
+
+    def test_sweepFromMax(self):
+        ob = OrderBook()
+
+        orders = [
+            Order(OrderSide.BUY, OrderType.LIMIT, 30, 20),
+            Order(OrderSide.BUY, OrderType.LIMIT, 10, 10),
+            Order(OrderSide.BUY, OrderType.LIMIT, 50, 23)
+        ]
+
+        for order in orders:
+            ob.add(order)
+
+        fills = ob.sweepFromMax(100)
+        self.assertEqual(fills, [(50, 23), (30, 20), (10, 10)], "Preenchimentos por nível incorretos.")
+        self.assertEqual(ob.getSize(), 0)
+        self.assertIsNone(ob.getMaxPrice())
+
+    def test_cancel(self):
+        ob = OrderBook()
+
+        orders = [
+            Order(OrderSide.BUY, OrderType.LIMIT, 30, 20, id=1),
+            Order(OrderSide.BUY, OrderType.LIMIT, 30, 23, id=2),
+            Order(OrderSide.BUY, OrderType.LIMIT, 30, 25, id=3),
+            Order(OrderSide.BUY, OrderType.LIMIT, 10, 10, id=4),
+        ]
+
+        for order in orders:
+            ob.add(order)
+
+        self.assertEqual(ob.cancel(2), orders[1], "Ordem cancelada não foi retornada.")
+        itered_orders = [order.id for order in ob.iterFromMin()]
+        self.assertEqual(itered_orders, [4, 1, 3], "Ordem do meio da fila não foi removida.")
+
+        ob.cancel(4)
+        self.assertEqual(ob.getMinPrice(), 30, "Nível vazio não foi removido no cancelamento.")
+        self.assertIsNone(ob.cancel(4), "Cancelamento repetido deve retornar None.")
+        self.assertIsNone(ob.getOrder(4))
+
+    def test_reduce(self):
+        ob = OrderBook()
+        ob.add(Order(OrderSide.BUY, OrderType.LIMIT, 30, 20, id=1))
+        ob.add(Order(OrderSide.BUY, OrderType.LIMIT, 30, 23, id=2))
+
+        ob.reduce(1, 5)
+        itered_orders = [(order.id, order.qty) for order in ob.iterFromMin()]
+        self.assertEqual(itered_orders, [(1, 5), (2, 23)], "Redução não mantém a prioridade.")
+        self.assertRaises(ValueError, ob.reduce, 1, 50)
+
+        ob.reduce(1, 0)
+        self.assertIsNone(ob.getOrder(1), "Redução a zero deve cancelar a ordem.")
+
+    def test_popQty_removes_from_index(self):
+        ob = OrderBook()
+        ob.add(Order(OrderSide.BUY, OrderType.LIMIT, 30, 20, id=1))
+        ob.add(Order(OrderSide.BUY, OrderType.LIMIT, 30, 23, id=2))
+
+        ob.popQty(30, 25)
+        self.assertIsNone(ob.getOrder(1), "Ordem preenchida continua no índice.")
+        self.assertEqual(ob.getOrder(2).qty, 18)
+
+    def _depthBook(self) -> OrderBook:
+        ob = OrderBook()
+        orders = [
+            Order(OrderSide.BUY, OrderType.LIMIT, 30, 20),
+            Order(OrderSide.BUY, OrderType.LIMIT, 30, 23),
+            Order(OrderSide.BUY, OrderType.LIMIT, 10, 10),
+            Order(OrderSide.BUY, OrderType.LIMIT, 20, 5),
+            Order(OrderSide.BUY, OrderType.LIMIT, 50, 23)
+        ]
+        for order in orders:
+            ob.add(order)
+        return ob
+
+    def test_depth(self):
+        ob = self._depthBook()
+        self.assertEqual(ob.depthFromMax(2), [(50, 23, 1), (30, 43, 2)], "Profundidade a partir do máximo incorreta.")
+        self.assertEqual(ob.depthFromMin(3), [(10, 10, 1), (20, 5, 1), (30, 43, 2)], "Profundidade a partir do mínimo incorreta.")
+        self.assertEqual(len(ob.depthFromMin(10)), 4)
+
+        # Qualquer sequência mutável serve como vetor de saída
+        arrays = ([0] * 3, [0] * 3, [0] * 3)
+        self.assertEqual(ob.depthFromMax(5, arrays), 3, "Número de níveis limitado pelo tamanho dos vetores.")
+        self.assertEqual(arrays, ([50, 30, 20], [23, 43, 5], [1, 2, 1]))
+
+    @unittest.skipIf(np is None, "numpy não instalado")
+    def test_depth_numpy(self):
+        ob = self._depthBook()
+        prices, qtys, counts = arrays = allocDepthArrays(10)
+        n = ob.depthFromMin(10, arrays)
+        self.assertEqual(n, 4)
+        self.assertEqual(prices[:n].tolist(), [10, 20, 30, 50])
+        self.assertEqual(qtys[:n].tolist(), [10, 5, 43, 23])
+        self.assertEqual(counts[:n].tolist(), [1, 1, 2, 1])
+
+
+    def test_backends(self):
+        rng = random.Random(3)
+        orders = [(i, rng.randint(90, 110), rng.randint(1, 5)) for i in range(300)]
+        books = [OrderBook(backend=backend, side=side) for backend in BACKENDS
+                 for side in (OrderSide.BUY, OrderSide.SELL)]
+        for ob in books:
+            for orderId, price, qty in orders:
+                ob.add(Order(OrderType.LIMIT, OrderSide.SELL, price, qty, orderId))
+            for orderId in range(0, 300, 3):
+                ob.cancel(orderId)
+        def state(ob):
+            return ([order.id for order in ob.iterFromMin()], ob.depthFromMax(5), ob.sweepFromMin(50, 100),
+                    ob.sweepFromMax(50), [order.id for order in ob.iterRange(95, 105, reverse=True)])
+        expected = state(books[0])
+        for ob in books[1:]:
+            self.assertEqual(state(ob), expected, f"Livro com backend {ob.backend} difere da árvore AVL")
+
+        with self.assertRaises(ValueError):
+            OrderBook(backend='skiplist')
+        with self.assertRaises(ValueError):
+            OrderBook(augmented=True, backend='btree')
+
+    def test_load_levels(self):
+        levels = []
+        orderId = 0
+        for price in range(10, 200, 5):
+            order_queue = OrderPriorityQueue()
+            order_queue.price = price
+            for qty in (1, 2):
+                orderId += 1
+                order_queue.append(Order(OrderSide.BUY, OrderType.LIMIT, price, qty, id=orderId))
+            levels.append((price, order_queue))
+
+        ob = OrderBook()
+        ob.load_levels(levels)
+        self.assertEqual(ob.getSize(), 2 * len(levels))
+        self.assertEqual(ob.getTotalQty(), 3 * len(levels))
+        self.assertEqual((ob.getMinPrice(), ob.getMaxPrice()), (10, 195))
+        self.assertEqual([order.id for order in ob.iterFromMin()], list(range(1, orderId + 1)))
+
+        # O livro carregado funciona normalmente
+        self.assertEqual(ob.cancel(3).price, 15)
+        self.assertEqual(ob.sweepFromMin(5), [(10, 3), (15, 2)])
+        ob.add(Order(OrderSide.BUY, OrderType.LIMIT, 12, 7, id=1000))
+        self.assertEqual(ob.getMinPrice(), 12)
+        self.assertEqual(ob.getLevelQty(195), 3)
+
+        with self.assertRaises(ValueError):
+            ob.load_levels(levels)
+
+    def _bruteCost(self, levels, qty):
+        filled = notional = 0
+        for price, levelQty, _ in levels:
+            take = min(qty - filled, levelQty)
+            filled += take
+            notional += take * price
+        return filled, notional
+
+    def test_augmented(self):
+        rng = random.Random(11)
+        ob = OrderBook(augmented=True)
+        ids = []
+        for i in range(1500):
+            action = rng.random()
+            if action < 0.55 or not ids:
+                ob.add(Order(OrderSide.SELL, OrderType.LIMIT, rng.randint(1, 60), rng.randint(1, 10), id=i))
+                ids.append(i)
+            elif action < 0.7:
+                ob.cancel(ids.pop(rng.randrange(len(ids))))
+            elif action < 0.8:
+                order = ob.getOrder(rng.choice(ids))
+                if order is not None:
+                    ob.reduce(order.id, rng.randint(0, order.qty))
+            elif action < 0.9:
+                ob.sweepFromMin(rng.randint(1, 40), rng.randint(1, 60))
+            elif action < 0.95:
+                ob.sweepFromMax(rng.randint(1, 40))
+            else:
+                price = ob.getMinPrice()
+                if price is not None:
+                    ob.popQty(price, rng.randint(1, 20))
+
+            if i % 10:
+                continue
+            for node in ob.orders.traverse(ob.orders.root):
+                subtree = list(ob.orders.traverse(node))
+                self.assertEqual(node.sumQty, sum(n.data.qty for n in subtree), "Soma de quantidade incorreta.")
+                self.assertEqual(node.sumNotional, sum(n.data.qty * n.key for n in subtree))
+
+            levels = ob.depthFromMin(1000)
+            price = rng.randint(0, 61)
+            self.assertEqual(ob.liquidityUpTo(price), sum(q for p, q, _ in levels if p <= price))
+            self.assertEqual(ob.liquidityDownTo(price), sum(q for p, q, _ in levels if p >= price))
+            qty = rng.randint(0, ob.getTotalQty() + 5)
+            self.assertEqual(ob.costFromMin(qty), self._bruteCost(levels, qty), "Custo a partir do mínimo incorreto.")
+            self.assertEqual(ob.costFromMax(qty), self._bruteCost(levels[::-1], qty))
+            self.assertEqual(ob.costFromMin(qty, price), self._bruteCost([l for l in levels if l[0] <= price], qty))
+            self.assertEqual(ob.costFromMax(qty, price), self._bruteCost([l for l in levels[::-1] if l[0] >= price], qty))
+
+    def test_augmented_required(self):
+        with self.assertRaises(ValueError):
+            OrderBook().liquidityUpTo(10)
+        ob = OrderBook(augmented=True)
+        self.assertEqual(ob.costFromMin(10), (0, 0))
+        ob.add(Order(OrderSide.SELL, OrderType.LIMIT, 30, 20, id=1))
+        self.assertEqual(ob.costFromMin(25), (20, 600))
+
+    def test_iterLevels(self):
+        ob = self._depthBook()
+        self.assertEqual([level.price for level in ob.iterLevels(15, 30)], [20, 30])
+        self.assertEqual([level.price for level in ob.iterLevels(15, 30, reverse=True)], [30, 20])
+        self.assertEqual([level.price for level in ob.iterLevels(high=25)], [10, 20])
+        self.assertEqual([level.price for level in ob.iterLevels(low=31, reverse=True)], [50])
+        self.assertEqual([(order.price, order.qty) for order in ob.iterRange(20, 30)], [(20, 5), (30, 20), (30, 23)])
+        self.assertEqual(list(ob.iterRange(60)), [])
+
+        # Ordens podem ser canceladas durante a iteração
+        ob = OrderBook()
+        for orderId, price in enumerate((30, 30, 10, 20, 50)):
+            ob.add(Order(OrderSide.BUY, OrderType.LIMIT, price, 1, id=orderId))
+        for order in ob.iterRange(10, 30):
+            ob.cancel(order.id)
+        self.assertEqual([order.price for order in ob.iterFromMin()], [50])
 
 if __name__ == '__main__':
   unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import random
+from ordered_map import BTreeMap, BTreeEntry, MapEntry, SortedArrayMap
+
+class TestOrderedMaps(unittest.TestCase):
+
+    def makeMaps(self):
+        return [SortedArrayMap(), SortedArrayMap(reverse=True), BTreeMap(order=4), BTreeMap()]
+
+    def _keys(self, tree):
+        return [node.key for node in tree.iterRange()]
+
+    def test_random_ops(self):
+        rng = random.Random(7)
+        for tree in self.makeMaps():
+            nodes = {}
+            for _ in range(3000):
+                key = rng.randint(0, 300)
+                if key in nodes and rng.random() < 0.6:
+                    tree.delete(nodes.pop(key))
+                elif key not in nodes:
+                    nodes[key] = tree.nodeClass(key=key, data=key)
+                    tree.insert(nodes[key])
+                expected = sorted(nodes)
+                if expected:
+                    self.assertIs(tree.minNode, nodes[expected[0]], "Mínimo incorreto")
+                    self.assertIs(tree.maxNode, nodes[expected[-1]], "Máximo incorreto")
+                else:
+                    self.assertIsNone(tree.minNode)
+                    self.assertIsNone(tree.maxNode)
+            self.assertEqual(self._keys(tree), sorted(nodes), f"Chaves fora de ordem em {type(tree).__name__}")
+            self.assertEqual(len(tree), len(nodes))
+            for key in range(301):
+                self.assertIs(tree.get(key), nodes.get(key), "get não acha a entrada")
+
+            # Sucessor e predecessor percorrem todas as entradas
+            expected = sorted(nodes)
+            node, keys = tree.minNode, []
+            while node is not None:
+                keys.append(node.key)
+                node = tree.getSuccessor(node)
+            self.assertEqual(keys, expected)
+            node, keys = tree.maxNode, []
+            while node is not None:
+                keys.append(node.key)
+                node = tree.getPredecessor(node)
+            self.assertEqual(keys, expected[::-1])
+
+    def test_iterRange(self):
+        for tree in self.makeMaps():
+            for key in range(0, 100, 2):
+                tree.insert(tree.nodeClass(key=key))
+            self.assertEqual(self._keys(tree)[:3], [0, 2, 4])
+            self.assertEqual([node.key for node in tree.iterRange(11, 19)], [12, 14, 16, 18])
+            self.assertEqual([node.key for node in tree.iterRange(10, 18, reverse=True)], [18, 16, 14, 12, 10])
+            self.assertEqual([node.key for node in tree.iterRange(high=3)], [0, 2])
+            self.assertEqual([node.key for node in tree.iterRange(low=95, reverse=True)], [98, 96])
+            self.assertEqual(list(tree.iterRange(200)), [])
+
+            # Entradas entregues podem ser removidas durante a iteração
+            for node in tree.iterRange(10, 40):
+                tree.delete(node)
+            for node in tree.iterRange(60, 90, reverse=True):
+                tree.delete(node)
+            self.assertEqual(self._keys(tree), [0, 2, 4, 6, 8, 42, 44, 46, 48, 50, 52, 54, 56, 58, 92, 94, 96, 98],
+                             f"Remoção durante a iteração falhou em {type(tree).__name__}")
+
+    def test_fromSorted(self):
+        pairs = [(key, str(key)) for key in range(0, 1000, 3)]
+        for tree in (SortedArrayMap.fromSorted(pairs), SortedArrayMap.fromSorted(pairs, reverse=True),
+                     BTreeMap.fromSorted(pairs, order=4), BTreeMap.fromSorted(pairs)):
+            self.assertEqual([(node.key, node.data) for node in tree.iterRange()], pairs)
+            self.assertEqual(tree.get(999).data, '999')
+            # A estrutura continua válida para inserções e remoções
+            for key in range(0, 1000, 3):
+                tree.delete(tree.get(key))
+                tree.insert(tree.nodeClass(key=key + 1))
+            self.assertEqual(self._keys(tree), [key + 1 for key, _ in pairs])
+        with self.assertRaises(ValueError):
+            SortedArrayMap.fromSorted([(2, None), (1, None)])
+        with self.assertRaises(ValueError):
+            BTreeMap.fromSorted([(1, None), (1, None)])
+        self.assertIsNone(BTreeMap.fromSorted([]).minNode)
+
+    def test_best_at_end(self):
+        # Melhor preço no fim do vetor: venda (reverse) guarda o menor preço por último
+        tree = SortedArrayMap(reverse=True)
+        for key in (30, 10, 20):
+            tree.insert(MapEntry(key=key))
+        self.assertEqual(tree.entries[-1].key, 10)
+        tree.delete(tree.minNode)
+        self.assertEqual(tree.minNode.key, 20)
+
+    def test_btree_leaves(self):
+        tree = BTreeMap(order=4)
+        nodes = [BTreeEntry(key=key) for key in range(100)]
+        for node in nodes:
+            tree.insert(node)
+        # Cada entrada aponta para a folha que a contém
+        for node in nodes:
+            self.assertIn(node, node.leaf.entries)
+        for node in nodes[::2]:
+            tree.delete(node)
+            self.assertIsNone(node.leaf)
+        for node in nodes[1::2]:
+            self.assertIn(node, node.leaf.entries)
+        with self.assertRaises(ValueError):
+            BTreeMap(order=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
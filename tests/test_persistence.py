@@ -0,0 +1,203 @@
+import io
+import os
+import tempfile
+import unittest
+from order import Order, OrderSide, OrderType
+from orderbook import OrderBook
+from matching_engine import MatchingEngine
+from binary_protocol import RECORD
+from persistence import Journal, loadSnapshot, restore, writeSnapshot
+from market_data import MarketDataFeed
+from trade_sink import CallbackSink, StreamSink
+from main import runStream
+from fixed_point import FixedPointScale
+from trade import Trade
+
+
+class TestPersistence(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.journalPath = os.path.join(self.directory.name, 'journal.bin')
+        self.snapshotPath = os.path.join(self.directory.name, 'snapshot.bin')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def makeEngine(self, journal=None):
+        return MatchingEngine(OrderBook(), OrderBook(), sinks=[], journal=journal)
+
+    def _state(self, engine):
+        return [(order.side, order.id, order.price, order.qty)
+                for book in (engine.buyOrderBook, engine.sellOrderBook)
+                for order in book.iterFromMin()]
+
+    def _run(self, engine):
+        for price in range(10, 16):
+            engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=price, qty=10))
+            engine.order(Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=price - 6, qty=10))
+        engine.order(Order(type=OrderType.MARKET, side=OrderSide.BUY, qty=15))
+        engine.cancel(3)
+        engine.amend(4, 5, 4)
+        engine.amend(6, 9, 10)
+        engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=7, qty=12))
+
+    def test_restore_journal(self):
+        with Journal(self.journalPath, groupSize=4) as journal:
+            engine = self.makeEngine(journal)
+            self._run(engine)
+
+        restored = self.makeEngine()
+        self.assertEqual(restore(restored, journalPath=self.journalPath), 17)
+        self.assertEqual(self._state(restored), self._state(engine), "Estado recuperado difere do original.")
+        self.assertEqual(next(restored.orderIds), next(engine.orderIds), "Ids deveriam continuar a sequência.")
+
+    def test_restore_snapshot_tail(self):
+        with Journal(self.journalPath, groupSize=4, snapshotPath=self.snapshotPath, snapshotEvery=5) as journal:
+            engine = self.makeEngine(journal)
+            self._run(engine)
+
+        restored = self.makeEngine()
+        count = restore(restored, self.snapshotPath, self.journalPath)
+        self.assertLessEqual(count, 5, "Apenas o trecho após o snapshot deveria ser reproduzido.")
+        self.assertEqual(self._state(restored), self._state(engine), "Estado recuperado difere do original.")
+        self.assertEqual(restored.buyOrderBook.getTotalQty(), engine.buyOrderBook.getTotalQty())
+
+        # O engine recuperado continua gravando no mesmo journal
+        with Journal(self.journalPath) as journal:
+            restored.journal = journal
+            restored.order(Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=1, qty=1))
+            writeSnapshot(restored, self.snapshotPath)
+        again = self.makeEngine()
+        self.assertEqual(restore(again, self.snapshotPath, self.journalPath), 0)
+        self.assertEqual(self._state(again), self._state(restored))
+
+    def test_group_commit(self):
+        journal = Journal(self.journalPath, groupSize=4, fsync=False)
+        engine = self.makeEngine(journal)
+        for i in range(3):
+            engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=10, qty=1))
+        self.assertEqual(os.path.getsize(self.journalPath), 0, "Mensagens deveriam esperar o lote.")
+        engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=10, qty=1))
+        self.assertEqual(os.path.getsize(self.journalPath), 4 * RECORD.size)
+        journal.close()
+
+    def test_commit_per_chunk(self):
+        journal = Journal(self.journalPath, fsync=False)
+        output = io.StringIO()
+        scale = FixedPointScale(tickSize='1')
+        engine = MatchingEngine(OrderBook(), OrderBook(), sinks=[StreamSink(output, scale)], scale=scale,
+                                journal=journal)
+        # O bloco inteiro é gravado no journal antes da saída ser descarregada
+        runStream(engine, io.StringIO("limit sell 10 5\nlimit sell 11 5\nmarket buy 7\n"))
+        self.assertEqual(os.path.getsize(self.journalPath), 3 * RECORD.size)
+        self.assertEqual(output.getvalue().count("Trade"), 2)
+        journal.close()
+
+    def test_torn_tail(self):
+        with Journal(self.journalPath) as journal:
+            self._run(self.makeEngine(journal))
+        with open(self.journalPath, 'ab') as f:
+            f.write(b'\x00' * 7)
+
+        restored = self.makeEngine()
+        self.assertEqual(restore(restored, journalPath=self.journalPath), 17, "Registro incompleto deveria ser ignorado.")
+        journal = Journal(self.journalPath)
+        self.assertEqual(journal.offset, 17)
+        journal.close()
+
+    def test_restore_stops(self):
+        with Journal(self.journalPath, snapshotPath=self.snapshotPath) as journal:
+            engine = self.makeEngine(journal)
+            self._run(engine)
+            engine.order(Order(type=OrderType.STOP, side=OrderSide.BUY, qty=5, stopPrice=13))
+            engine.order(Order(type=OrderType.STOP_LIMIT, side=OrderSide.SELL, price=3, qty=5, stopPrice=4))
+            writeSnapshot(engine, self.snapshotPath)
+            engine.order(Order(type=OrderType.STOP, side=OrderSide.SELL, qty=2, stopPrice=2))
+
+        for snapshotPath in (None, self.snapshotPath):
+            restored = self.makeEngine()
+            restore(restored, snapshotPath, self.journalPath)
+            self.assertEqual(self._state(restored), self._state(engine))
+            for stops in ('buyStops', 'sellStops'):
+                self.assertEqual([(order.id, order.type, order.price, order.qty, order.stopPrice)
+                                  for order in getattr(restored, stops)],
+                                 [(order.id, order.type, order.price, order.qty, order.stopPrice)
+                                  for order in getattr(engine, stops)], "Ordens stop não foram recuperadas.")
+
+            # As ordens stop recuperadas disparam normalmente
+            restored.order(Order(type=OrderType.MARKET, side=OrderSide.BUY, qty=15))
+            self.assertEqual(len(restored.buyStops), 0)
+
+        # Prefixo de ordem stop sem a ordem (queda entre os registros) é descartado
+        with open(self.journalPath, 'rb') as f:
+            data = f.read()
+        with open(self.journalPath, 'wb') as f:
+            f.write(data[:-RECORD.size])
+        journal = Journal(self.journalPath)
+        self.assertEqual(journal.offset, len(data) // RECORD.size - 2)
+        journal.close()
+
+    def test_restore_muted(self):
+        with Journal(self.journalPath, snapshotPath=self.snapshotPath) as journal:
+            engine = self.makeEngine(journal)
+            self._run(engine)
+            writeSnapshot(engine, self.snapshotPath)
+            engine.order(Order(type=OrderType.MARKET, side=OrderSide.BUY, qty=5))
+
+        trades = []
+        batches = []
+        feed = MarketDataFeed()
+        feed.subscribe(batches.append)
+        restored = MatchingEngine(OrderBook(), OrderBook(), sinks=[CallbackSink(trades.append)], feed=feed)
+        restore(restored, self.snapshotPath, self.journalPath)
+        # Trades reproduzidos não são emitidos de novo
+        self.assertEqual(trades, [])
+        self.assertEqual(restored.previousTrades, [])
+        self.assertEqual(batches, [])
+        self.assertEqual(self._state(restored), self._state(engine))
+
+        # Destinos, histórico e feed voltam a funcionar depois da recuperação
+        restored.order(Order(type=OrderType.MARKET, side=OrderSide.BUY, qty=1))
+        self.assertEqual(len(trades), 1)
+        self.assertEqual(restored.previousTrades, trades)
+        self.assertEqual(batches[-1].trades, trades)
+
+    def test_invalid_stop_journaled(self):
+        with Journal(self.journalPath, groupSize=1, fsync=False) as journal:
+            engine = self.makeEngine(journal)
+            # Mesmo erro que sem journal, e nada é gravado
+            for order in (Order(type=OrderType.STOP_LIMIT, side=OrderSide.BUY, qty=5, stopPrice=13),
+                          Order(type=OrderType.STOP, side=OrderSide.BUY, qty=5)):
+                with self.assertRaises(ValueError):
+                    engine.order(order)
+            self.assertEqual(journal.offset, 0)
+            self.assertEqual(len(engine.buyStops), 0)
+        self.assertEqual(os.path.getsize(self.journalPath), 0)
+
+    def test_invalid_snapshot(self):
+        with open(self.snapshotPath, 'wb') as f:
+            f.write(b'invalido' * 8)
+        with self.assertRaises(ValueError):
+            loadSnapshot(self.makeEngine(), self.snapshotPath)
+
+
+    def test_restore_auction(self):
+        with Journal(self.journalPath) as journal:
+            engine = self.makeEngine(journal)
+            engine.startAuction()
+            engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=10, qty=10))
+            engine.order(Order(type=OrderType.LIMIT, side=OrderSide.BUY, price=12, qty=4))
+            engine.order(Order(type=OrderType.MARKET, side=OrderSide.BUY, qty=3))
+            with self.assertRaises(ValueError):
+                writeSnapshot(engine, self.snapshotPath)
+            engine.uncross(11)
+            writeSnapshot(engine, self.snapshotPath)
+
+        restored = self.makeEngine()
+        restore(restored, journalPath=self.journalPath)
+        self.assertEqual(self._state(restored), self._state(engine), "Leilão reproduzido difere do original.")
+        self.assertEqual(self._state(restored), [(OrderSide.SELL, 1, 10, 3)])
+
+if __name__ == '__main__':
+    unittest.main()
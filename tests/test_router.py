@@ -0,0 +1,91 @@
+import unittest
+from router import SymbolRouter
+from binary_protocol import MSG_CANCEL
+from order import Order, OrderSide, OrderType
+from orderbook import OrderBook
+from trade import Trade
+
+
+def sortedArrayBook(side: OrderSide) -> OrderBook:
+    return OrderBook(backend='sorted-array', side=side)
+
+
+class TestSymbolRouter(unittest.TestCase):
+
+    numWorkers = 0
+
+    def _orders(self, router: SymbolRouter):
+        for symbol in ('PETR4', 'VALE3', 'ITUB4'):
+            router.order(symbol, Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=10, qty=5))
+            router.order(symbol, Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=11, qty=5))
+        router.submit('VALE3', (MSG_CANCEL, 0, 1, 0, 0))
+        for symbol in ('PETR4', 'VALE3'):
+            router.order(symbol, Order(type=OrderType.MARKET, side=OrderSide.BUY, qty=3))
+            router.order(symbol, Order(type=OrderType.MARKET, side=OrderSide.BUY, qty=4))
+
+    def test_route(self):
+        with SymbolRouter(numWorkers=self.numWorkers, batchSize=2) as router:
+            self._orders(router)
+            trades = router.flush()
+
+        self.assertEqual(trades, {
+            'PETR4': [Trade(price=10, qty=3), Trade(price=10, qty=2), Trade(price=11, qty=2)],
+            'VALE3': [Trade(price=11, qty=3), Trade(price=11, qty=2)],
+        }, "Trades não foram agrupados por símbolo, em ordem.")
+
+    def test_book_sides(self):
+        with SymbolRouter(numWorkers=self.numWorkers, bookFactory=sortedArrayBook, batchSize=2) as router:
+            self._orders(router)
+            trades = router.flush()
+            if self.numWorkers == 0:
+                # Livro de venda com o menor preço no fim do vetor
+                engine = router._localShard.engines['PETR4']
+                self.assertFalse(engine.buyOrderBook.orders.reverse)
+                self.assertTrue(engine.sellOrderBook.orders.reverse)
+
+        self.assertEqual(trades['PETR4'], [Trade(price=10, qty=3), Trade(price=10, qty=2), Trade(price=11, qty=2)])
+
+    def test_flush_empty(self):
+        with SymbolRouter(numWorkers=self.numWorkers) as router:
+            self.assertEqual(router.flush(), {})
+
+    def test_rejects(self):
+        with SymbolRouter(numWorkers=self.numWorkers) as router:
+            router.order('PETR4', Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=10, qty=5))
+            router.submit('PETR4', (99, 0, 0, 0, 0))
+            router.order('PETR4', Order(type=OrderType.MARKET, side=OrderSide.BUY, qty=3))
+            trades = router.flush()
+            # O erro não interrompe as mensagens seguintes do lote
+            self.assertEqual(trades, {'PETR4': [Trade(price=10, qty=3)]})
+            self.assertEqual(len(router.rejects), 1)
+            symbol, record, error = router.rejects[0]
+            self.assertEqual((symbol, record), ('PETR4', (99, 0, 0, 0, 0)))
+            self.assertIn("99", error)
+            self.assertEqual(router.flush(), {})
+            self.assertEqual(router.rejects, [])
+
+    def test_workerOf(self):
+        router = SymbolRouter(numWorkers=0)
+        self.assertEqual(router.workerOf('PETR4'), 0)
+
+
+class TestSymbolRouterProcesses(TestSymbolRouter):
+
+    numWorkers = 2
+
+    def test_stable_assignment(self):
+        with SymbolRouter(numWorkers=2) as router:
+            self.assertEqual(router.workerOf('PETR4'), router.workerOf('PETR4'))
+            self.assertIn(router.workerOf('VALE3'), (0, 1))
+
+    def test_dead_worker(self):
+        with SymbolRouter(numWorkers=1) as router:
+            router._workers[0].terminate()
+            router._workers[0].join()
+            router.order('PETR4', Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=10, qty=5))
+            with self.assertRaises(RuntimeError):
+                router.flush(timeout=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import io
+import unittest
+from matching_engine import MatchingEngine
+from orderbook import OrderBook
+from order import Order, OrderSide, OrderType
+from trade import Trade
+from trade_sink import CallbackSink, NullSink, RingBufferSink, StreamSink
+from fixed_point import FixedPointScale
+
+
+class TestTradeSink(unittest.TestCase):
+
+    def test_ring_buffer(self):
+        sink = RingBufferSink(capacity=2)
+        for i in range(5):
+            sink.emit(Trade(price=i, qty=1))
+        self.assertEqual(list(sink), [Trade(price=3, qty=1), Trade(price=4, qty=1)], "Histórico não tem capacidade fixa.")
+
+    def test_stream_scaled(self):
+        output = io.StringIO()
+        sink = StreamSink(output, FixedPointScale(tickSize='0.01', lotSize='10'))
+        sink.emit(Trade(price=2001, qty=3))
+        self.assertEqual(output.getvalue(), "Trade, price: 20.01, qty: 30\n")
+
+    def test_engine_sinks(self):
+        received = []
+        output = io.StringIO()
+        engine = MatchingEngine(OrderBook(), OrderBook(), history=RingBufferSink(capacity=1),
+                                sinks=[CallbackSink(received.append), StreamSink(output)])
+        engine.addSink(NullSink())
+
+        engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=10, qty=1))
+        engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=11, qty=1))
+        engine.order(Order(type=OrderType.MARKET, side=OrderSide.BUY, qty=2))
+
+        trades = [Trade(price=10, qty=1), Trade(price=11, qty=1)]
+        self.assertEqual(received, trades, "Callback não recebeu todos os trades.")
+        self.assertEqual(output.getvalue().count("\n"), 2)
+        self.assertEqual(engine.previousTrades, trades[-1:], "Histórico deve guardar apenas o último trade.")
+
+    def test_engine_without_history(self):
+        engine = MatchingEngine(OrderBook(), OrderBook(), history=None, sinks=[])
+        engine.order(Order(type=OrderType.LIMIT, side=OrderSide.SELL, price=10, qty=1))
+        engine.order(Order(type=OrderType.MARKET, side=OrderSide.BUY, qty=1))
+        self.assertEqual(engine.previousTrades, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
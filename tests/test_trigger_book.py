@@ -0,0 +1,46 @@
+import unittest
+import random
+from trigger_book import TriggerBook
+from order import Order, OrderSide, OrderType
+
+class TestTriggerBook(unittest.TestCase):
+
+    def _stop(self, side, stopPrice, orderId):
+        return Order(type=OrderType.STOP, side=side, qty=1, id=orderId, stopPrice=stopPrice)
+
+    def test_popTriggered(self):
+        book = TriggerBook(OrderSide.BUY)
+        for orderId, stopPrice in enumerate((105, 101, 103, 101, 110)):
+            book.add(self._stop(OrderSide.BUY, stopPrice, orderId))
+        self.assertEqual(book.popTriggered(100), [])
+        # Da mais próxima para a mais distante e, no mesmo preço, por ordem de chegada
+        self.assertEqual([order.id for order in book.popTriggered(103)], [1, 3, 2])
+        self.assertEqual([order.id for order in book], [0, 4])
+        self.assertEqual([order.id for order in book.popTriggered(200)], [0, 4])
+        self.assertEqual(len(book), 0)
+
+        book = TriggerBook(OrderSide.SELL)
+        for orderId, stopPrice in enumerate((95, 99, 97, 99)):
+            book.add(self._stop(OrderSide.SELL, stopPrice, orderId))
+        self.assertEqual([order.id for order in book.popTriggered(97)], [1, 3, 2])
+        self.assertIsNone(book.getOrder(1))
+        self.assertEqual(book.getOrder(0).stopPrice, 95)
+
+    def test_cancel(self):
+        rng = random.Random(5)
+        book = TriggerBook(OrderSide.SELL)
+        orders = [self._stop(OrderSide.SELL, rng.randint(90, 95), orderId) for orderId in range(100)]
+        for order in orders:
+            book.add(order)
+        for order in orders[::2]:
+            self.assertIs(book.cancel(order.id), order)
+        self.assertIsNone(book.cancel(0))
+        # Ordens iguais exceto pelo id: o cancelamento remove a ordem certa
+        remaining = orders[1::2]
+        expected = sorted(remaining, key=lambda order: -order.stopPrice)
+        self.assertEqual([order.id for order in book], [order.id for order in expected])
+        self.assertEqual([order.id for order in book.popTriggered(0)], [order.id for order in expected])
+
+
+if __name__ == '__main__':
+    unittest.main()
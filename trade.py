@@ -5,7 +5,8 @@ from enum import Enum
 from order import Order, OrderSide, OrderType
 from orderbook import IOrderBook, OrderBook
 
-@dataclass
+@dataclass(slots=True)
 class Trade:
+    # Em modo de ponto fixo, preço em ticks e quantidade em lotes (inteiros)
     price: float
-    qty: int
+    qty: float
@@ -0,0 +1,71 @@
+from typing import Callable, Iterator, List, Optional, TextIO
+from abc import ABC, abstractmethod
+from collections import deque
+from fixed_point import FixedPointScale
+from trade import Trade
+
+
+class ITradeSink(ABC):
+    """ Destino dos trades gerados pelo MatchingEngine. """
+    @abstractmethod
+    def emit(self, trade: Trade):
+        pass
+
+    def flush(self):
+        pass
+
+
+class NullSink(ITradeSink):
+    """ Descarta os trades (para benchmarks). """
+    def emit(self, trade: Trade):
+        pass
+
+
+class RingBufferSink(ITradeSink):
+    """ Guarda os últimos trades, com capacidade fixa. """
+    def __init__(self, capacity: int = 1024):
+        self.trades = deque(maxlen=capacity)
+        # Atalho: emit é o próprio append do deque
+        self.emit = self.trades.append
+
+    def emit(self, trade: Trade):
+        self.trades.append(trade)
+
+    def __len__(self):
+        return len(self.trades)
+
+    def __iter__(self) -> Iterator[Trade]:
+        return iter(self.trades)
+
+
+class StreamSink(ITradeSink):
+    """
+        Escreve os trades num stream de texto, uma linha por trade.
+        Com escala de ponto fixo, converte ticks e lotes na saída.
+    """
+    def __init__(self, stream: TextIO, scale: Optional[FixedPointScale] = None):
+        self.stream = stream
+        self.scale = scale
+        self._write = stream.write
+        if scale is not None:
+            self.emit = self._emitScaled
+
+    def emit(self, trade: Trade):
+        self._write(f"Trade, price: {trade.price}, qty: {trade.qty}\n")
+
+    def _emitScaled(self, trade: Trade):
+        scale = self.scale
+        self._write(f"Trade, price: {scale.ticksToPrice(trade.price)}, qty: {scale.lotsToQty(trade.qty)}\n")
+
+    def flush(self):
+        self.stream.flush()
+
+
+class CallbackSink(ITradeSink):
+    """ Chama uma função do usuário para cada trade. """
+    def __init__(self, callback: Callable[[Trade], None]):
+        self.callback = callback
+        self.emit = callback
+
+    def emit(self, trade: Trade):
+        self.callback(trade)
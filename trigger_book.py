@@ -0,0 +1,82 @@
+from typing import Dict, Iterator, List, Optional
+from bisect import bisect_left
+from order import Order, OrderSide
+
+
+class TriggerBook:
+    """
+        Ordens stop de um lado, aguardando o preço de disparo (stopPrice).
+        Compra dispara quando um trade sai a stopPrice ou acima; venda, a
+        stopPrice ou abaixo.
+
+        As ordens ficam em dois vetores paralelos ordenados por chave, com as
+        próximas a disparar no fim: a chave é -stopPrice na compra e stopPrice
+        na venda. Um trade dispara sempre um sufixo dos vetores, retirado com
+        um bisect e um truncamento, em O(log n + k) para k ordens disparadas,
+        sem percorrer as demais.
+    """
+    __slots__ = ('side', 'keys', 'orders', 'index')
+
+    def __init__(self, side: OrderSide):
+        self.side = side
+        self.keys: List[float] = []
+        self.orders: List[Order] = []
+        # Ordens por id, para cancelamento
+        self.index: Dict[int, Order] = {}
+
+    def _key(self, stopPrice: float) -> float:
+        return -stopPrice if self.side == OrderSide.BUY else stopPrice
+
+    def add(self, order: Order):
+        """ Guarda a ordem. No mesmo stopPrice, dispara primeiro a que chegou antes. """
+        key = self._key(order.stopPrice)
+        # Mais novas antes das mais antigas de mesma chave: o sufixo é entregue de trás para frente
+        i = bisect_left(self.keys, key)
+        self.keys.insert(i, key)
+        self.orders.insert(i, order)
+        if order.id is not None:
+            self.index[order.id] = order
+
+    def popTriggered(self, price: float) -> List[Order]:
+        """
+            Retira as ordens disparadas por um trade ao preço informado, da mais
+            próxima do preço de disparo para a mais distante e, no mesmo
+            stopPrice, por ordem de chegada.
+        """
+        keys = self.keys
+        i = bisect_left(keys, self._key(price))
+        if i == len(keys):
+            return []
+        triggered = self.orders[i:]
+        del keys[i:]
+        del self.orders[i:]
+        triggered.reverse()
+        index = self.index
+        for order in triggered:
+            index.pop(order.id, None)
+        return triggered
+
+    def cancel(self, orderId: int) -> Optional[Order]:
+        """ Remove a ordem com o id informado. Retorna a ordem, ou None. """
+        order = self.index.pop(orderId, None)
+        if order is None:
+            return None
+        key = self._key(order.stopPrice)
+        orders = self.orders
+        i = bisect_left(self.keys, key)
+        # Entre as ordens de mesma chave, pela identidade
+        while orders[i] is not order:
+            i += 1
+        del self.keys[i]
+        del orders[i]
+        return order
+
+    def getOrder(self, orderId: int) -> Optional[Order]:
+        return self.index.get(orderId)
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def __iter__(self) -> Iterator[Order]:
+        """ Ordens da primeira a disparar para a última. """
+        return reversed(self.orders)